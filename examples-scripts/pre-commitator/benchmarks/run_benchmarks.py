@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmarks for the quality gate.
+
+Each run generates a synthetic git repository (see ``synthetic_repo.py``), puts
+the deterministic stand-in tools from ``benchmarks/bin`` first on the PATH and
+times the following scenarios:
+
+    staged-cold: QualityGate.run_all_checks() on the staged files, no cache
+    staged-warm: QualityGate.run_all_checks() with a warm result cache
+    full-scan:   QualityGate.run_full_scan() over all tracked files, no cache
+    script-all:  ./run_quality_check.sh --all --no-cache, as a user runs it
+
+The p50 and p95 latencies are printed and can be saved as JSON. When a saved
+baseline is given, a scenario whose p50 or p95 grew by more than the tolerance
+is reported as a regression and the script exits with status 1.
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+STUB_BIN_DIR = os.path.join(BENCHMARK_DIR, "bin")
+QUALITY_CHECK_SCRIPT = os.path.join(PROJECT_DIR, "run_quality_check.sh")
+
+sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
+
+from synthetic_repo import FUNCTION_TEMPLATES, SyntheticRepo  # noqa: E402
+
+import quality_gate  # noqa: E402
+
+SCENARIOS = ["staged-cold", "staged-warm", "full-scan", "script-all"]
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """Return the nearest-rank percentile of a list of samples.
+
+    Args:
+        samples: Measured values (at least one)
+        percent: Percentile between 0 and 100
+
+    Returns:
+        Smallest sample such that ``percent``% of the samples are not larger
+    """
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Point the quality gate at the stand-in tools with the requested settings.
+
+    Quality gate variables inherited from the caller are removed so that the
+    measurements do not depend on the local configuration.
+    """
+    for key in list(os.environ):
+        if key.startswith(("DISABLE_", "QUALITY_GATE_", "STUB_")):
+            del os.environ[key]
+    os.environ["PATH"] = STUB_BIN_DIR + os.pathsep + os.environ.get("PATH", "")
+    if not args.in_process:
+        os.environ["QUALITY_GATE_IN_PROCESS"] = "0"
+    os.environ["STUB_DELAY_MS"] = str(args.delay_ms)
+    os.environ["STUB_DELAY_PER_FILE_MS"] = str(args.per_file_delay_ms)
+    os.environ["STUB_FINDINGS_PER_FILE"] = str(args.findings_per_file)
+
+
+def scenario_runner(name: str, jobs: Optional[int]) -> Callable[[], None]:
+    """Return a function running one iteration of a scenario in the cwd."""
+    if name == "staged-cold":
+        return lambda: quality_gate.QualityGate(
+            jobs=jobs, use_cache=False
+        ).run_all_checks()
+    if name == "staged-warm":
+        return lambda: quality_gate.QualityGate(jobs=jobs).run_all_checks()
+    if name == "full-scan":
+        return lambda: quality_gate.QualityGate(use_cache=False).run_full_scan(jobs)
+
+    command = ["bash", QUALITY_CHECK_SCRIPT, "--all", "--no-cache"]
+    if jobs:
+        command += ["--jobs", str(jobs)]
+    return lambda: subprocess.run(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+    )
+
+
+def measure(run: Callable[[], None], iterations: int, warmup: int) -> List[float]:
+    """Time a scenario.
+
+    Args:
+        run: Function running one iteration
+        iterations: Number of timed iterations
+        warmup: Number of untimed iterations run first
+
+    Returns:
+        Wall time of each timed iteration in seconds
+    """
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, slack: float
+) -> Dict[str, str]:
+    """Compare results against a baseline.
+
+    Args:
+        results: Current p50/p95 per scenario
+        baseline: Baseline p50/p95 per scenario
+        tolerance: Allowed relative growth (0.2 = 20%)
+        slack: Allowed absolute growth in seconds, absorbing noise on fast scenarios
+
+    Returns:
+        Status per scenario: 'ok', 'REGRESSION' or 'new'
+    """
+    statuses = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            statuses[name] = "new"
+            continue
+        regressed = any(
+            result[metric] > previous[metric] * (1 + tolerance) + slack
+            for metric in ("p50", "p95")
+        )
+        statuses[name] = "REGRESSION" if regressed else "ok"
+    return statuses
+
+
+def print_report(
+    results: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    statuses: Dict[str, str],
+) -> None:
+    """Print a table of the results and, if any, the baseline comparison."""
+    header = f"{'Scenario':<14}{'Runs':>6}{'p50 ms':>10}{'p95 ms':>10}"
+    if baseline:
+        header += f"{'Base p50':>10}{'Base p95':>10}  Status"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        line = (
+            f"{name:<14}{result['runs']:>6}"
+            f"{result['p50'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}"
+        )
+        if baseline:
+            previous = baseline.get(name, {})
+            for metric in ("p50", "p95"):
+                value = previous.get(metric)
+                line += f"{value * 1000:>10.1f}" if value is not None else f"{'-':>10}"
+            line += f"  {statuses[name]}"
+        print(line)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command-line parser of the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Benchmark the quality gate latency")
+    repo = parser.add_argument_group("synthetic repository")
+    repo.add_argument("--files", type=int, default=200, help="Number of source files")
+    repo.add_argument(
+        "--languages",
+        default=",".join(FUNCTION_TEMPLATES),
+        help="Comma-separated file extensions (default: %(default)s)",
+    )
+    repo.add_argument("--lines", type=int, default=200, help="Lines per file")
+    repo.add_argument(
+        "--staged", type=int, default=10, help="Files with staged changes"
+    )
+    repo.add_argument(
+        "--seed", type=int, default=0, help="Seed of the generated content"
+    )
+
+    tools = parser.add_argument_group("stand-in tools")
+    tools.add_argument(
+        "--findings-per-file", type=int, default=1, help="Findings reported per file"
+    )
+    tools.add_argument(
+        "--delay-ms", type=float, default=0, help="Delay of every tool invocation"
+    )
+    tools.add_argument(
+        "--per-file-delay-ms", type=float, default=0, help="Extra delay per file"
+    )
+    tools.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Let Lizard and Bandit run in-process when their libraries are installed",
+    )
+
+    run = parser.add_argument_group("measurement")
+    run.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma-separated scenarios to run (default: %(default)s)",
+    )
+    run.add_argument("--iterations", type=int, default=10, help="Timed runs each")
+    run.add_argument("--warmup", type=int, default=1, help="Untimed runs first")
+    run.add_argument("-j", "--jobs", type=int, default=None, help="Gate --jobs value")
+    run.add_argument("--output", metavar="FILE", help="Save the results as JSON")
+    run.add_argument("--baseline", metavar="FILE", help="Results to compare against")
+    run.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed p50/p95 growth over the baseline (default: %(default)s)",
+    )
+    run.add_argument(
+        "--slack-ms",
+        type=float,
+        default=5,
+        help="Allowed absolute growth, for fast scenarios (default: %(default)s)",
+    )
+    run.add_argument(
+        "--keep", action="store_true", help="Keep the synthetic repository"
+    )
+    return parser
+
+
+def main() -> int:
+    """Generate the repository, run the scenarios and report.
+
+    Returns:
+        1 if a regression was detected, else 0
+    """
+    args = build_parser().parse_args()
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        print(f"Error: Unknown scenarios: {', '.join(sorted(unknown))}")
+        return 2
+
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "files",
+            "languages",
+            "lines",
+            "staged",
+            "seed",
+            "findings_per_file",
+            "delay_ms",
+            "per_file_delay_ms",
+            "in_process",
+            "jobs",
+        )
+    }
+    baseline: Dict[str, Dict] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            saved = json.load(handle)
+        baseline = saved.get("results", {})
+        if saved.get("config") != config:
+            print("Note: The baseline was recorded with different settings")
+
+    configure_environment(args)
+    workdir = tempfile.mkdtemp(prefix="quality-gate-bench-")
+    repo = SyntheticRepo(
+        os.path.join(workdir, "repo"),
+        file_count=args.files,
+        languages=args.languages.split(","),
+        lines=args.lines,
+        staged=args.staged,
+        seed=args.seed,
+    )
+    print(f"Generating {args.files} files ({args.languages}), {args.staged} staged...")
+    repo.create()
+
+    previous_cwd = os.getcwd()
+    os.chdir(repo.root)
+    results: Dict[str, Dict] = {}
+    try:
+        for name in scenarios:
+            samples = measure(
+                scenario_runner(name, args.jobs), args.iterations, args.warmup
+            )
+            results[name] = {
+                "runs": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "samples": samples,
+            }
+    finally:
+        os.chdir(previous_cwd)
+        if args.keep:
+            print(f"Synthetic repository kept in {repo.root}")
+        else:
+            subprocess.run(["rm", "-rf", workdir], check=False)
+
+    statuses = compare(results, baseline, args.tolerance, args.slack_ms / 1000)
+    print_report(results, baseline, statuses)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"config": config, "results": results}, handle, indent=2)
+        print(f"Results saved to {args.output}")
+    return 1 if "REGRESSION" in statuses.values() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-in for the validators used by the quality gate.
+
+The wrappers in ``benchmarks/bin`` (lizard, bandit, semgrep, horusec and npx
+for ESLint) call this script with the tool name as first argument. It answers
+version queries, sleeps for a configurable delay and prints output in the
+tool's format, built from the samples recorded in ``benchmarks/recorded``.
+Horusec scans every file under ``--project-path`` and writes its report to
+``--json-output-file``, as the real tool does.
+The output only depends on the file arguments and the settings below, so
+parser and orchestration costs can be measured without the real tools.
+
+Settings (environment variables):
+    STUB_DELAY_MS: Fixed delay per invocation (default: 0)
+    STUB_DELAY_PER_FILE_MS: Additional delay per file argument (default: 0)
+    STUB_<TOOL>_DELAY_MS: Per-tool override of STUB_DELAY_MS, e.g.
+        STUB_SEMGREP_DELAY_MS
+    STUB_FINDINGS_PER_FILE: Findings reported for every file (default: 1)
+"""
+import copy
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+RECORDED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded")
+
+# Options whose value is not a file to scan
+VALUE_OPTIONS = {
+    "--config",
+    "--format",
+    "-f",
+    "--CCN",
+    "--length",
+    "--arguments",
+    "--output-format",
+    "--project-path",
+    "--json-output-file",
+    "--config-file-path",
+}
+
+# File extensions each tool scans, as filtered by the quality gate
+TOOL_EXTENSIONS = {
+    "bandit": (".py",),
+    "eslint": (".js", ".jsx", ".ts", ".tsx"),
+}
+
+
+def _env_number(name: str, default: float = 0) -> float:
+    """Read a numeric setting from the environment."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _option(args: List[str], name: str) -> str:
+    """Return the value of an option, or '' if it is not given."""
+    return args[args.index(name) + 1] if name in args[:-1] else ""
+
+
+def _project_files(project: str) -> List[str]:
+    """Return the files under a project directory, relative to it."""
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), project)
+        for directory, _, names in os.walk(project)
+        for name in names
+    )
+
+
+def _file_arguments(args: List[str]) -> List[str]:
+    """Return the arguments naming files to scan."""
+    files = []
+    skip_next = False
+    for arg in args:
+        if skip_next:
+            skip_next = False
+        elif arg in VALUE_OPTIONS:
+            skip_next = True
+        elif not arg.startswith("-"):
+            files.append(arg)
+    return files
+
+
+def _recorded(name: str) -> str:
+    """Read a recorded output sample."""
+    with open(os.path.join(RECORDED_DIR, name), encoding="utf-8") as handle:
+        return handle.read()
+
+
+def _instantiate(template: object, path: str, line: int) -> object:
+    """Replace the '{path}' and '{line}' placeholders of a recorded JSON sample."""
+    if isinstance(template, dict):
+        return {key: _instantiate(value, path, line) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_instantiate(value, path, line) for value in template]
+    if template == "{line}":
+        return line
+    if template == "{path}":
+        return path
+    return copy.copy(template)
+
+
+def _lines(count: int) -> List[int]:
+    """Line numbers of the findings reported for each file."""
+    return [1 + 3 * index for index in range(count)]
+
+
+def _bandit(files: List[str], count: int) -> str:
+    """Render Bandit JSON output."""
+    template = json.loads(_recorded("bandit.json"))
+    results = [
+        _instantiate(template, path, line) for path in files for line in _lines(count)
+    ]
+    return json.dumps({"errors": [], "metrics": {}, "results": results})
+
+
+def _semgrep(files: List[str], count: int) -> str:
+    """Render Semgrep JSON output."""
+    template = json.loads(_recorded("semgrep.json"))
+    results = [
+        _instantiate(template, path, line) for path in files for line in _lines(count)
+    ]
+    return json.dumps({"errors": [], "paths": {"scanned": files}, "results": results})
+
+
+def _eslint(files: List[str], count: int) -> str:
+    """Render ESLint JSON output (one entry per file, with absolute paths)."""
+    template = json.loads(_recorded("eslint.json"))
+    output: List[Dict] = []
+    for path in files:
+        messages = [_instantiate(template, path, line) for line in _lines(count)]
+        output.append(
+            {
+                "filePath": os.path.abspath(path),
+                "messages": messages,
+                "errorCount": len(messages),
+                "warningCount": 0,
+            }
+        )
+    return json.dumps(output)
+
+
+def _lizard(files: List[str], count: int) -> str:
+    """Render Lizard ``--warnings_only`` output."""
+    template = _recorded("lizard.txt").strip()
+    return "\n".join(
+        template.format(path=path, line=line)
+        for path in files
+        for line in _lines(count)
+    )
+
+
+def _horusec(files: List[str], count: int) -> str:
+    """Render a Horusec JSON report."""
+    template = json.loads(_recorded("horusec.json"))
+    vulnerabilities = [
+        _instantiate(template, path, line) for path in files for line in _lines(count)
+    ]
+    for entry in vulnerabilities:
+        entry["vulnerabilities"]["line"] = str(entry["vulnerabilities"]["line"])
+    return json.dumps(
+        {"status": "success", "errors": "", "analysisVulnerabilities": vulnerabilities}
+    )
+
+
+RENDERERS = {
+    "bandit": _bandit,
+    "semgrep": _semgrep,
+    "eslint": _eslint,
+    "lizard": _lizard,
+    "horusec": _horusec,
+}
+
+
+def main() -> int:
+    """Emulate one tool invocation.
+
+    Returns:
+        Exit status: 1 when findings are reported (like the real tools), else 0
+    """
+    tool, args = sys.argv[1], sys.argv[2:]
+    if tool == "npx":
+        tool, args = args[0], args[1:]
+    if tool not in RENDERERS:
+        print(f"stub_tool: unsupported tool {tool}", file=sys.stderr)
+        return 127
+
+    if "--version" in args or args[:1] == ["version"]:
+        print(f"{tool} 0.0.0 (benchmark stand-in)")
+        return 0
+
+    project = _option(args, "--project-path")
+    files = _project_files(project) if project else _file_arguments(args)
+    extensions = TOOL_EXTENSIONS.get(tool)
+    if extensions:
+        files = [path for path in files if path.endswith(extensions)]
+
+    delay_ms = _env_number(
+        f"STUB_{tool.upper()}_DELAY_MS", _env_number("STUB_DELAY_MS")
+    ) + _env_number("STUB_DELAY_PER_FILE_MS") * len(files)
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
+
+    count = int(_env_number("STUB_FINDINGS_PER_FILE", 1))
+    output = RENDERERS[tool](files, count)
+    report = _option(args, "--json-output-file")
+    if report:
+        with open(report, "w", encoding="utf-8") as handle:
+            handle.write(output)
+    else:
+        print(output)
+    return 1 if files and count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
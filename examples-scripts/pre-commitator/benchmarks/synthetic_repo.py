@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Generator of synthetic git repositories for the quality gate benchmarks.
+
+A repository is described by its number of files, the languages they are
+written in, their size in lines and how many of them have staged changes.
+Generation is deterministic for a given seed, so timings of different runs
+and machines are comparable.
+"""
+import os
+import random
+import subprocess
+from typing import List, Optional, Sequence
+
+# One function per language; {index} and {limit} vary between functions
+FUNCTION_TEMPLATES = {
+    "py": (
+        "def function_{index}(value, scale={limit}):\n"
+        "    if value > {limit}:\n"
+        "        return value * scale\n"
+        "    return value + {index}\n"
+        "\n"
+    ),
+    "js": (
+        "function function{index}(value) {{\n"
+        "  if (value > {limit}) {{\n"
+        "    return value * {limit};\n"
+        "  }}\n"
+        "  return value + {index};\n"
+        "}}\n"
+        "\n"
+    ),
+    "ts": (
+        "export function function{index}(value: number): number {{\n"
+        "  if (value > {limit}) {{\n"
+        "    return value * {limit};\n"
+        "  }}\n"
+        "  return value + {index};\n"
+        "}}\n"
+        "\n"
+    ),
+    "go": (
+        "func Function{index}(value int) int {{\n"
+        "\tif value > {limit} {{\n"
+        "\t\treturn value * {limit}\n"
+        "\t}}\n"
+        "\treturn value + {index}\n"
+        "}}\n"
+        "\n"
+    ),
+}
+
+# Line printed at the top of each file
+FILE_HEADERS = {
+    "py": '"""Synthetic module {name}."""\n\n',
+    "js": "// Synthetic module {name}\n\n",
+    "ts": "// Synthetic module {name}\n\n",
+    "go": "// Synthetic module {name}\npackage synthetic\n\n",
+}
+
+# Files per generated directory
+FILES_PER_DIRECTORY = 50
+
+# Git options making commits independent of the user's configuration
+GIT_OPTIONS = [
+    "-c",
+    "user.name=Benchmark",
+    "-c",
+    "user.email=benchmark@example.com",
+    "-c",
+    "commit.gpgsign=false",
+    "-c",
+    "core.hooksPath=/dev/null",
+]
+
+
+class SyntheticRepo:
+    """Specification and generator of a synthetic repository.
+
+    Attributes:
+        root (str): Directory of the repository.
+        file_count (int): Number of committed source files.
+        languages (List[str]): File extensions (without dot) to cycle through.
+        lines (int): Approximate number of lines per file.
+        staged (int): Number of files with staged modifications.
+        seed (int): Seed of the pseudo-random generator.
+        paths (List[str]): Paths of the generated files, once created.
+        staged_paths (List[str]): Paths of the files with staged changes.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        file_count: int = 200,
+        languages: Optional[Sequence[str]] = None,
+        lines: int = 200,
+        staged: int = 10,
+        seed: int = 0,
+    ):
+        """Describe a synthetic repository.
+
+        Args:
+            root: Directory to create the repository in (must not exist or be empty)
+            file_count: Number of committed source files
+            languages: File extensions to use, e.g. ['py', 'js'] (default: all)
+            lines: Approximate number of lines per file
+            staged: Number of files to modify and stage after the first commit
+            seed: Seed making the contents reproducible
+        """
+        unknown = set(languages or []) - set(FUNCTION_TEMPLATES)
+        if unknown:
+            raise ValueError(f"Unsupported languages: {', '.join(sorted(unknown))}")
+        self.root = root
+        self.file_count = file_count
+        self.languages = list(languages or FUNCTION_TEMPLATES)
+        self.lines = lines
+        self.staged = min(staged, file_count)
+        self.seed = seed
+        self.paths: List[str] = []
+        self.staged_paths: List[str] = []
+
+    def create(self) -> str:
+        """Write, commit and partially stage the repository.
+
+        Returns:
+            Directory of the repository
+        """
+        rng = random.Random(self.seed)
+        os.makedirs(self.root, exist_ok=True)
+        self._git("init", "-q")
+
+        self.paths = []
+        for index in range(self.file_count):
+            language = self.languages[index % len(self.languages)]
+            path = os.path.join(
+                f"pkg{index // FILES_PER_DIRECTORY:03d}",
+                f"module_{index:05d}.{language}",
+            )
+            self._write(path, self._content(path, language, rng))
+            self.paths.append(path)
+        self._git("add", "-A")
+        self._git("commit", "-q", "-m", "Synthetic repository")
+
+        self.staged_paths = rng.sample(self.paths, self.staged)
+        for path in self.staged_paths:
+            language = os.path.splitext(path)[1][1:]
+            template = FUNCTION_TEMPLATES[language]
+            with open(os.path.join(self.root, path), "a", encoding="utf-8") as handle:
+                handle.write(template.format(index=99999, limit=rng.randint(1, 100)))
+        if self.staged_paths:
+            self._git("add", "--", *self.staged_paths)
+        return self.root
+
+    def _content(self, path: str, language: str, rng: random.Random) -> str:
+        """Generate the content of one file."""
+        template = FUNCTION_TEMPLATES[language]
+        lines_per_function = template.count("\n")
+        parts = [FILE_HEADERS[language].format(name=path)]
+        for index in range(max(1, self.lines // lines_per_function)):
+            parts.append(template.format(index=index, limit=rng.randint(1, 1000)))
+        return "".join(parts)
+
+    def _write(self, path: str, content: str) -> None:
+        """Write a file inside the repository, creating its directory."""
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+
+    def _git(self, *args: str) -> None:
+        """Run a git command in the repository."""
+        subprocess.run(
+            ["git"] + GIT_OPTIONS + list(args),
+            cwd=self.root,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
@@ -3,7 +3,8 @@
 # Pre-Commitator Quality Check Script
 #
 # This script runs code quality checks on files with multiple options for
-# validating staged files, all files, or specific files.
+# validating staged files, all files, files changed on a branch, or specific
+# files.
 #
 # Usage:
 #   ./run_quality_check.sh [options] [files...]
@@ -58,13 +59,27 @@ usage() {
     echo "  -h, --help     Show this help message"
     echo "  -s, --staged   Check only staged files (default if no files provided)"
     echo "  -a, --all      Check all files in the repository"
+    echo "  --since REF    Check the files changed since the branch forked from REF (CI)"
     echo "  -v, --verbose  Show more detailed output"
     echo "  -q, --quiet    Show minimal output"
+    echo "  -j, --jobs N   Run up to N validators (or --all worker processes) concurrently"
+    echo "  --no-cache     Re-scan every file instead of reusing cached results"
+    echo "  --diff-only    Report only findings on staged changed lines"
+    echo "  --refresh-semgrep-rules  Download and pin Semgrep rule packs for offline use"
+    echo "  --profile      Show the time, CPU and memory used by each validator"
+    echo "  --profile-trace FILE  Also write a Chrome trace-event timeline to FILE"
+    echo "  --budget SECONDS  Stop the checks after SECONDS, reporting partial results (0 = no limit)"
+    echo "  --memory-mb MB Memory the validators running at once may use (0 = no limit)"
+    echo "  --fail-fast    Cancel the remaining validators once one reports an error"
+    echo "  --no-progress  Print only the final report, not findings as they are found"
+    echo "  -w, --watch    Pre-scan files as they are saved so commits reuse the results"
     echo ""
     echo -e "${BOLD}Examples:${NC}"
     echo "  ./run_quality_check.sh                   # Check staged files"
     echo "  ./run_quality_check.sh -s                # Check staged files (explicit)"
     echo "  ./run_quality_check.sh -a                # Check all files"
+    echo "  ./run_quality_check.sh --since origin/main  # Check a merge request's files"
+    echo "  ./run_quality_check.sh --watch           # Keep results warm while editing"
     echo "  ./run_quality_check.sh src/file1.py src/file2.js  # Check specific files"
 }
 
@@ -101,7 +116,7 @@ check_requirements() {
     fi
 
     # Check for git if needed
-    if [ "$CHECK_STAGED" = true ] || [ "$CHECK_ALL" = true ]; then
+    if [ "$CHECK_STAGED" = true ] || [ "$CHECK_ALL" = true ] || [ -n "$SINCE_REF" ]; then
         if ! command_exists git; then
             error_exit "Git is required for checking staged or all files." \
                       "Please install Git from https://git-scm.com/downloads"
@@ -137,7 +152,7 @@ check_staged_files() {
     fi
 
     # Run our quality gate script on staged files
-    python3 "$QUALITY_GATE"
+    python3 "$QUALITY_GATE" "${GATE_ARGS[@]}"
     return $?
 }
 
@@ -145,9 +160,8 @@ check_staged_files() {
 check_all_files() {
     show_progress "Checking all files (this may take a while)..."
 
-    # Get all tracked files
-    ALL_FILES=$(git ls-files)
-    if [ -z "$ALL_FILES" ]; then
+    # Check that there are tracked files
+    if [ -z "$(git ls-files | head -n 1)" ]; then
         echo -e "${YELLOW}No tracked files found.${NC}"
         exit 0
     fi
@@ -159,8 +173,17 @@ check_all_files() {
         pre-commit run --all-files > /dev/null 2>&1
     fi
 
-    # Run additional quality checks
-    python3 "$QUALITY_GATE" $ALL_FILES
+    # Run additional quality checks; the gate lists and shards the files itself
+    python3 "$QUALITY_GATE" "${GATE_ARGS[@]}" --all
+    return $?
+}
+
+# Check files changed since the branch forked from a ref
+check_changed_files() {
+    show_progress "Checking files changed since $SINCE_REF..."
+
+    # The gate finds the merge-base and lists the range's files itself
+    python3 "$QUALITY_GATE" "${GATE_ARGS[@]}" --since "$SINCE_REF"
     return $?
 }
 
@@ -177,7 +200,7 @@ check_specific_files() {
     done
 
     # Run our quality gate script on specified files
-    python3 "$QUALITY_GATE" "${FILES[@]}"
+    python3 "$QUALITY_GATE" "${GATE_ARGS[@]}" "${FILES[@]}"
     return $?
 }
 
@@ -202,9 +225,11 @@ report_results() {
 # Default options
 CHECK_STAGED=false
 CHECK_ALL=false
+SINCE_REF=""
 VERBOSE=false
 QUIET=false
 FILES=()
+GATE_ARGS=()
 
 # If no arguments provided, default to checking staged files
 if [ $# -eq 0 ]; then
@@ -226,6 +251,14 @@ while [[ $# -gt 0 ]]; do
             CHECK_ALL=true
             shift
             ;;
+        --since)
+            if [ -z "$2" ]; then
+                error_exit "--since requires a ref." \
+                          "Example: ./run_quality_check.sh --since origin/main"
+            fi
+            SINCE_REF="$2"
+            shift 2
+            ;;
         -v|--verbose)
             VERBOSE=true
             shift
@@ -234,6 +267,66 @@ while [[ $# -gt 0 ]]; do
             QUIET=true
             shift
             ;;
+        -j|--jobs)
+            if [ -z "$2" ]; then
+                error_exit "$1 requires a number of jobs." \
+                          "Example: ./run_quality_check.sh --jobs 4"
+            fi
+            GATE_ARGS+=("--jobs" "$2")
+            shift 2
+            ;;
+        --no-cache)
+            GATE_ARGS+=("--no-cache")
+            shift
+            ;;
+        --diff-only)
+            GATE_ARGS+=("--diff-only")
+            shift
+            ;;
+        --profile)
+            GATE_ARGS+=("--profile")
+            shift
+            ;;
+        --profile-trace)
+            if [ -z "$2" ]; then
+                error_exit "--profile-trace requires a file." \
+                          "Example: ./run_quality_check.sh --profile-trace trace.json"
+            fi
+            GATE_ARGS+=("--profile-trace" "$2")
+            shift 2
+            ;;
+        --budget)
+            if [ -z "$2" ]; then
+                error_exit "--budget requires a number of seconds." \
+                          "Example: ./run_quality_check.sh --budget 60"
+            fi
+            GATE_ARGS+=("--budget" "$2")
+            shift 2
+            ;;
+        --memory-mb)
+            if [ -z "$2" ]; then
+                error_exit "--memory-mb requires a number of MB." \
+                          "Example: ./run_quality_check.sh --memory-mb 2048"
+            fi
+            GATE_ARGS+=("--memory-mb" "$2")
+            shift 2
+            ;;
+        --fail-fast)
+            GATE_ARGS+=("--fail-fast")
+            shift
+            ;;
+        --no-progress)
+            GATE_ARGS+=("--no-progress")
+            shift
+            ;;
+        -w|--watch)
+            python3 "$QUALITY_GATE" watch
+            exit $?
+            ;;
+        --refresh-semgrep-rules)
+            python3 "$QUALITY_GATE" --refresh-semgrep-rules
+            exit $?
+            ;;
         *)
             FILES+=("$1")
             shift
@@ -245,10 +338,16 @@ done
 if [ ${#FILES[@]} -gt 0 ]; then
     CHECK_STAGED=false
     CHECK_ALL=false
+    SINCE_REF=""
+fi
+
+# A ref range replaces the staged files
+if [ -n "$SINCE_REF" ]; then
+    CHECK_STAGED=false
 fi
 
 # If no files specified and no flags, default to staged files
-if [ ${#FILES[@]} -eq 0 ] && [ "$CHECK_STAGED" = false ] && [ "$CHECK_ALL" = false ]; then
+if [ ${#FILES[@]} -eq 0 ] && [ "$CHECK_STAGED" = false ] && [ "$CHECK_ALL" = false ] && [ -z "$SINCE_REF" ]; then
     CHECK_STAGED=true
 fi
 
@@ -262,6 +361,9 @@ if [ "$CHECK_STAGED" = true ]; then
 elif [ "$CHECK_ALL" = true ]; then
     check_all_files
     EXIT_CODE=$?
+elif [ -n "$SINCE_REF" ]; then
+    check_changed_files
+    EXIT_CODE=$?
 else
     check_specific_files
     EXIT_CODE=$?
@@ -68,6 +68,15 @@ else
     exit 1
 fi
 
+# Unit tests of the quality gate's modules (stand-in tools, no network)
+header "Running Unit Tests"
+if python3 -m pytest -q tests; then
+    success "Unit tests passed"
+else
+    failure "Unit tests failed"
+    exit 1
+fi
+
 # Test help command
 header "Testing Help Commands"
 if ./run_quality_check.sh --help | grep -q "Options:"; then
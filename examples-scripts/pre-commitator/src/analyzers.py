@@ -0,0 +1,791 @@
+#!/usr/bin/env python3
+"""
+Analyzer plugins run by the quality gate.
+
+Each analyzer is a small declarative class: the files it handles, how to run
+it, how to parse its output and map its severities, and capability flags that
+tell the orchestrator how it may be scheduled. Analyzers register themselves
+with the ``register`` decorator; the quality gate runs every registered
+analyzer, in registration order for reporting and cheapest first for
+execution.
+
+Additional analyzers can be provided as plugin modules listed in the
+QUALITY_GATE_PLUGINS environment variable (comma-separated module names on
+the Python path); importing the module registers its analyzers.
+"""
+import importlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+
+import inprocess_analyzers
+from file_index import FileIndex
+from findings import ERROR, TOOL_LABELS, WARNING
+from json_stream import JsonStream, Path
+from tool_manifest import ResolvedTool, ToolResolver
+from tool_result import ToolResult
+
+# File extensions analyzed by the language-agnostic tools
+CODE_EXTENSIONS = frozenset(
+    {
+        ".py",
+        ".js",
+        ".jsx",
+        ".ts",
+        ".tsx",
+        ".java",
+        ".cpp",
+        ".c",
+        ".go",
+        ".rb",
+        ".php",
+        ".swift",
+        ".kt",
+    }
+)
+PYTHON_EXTENSIONS = frozenset({".py"})
+JAVASCRIPT_EXTENSIONS = frozenset({".js", ".jsx", ".ts", ".tsx"})
+
+# Lizard warning line: "path:line: warning: name has ..., N length, ..."
+LIZARD_WARNING = re.compile(r"(.+?):(\d+):\s*(?:warning:\s*)?(.*)")
+LIZARD_LENGTH = re.compile(r"\b(\d+) length")
+
+
+class Analyzer:
+    """Base class of the analyzer plugins.
+
+    Subclasses set the class attributes below and implement ``parse``, or
+    set ``stream_arrays`` and implement ``parse_item``; the other methods
+    have defaults suitable for command-line tools.
+
+    Attributes:
+        name (str): Name shown in reports and used in DISABLE_<NAME> and
+            QUALITY_GATE_TIMEOUT_<NAME>.
+        label (str): Prefix of the tool's findings in reports (default: name).
+        tool (str): Tool id resolved through the tool manifest.
+        commands (List[List[str]]): Candidate command prefixes, in order of
+            preference (default: ``[[tool]]``).
+        version_arguments (List[str]): Arguments making the tool print its
+            version, which is part of the cache key.
+        extensions (FrozenSet[str]): File extensions the analyzer handles.
+        arguments (List[str]): Arguments placed before the file list.
+        config_files (List[str]): Files whose content affects the results
+            (part of the cache key).
+        severities (Dict[str, str]): Tool severity levels (upper case) that
+            map to ERROR or WARNING; unlisted levels are warnings.
+        stream_arrays (List[Path]): Arrays of the tool's JSON output holding
+            its findings. When set, the output is decoded while the tool runs
+            and each item is passed to ``parse_item``, instead of being
+            captured and parsed whole.
+        batchable (bool): One invocation may analyze many files. Otherwise
+            the orchestrator runs the tool once per file.
+        parallel_safe (bool): The tool may run at the same time as other
+            tools and as other instances of itself. Otherwise it runs alone,
+            after the parallel analyzers.
+        cost_per_kb (float): Expected milliseconds of work per KB of input,
+            used to start cheap analyzers first.
+        timeout (float): Default seconds one invocation may run (0 = no limit).
+        memory_mb (float): Expected peak memory of one invocation, used by the
+            memory governor until the tool's usage has been measured.
+        tier (str): 'fast' analyzers block the commit; with ``--defer-slow``,
+            'slow' ones check it in the background (see QUALITY_GATE_SLOW_TIER).
+        fast_max_kb (float): Input size up to which a fast analyzer blocks
+            the commit; larger inputs are checked in the background with
+            ``--defer-slow`` (0 = no limit).
+        hook_ids (List[str]): Ids of the pre-commit hooks that run the same
+            tool (default: ``[tool]``), used by the run plan.
+        install_hint (str): Command installing the tool, shown when it is
+            missing (default: ``pip install <tool>``).
+        optional (bool): Skip the analyzer silently when the tool is not
+            installed, instead of warning about it.
+    """
+
+    name = ""
+    label = ""
+    tool = ""
+    commands: List[List[str]] = []
+    version_arguments = ["--version"]
+    extensions: FrozenSet[str] = frozenset()
+    arguments: List[str] = []
+    config_files: List[str] = []
+    severities: Dict[str, str] = {}
+    stream_arrays: List[Path] = []
+    batchable = True
+    parallel_safe = True
+    cost_per_kb = 1.0
+    timeout = 60.0
+    memory_mb = 100.0
+    tier = "fast"
+    fast_max_kb = 0.0
+    hook_ids: List[str] = []
+    install_hint = ""
+    optional = False
+
+    @property
+    def disable_variable(self) -> str:
+        """Environment variable disabling the analyzer when set to 1."""
+        return f"DISABLE_{self.name.upper()}"
+
+    def pre_commit_hooks(self) -> List[str]:
+        """Return the ids of the pre-commit hooks that run the same tool."""
+        return self.hook_ids or [self.tool]
+
+    def candidates(self) -> List[List[str]]:
+        """Return the command prefixes that may run the tool."""
+        return self.commands or [[self.tool]]
+
+    def resolve(self, resolver: ToolResolver) -> Optional[ResolvedTool]:
+        """Look the tool up through the tool manifest.
+
+        Args:
+            resolver: Resolver of the gate
+
+        Returns:
+            ResolvedTool, or None if the tool is not installed
+        """
+        return resolver.resolve(self.tool, self.candidates(), self.version_arguments)
+
+    def select(self, files: List[str], index: Optional[FileIndex] = None) -> List[str]:
+        """Return the files this analyzer handles.
+
+        Args:
+            files: Candidate file paths
+            index: Classification of the run's files; without one, files are
+                picked by the extension in their name
+
+        Returns:
+            Files with one of the analyzer's extensions (as classified, and
+            not excluded as generated, vendored, minified or oversize)
+        """
+        if index is not None:
+            return index.select(self.extensions, files)
+        return [path for path in files if os.path.splitext(path)[1] in self.extensions]
+
+    @contextmanager
+    def invocation(
+        self, files: List[str], root: Optional[str]
+    ) -> Iterator[Tuple[List[str], Optional[str]]]:
+        """Prepare one run of the tool on some files.
+
+        The default passes the files as arguments and runs the tool in
+        ``root``. Tools that scan a directory instead override this to build
+        one for the run; ``parse`` is called before the context exits.
+
+        Args:
+            files: Files to analyze, relative to ``root``
+            root: Directory the paths are relative to (None for the cwd)
+
+        Yields:
+            Tuple of the arguments following ``arguments`` and the working
+            directory of the tool (None for the gate's)
+        """
+        yield files, None
+
+    def estimated_cost(
+        self,
+        files: List[str],
+        root: Optional[str] = None,
+        index: Optional[FileIndex] = None,
+    ) -> float:
+        """Estimate the work of analyzing files, for scheduling.
+
+        Args:
+            files: Files to analyze
+            root: Directory the paths are relative to
+            index: Classification of the run's files, which knows their sizes
+
+        Returns:
+            Expected cost in milliseconds
+        """
+        size = 0
+        for path in self.select(files, index):
+            if index is not None:
+                size += index.size(path)
+                continue
+            try:
+                size += os.path.getsize(os.path.join(root or "", path))
+            except OSError:
+                pass
+        return self.cost_per_kb * max(1.0, size / 1024)
+
+    def prepare(
+        self, files: List[str], gate: Any
+    ) -> Optional[Tuple[List[str], List[str]]]:
+        """Decide how to run the tool on the selected files.
+
+        Args:
+            files: Files selected by ``select``
+            gate: QualityGate running the analyzer
+
+        Returns:
+            Tuple of the arguments (without the files) and additional cache
+            key strings, or None if there is nothing to run. The key strings
+            are None when the findings must not be cached, because they
+            depend on something the key cannot capture.
+        """
+        return list(self.arguments), []
+
+    def severity(self, level: Any) -> str:
+        """Map a tool-specific severity level to ERROR or WARNING."""
+        return self.severities.get(str(level).upper(), WARNING)
+
+    def parse(
+        self, result: subprocess.CompletedProcess, tool_result: ToolResult
+    ) -> None:
+        """Parse the tool output into findings.
+
+        The default decodes captured output the way streamed output is.
+
+        Args:
+            result: Completed tool process
+            tool_result: Result receiving the findings
+        """
+        if not self.stream_arrays:
+            raise NotImplementedError
+        stream = self.open_stream(tool_result)
+        stream.feed(result.stdout)
+        self.close_stream(stream, result, tool_result)
+
+    def open_stream(self, tool_result: ToolResult) -> JsonStream:
+        """Start decoding the tool's output as it is produced.
+
+        Args:
+            tool_result: Result receiving the findings
+
+        Returns:
+            Decoder to feed the tool's stdout to
+        """
+        return JsonStream(
+            self.stream_arrays,
+            lambda path, item: self.parse_item(path, item, tool_result),
+        )
+
+    def parse_item(self, path: Path, item: Any, tool_result: ToolResult) -> None:
+        """Turn one decoded item of the tool's output into findings.
+
+        Args:
+            path: Which of ``stream_arrays`` the item belongs to
+            item: Decoded item
+            tool_result: Result receiving the findings
+        """
+        raise NotImplementedError
+
+    def close_stream(
+        self,
+        stream: JsonStream,
+        result: subprocess.CompletedProcess,
+        tool_result: ToolResult,
+    ) -> None:
+        """Finish decoding the output once the tool has exited.
+
+        Args:
+            stream: Decoder the output was fed to
+            result: Completed tool process (its stdout was not kept)
+            tool_result: Result receiving the findings
+        """
+        try:
+            stream.close()
+        except ValueError:
+            tool_result.complete = False
+            if result.stderr:
+                tool_result.add_warning(
+                    f"{tool_result.tool_name} warning: {result.stderr}"
+                )
+
+    def in_process_version(self) -> Optional[str]:
+        """Return the version of an in-process backend, or None if there is none."""
+        return None
+
+    def run_in_process(
+        self,
+        files: List[str],
+        tool_result: ToolResult,
+        root: Optional[str],
+        stop: Callable[[], bool],
+    ) -> bool:
+        """Analyze files through the tool's library API.
+
+        Args:
+            files: Files to analyze, relative to ``root``
+            tool_result: Result receiving the findings
+            root: Directory the tool runs in
+            stop: Callback returning True when the analysis must be abandoned
+
+        Returns:
+            False if the library failed, so the command-line tool is used
+        """
+        return False
+
+
+# Registered analyzer classes by name, in report order
+REGISTRY: Dict[str, Type[Analyzer]] = {}
+
+
+def register(cls: Type[Analyzer]) -> Type[Analyzer]:
+    """Class decorator adding an analyzer to the registry.
+
+    Args:
+        cls: Analyzer subclass
+
+    Returns:
+        The class, unchanged
+    """
+    REGISTRY[cls.name] = cls
+    TOOL_LABELS.setdefault(cls.name, cls.label or cls.name)
+    return cls
+
+
+def load_plugins() -> List[str]:
+    """Import the plugin modules listed in QUALITY_GATE_PLUGINS.
+
+    Returns:
+        Messages about plugins that could not be loaded
+    """
+    errors = []
+    for module in os.environ.get("QUALITY_GATE_PLUGINS", "").split(","):
+        module = module.strip()
+        if not module:
+            continue
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            errors.append(f"Warning: Analyzer plugin {module} failed to load: {e}")
+    return errors
+
+
+def create_analyzers() -> List[Analyzer]:
+    """Instantiate every registered analyzer, in report order."""
+    return [cls() for cls in REGISTRY.values()]
+
+
+def parse_json(result: subprocess.CompletedProcess, tool_result: ToolResult) -> Any:
+    """Parse a tool's JSON output.
+
+    Args:
+        result: Completed tool process
+        tool_result: Result collecting warnings about unparsable output
+
+    Returns:
+        Parsed JSON, or None if parsing failed
+    """
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        tool_result.complete = False
+        if result.stderr:
+            tool_result.add_warning(f"{tool_result.tool_name} warning: {result.stderr}")
+        return None
+
+
+@register
+class LizardAnalyzer(Analyzer):
+    """Lizard complexity analysis.
+
+    Lizard reports functions exceeding thresholds on metrics such as:
+    - Cyclomatic complexity (CCN)
+    - Function length
+    - Number of parameters
+    """
+
+    name = "Lizard"
+    label = "Complexity"
+    tool = "lizard"
+    extensions = CODE_EXTENSIONS
+    # Thresholds, also part of the cache key
+    THRESHOLDS = [
+        "--CCN",
+        "10",  # Maximum cyclomatic complexity
+        "--length",
+        "100",  # Maximum function length
+        "--arguments",
+        "5",  # Maximum number of arguments
+    ]
+    arguments = ["--warnings_only"] + THRESHOLDS
+    cost_per_kb = 0.5
+
+    def parse(
+        self, result: subprocess.CompletedProcess, tool_result: ToolResult
+    ) -> None:
+        """Parse Lizard warning lines ('path:line: warning: ...') into findings."""
+        if result.returncode not in (0, 1) and not result.stdout.strip():
+            tool_result.complete = False
+            if result.stderr:
+                tool_result.add_warning(f"Lizard warning: {result.stderr}")
+            return
+
+        for issue in result.stdout.strip().split("\n"):
+            if not issue.strip():
+                continue
+            location = LIZARD_WARNING.match(issue.strip())
+            if not location:
+                tool_result.add_warning(f"Complexity: {issue.strip()}")
+                continue
+            # The warning points at the function start; 'N length' gives its span
+            line = int(location.group(2))
+            text = location.group(3)
+            length = LIZARD_LENGTH.search(text)
+            end_line = line + int(length.group(1)) - 1 if length else line
+            tool_result.add_warning(
+                text,
+                location.group(1),
+                line,
+                end_line,
+                inprocess_analyzers.LIZARD_RULE,
+            )
+
+    def in_process_version(self) -> Optional[str]:
+        """Return the version of the importable Lizard library, or None."""
+        return inprocess_analyzers.lizard_version()
+
+    def run_in_process(
+        self,
+        files: List[str],
+        tool_result: ToolResult,
+        root: Optional[str],
+        stop: Callable[[], bool],
+    ) -> bool:
+        """Analyze files with the Lizard library instead of the lizard command."""
+        thresholds = dict(zip(self.THRESHOLDS[::2], self.THRESHOLDS[1::2]))
+        try:
+            issues = inprocess_analyzers.run_lizard(
+                files,
+                ccn=int(thresholds["--CCN"]),
+                length=int(thresholds["--length"]),
+                arguments=int(thresholds["--arguments"]),
+                root=root,
+                stop=stop,
+            )
+        except Exception:
+            return False
+        for issue in issues:
+            tool_result.add_warning(
+                issue.text, issue.path, issue.line, issue.end_line, issue.rule
+            )
+        return True
+
+
+@register
+class BanditAnalyzer(Analyzer):
+    """Bandit security analysis of Python code.
+
+    Bandit finds common security issues such as:
+    - Use of dangerous functions (eval, exec)
+    - Hardcoded passwords
+    - SQL injection vulnerabilities
+    - Shell injection vulnerabilities
+    """
+
+    name = "Bandit"
+    label = "Security"
+    tool = "bandit"
+    extensions = PYTHON_EXTENSIONS
+    arguments = ["-f", "json"]
+    severities = {"HIGH": ERROR}
+    stream_arrays = [("results",)]
+    cost_per_kb = 1.0
+
+    def parse_item(self, path: Path, item: Any, tool_result: ToolResult) -> None:
+        """Parse one issue of Bandit's JSON output into a finding."""
+        line = item.get("line_number", 0)
+        tool_result.add_issue(
+            self.severity(item.get("issue_severity", "?")),
+            item.get("issue_text", "Unknown issue"),
+            item.get("filename", "unknown"),
+            line,
+            max(item.get("line_range") or [line]),
+            item.get("test_id", ""),
+        )
+
+    def in_process_version(self) -> Optional[str]:
+        """Return the version of the importable Bandit library, or None."""
+        return inprocess_analyzers.bandit_version()
+
+    def run_in_process(
+        self,
+        files: List[str],
+        tool_result: ToolResult,
+        root: Optional[str],
+        stop: Callable[[], bool],
+    ) -> bool:
+        """Analyze files with the Bandit library instead of the bandit command."""
+        try:
+            issues = inprocess_analyzers.run_bandit(files, root=root, stop=stop)
+        except Exception:
+            return False
+        for issue in issues:
+            tool_result.add_issue(
+                self.severity(issue.severity),
+                issue.text,
+                issue.path,
+                issue.line,
+                issue.end_line,
+                issue.rule,
+            )
+        return True
+
+
+@register
+class ESLintAnalyzer(Analyzer):
+    """ESLint analysis of JavaScript and TypeScript code.
+
+    ESLint identifies problematic patterns such as:
+    - Syntax errors
+    - Bad practices
+    - Style inconsistencies
+    - Security vulnerabilities (with security plugin)
+    """
+
+    name = "ESLint"
+    tool = "eslint"
+    # The project's own ESLint first; npx is slow and may go to the network
+    commands = [
+        [os.path.join("node_modules", ".bin", "eslint")],
+        ["eslint"],
+        ["npx", "eslint"],
+    ]
+    extensions = JAVASCRIPT_EXTENSIONS
+    arguments = ["--format", "json"]
+    config_files = [
+        ".eslintrc.json",
+        ".eslintrc.js",
+        ".eslintrc.yml",
+        "eslint.config.js",
+    ]
+    # ESLint severity: 1=warning, 2=error
+    severities = {"2": ERROR}
+    # The output is an array with one entry per file
+    stream_arrays = [()]
+    cost_per_kb = 2.0
+    timeout = 120.0
+    memory_mb = 400.0
+    fast_max_kb = 512.0
+
+    def parse_item(self, path: Path, item: Any, tool_result: ToolResult) -> None:
+        """Parse the messages of one file in ESLint's JSON output into findings."""
+        # ESLint reports absolute paths; findings are stored relative
+        filename = item.get("filePath", "unknown")
+        for message in item.get("messages", []):
+            line = message.get("line", 0)
+            tool_result.add_issue(
+                self.severity(message.get("severity", 0)),
+                message.get("message", "Unknown issue"),
+                filename,
+                line,
+                message.get("endLine", line),
+                message.get("ruleId") or "",
+            )
+
+    def close_stream(
+        self,
+        stream: JsonStream,
+        result: subprocess.CompletedProcess,
+        tool_result: ToolResult,
+    ) -> None:
+        """Finish decoding ESLint's output, reporting configuration errors."""
+        # ESLint exits with 2 on configuration or internal errors
+        if result.returncode == 2:
+            tool_result.complete = False
+        super().close_stream(stream, result, tool_result)
+        if stream.error is None and not stream.items:
+            # Special handling for ESLint stderr
+            if result.stderr and "Error:" in result.stderr:
+                tool_result.add_warning(f"ESLint warning: {result.stderr}")
+
+
+@register
+class SemgrepAnalyzer(Analyzer):
+    """Semgrep security scanning.
+
+    Semgrep finds bugs, security vulnerabilities and violations of code
+    standards across many languages, using pattern-based rules.
+    """
+
+    name = "Semgrep"
+    tool = "semgrep"
+    extensions = CODE_EXTENSIONS
+    arguments = ["--config", "auto", "--json", "--error"]
+    severities = {"ERROR": ERROR, "HIGH": ERROR}
+    stream_arrays = [("results",), ("errors",)]
+    cost_per_kb = 5.0
+    timeout = 180.0
+    memory_mb = 800.0
+    tier = "slow"
+
+    def prepare(
+        self, files: List[str], gate: Any
+    ) -> Optional[Tuple[List[str], List[str]]]:
+        """Use the pinned rule packs for the languages being checked, if any.
+
+        Without them Semgrep fetches its registry rules on every run, so its
+        findings are not cached: they change when the registry does.
+        """
+        rules_store = gate.semgrep_rules
+        if not (rules_store and rules_store.is_available()):
+            return list(self.arguments), None
+        rules = rules_store.rules_for_files(files)
+        if not rules:
+            return None
+        arguments = ["--metrics", "off", "--json", "--error"]
+        key_args = []
+        for rule_file, digest in rules:
+            arguments += ["--config", rule_file]
+            key_args.append(digest)
+        return arguments, key_args
+
+    def parse_item(self, path: Path, item: Any, tool_result: ToolResult) -> None:
+        """Parse one result (or error) of Semgrep's JSON output."""
+        if path == ("errors",):
+            # Rule or parse errors mean some files were not fully scanned
+            tool_result.complete = False
+            return
+
+        # Extract issue details with safe nested access
+        extra = item.get("extra", {})
+        line = item.get("start", {}).get("line", 0)
+        tool_result.add_issue(
+            self.severity(extra.get("severity", "medium")),
+            extra.get("message", "Unknown issue"),
+            item.get("path", "unknown"),
+            line,
+            item.get("end", {}).get("line", line),
+            item.get("check_id", ""),
+        )
+
+
+@register
+class HorusecAnalyzer(Analyzer):
+    """Horusec multi-language security scanning.
+
+    Horusec scans a project directory rather than a list of files, so each
+    run gets a throwaway directory holding only the files being checked
+    (hard-linked when possible) and the JSON report is written next to it.
+    The cost of a run follows the size of the commit instead of the size of
+    the repository.
+    """
+
+    name = "Horusec"
+    tool = "horusec"
+    version_arguments = ["version"]
+    extensions = CODE_EXTENSIONS | {
+        ".cs",
+        ".dart",
+        ".ex",
+        ".exs",
+        ".html",
+        ".json",
+        ".sh",
+        ".tf",
+        ".xml",
+        ".yaml",
+        ".yml",
+    }
+    arguments = ["start", "--output-format", "json"]
+    config_files = ["horusec-config.json"]
+    severities = {"CRITICAL": ERROR, "HIGH": ERROR}
+    install_hint = "./src/install_horusec.sh"
+    optional = True
+    cost_per_kb = 10.0
+    timeout = 300.0
+    memory_mb = 400.0
+    tier = "slow"
+
+    # Names of the project directory and report inside the run's directory
+    PROJECT = "project"
+    REPORT = "horusec.json"
+
+    @contextmanager
+    def invocation(
+        self, files: List[str], root: Optional[str]
+    ) -> Iterator[Tuple[List[str], Optional[str]]]:
+        """Scan a directory holding only the given files and the Horusec config."""
+        workspace = tempfile.mkdtemp(prefix="quality-gate-horusec-")
+        project = os.path.join(workspace, self.PROJECT)
+        try:
+            for path in files:
+                _link_or_copy(
+                    os.path.join(root or "", path), os.path.join(project, path)
+                )
+            arguments = [
+                "--project-path",
+                project,
+                "--json-output-file",
+                os.path.join(workspace, self.REPORT),
+            ]
+            config = os.path.join(root or "", self.config_files[0])
+            if os.path.isfile(config):
+                arguments += ["--config-file-path", os.path.abspath(config)]
+            yield arguments, workspace
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    def parse(
+        self, result: subprocess.CompletedProcess, tool_result: ToolResult
+    ) -> None:
+        """Parse the Horusec JSON report of a run into findings, item by item."""
+        arguments = list(result.args)
+        project = arguments[arguments.index("--project-path") + 1]
+        report_path = arguments[arguments.index("--json-output-file") + 1]
+        report = JsonStream(
+            [("analysisVulnerabilities",)],
+            lambda _, entry: self._add_vulnerability(entry, project, tool_result),
+        )
+        try:
+            with open(report_path, encoding="utf-8") as handle:
+                report.feed_file(handle)
+        except (OSError, ValueError):
+            tool_result.complete = False
+            output = (result.stderr or result.stdout).strip()
+            if output:
+                tool_result.add_warning(f"Horusec warning: {output[-500:]}")
+            return
+
+        errors = report.fields.get("errors")
+        if errors or report.fields.get("status") == "error":
+            tool_result.complete = False
+            tool_result.add_warning(f"Horusec warning: {errors}")
+
+    def _add_vulnerability(
+        self, entry: Any, project: str, tool_result: ToolResult
+    ) -> None:
+        """Record one entry of the report's ``analysisVulnerabilities``."""
+        issue = entry.get("vulnerabilities") or {}
+        path = issue.get("file") or "unknown"
+        if os.path.isabs(path):
+            path = os.path.relpath(path, project)
+        try:
+            line = int(issue.get("line") or 0)
+        except ValueError:
+            line = 0
+        details = (issue.get("details") or "Unknown issue").strip()
+        tool_result.add_issue(
+            self.severity(issue.get("severity", "")),
+            details.splitlines()[0],
+            path,
+            line,
+            line,
+            issue.get("rule_id") or "",
+        )
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Place a file at ``target``, hard-linking it when the filesystem allows."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Background checks of the slow analyzers of a commit (two-tier gating).
+
+With ``--defer-slow``, the pre-commit hook only runs the fast analyzers, so a
+commit is not held up by multi-second Semgrep or Horusec scans. The slow
+analyzers are queued as a job that records the blob SHAs of the staged
+content, and a detached worker process checks that content once the fast
+tier has passed, while the commit completes. Results are kept in the git
+directory: the next hook invocation shows them, and the pre-push hook
+(``quality_gate.py background pre-push``) waits for unfinished jobs and
+blocks the push while the content being pushed has errors.
+
+Which analyzers are slow is set by QUALITY_GATE_SLOW_TIER (see
+``slow_tier``), which switch_mode.sh sets per mode.
+"""
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from analyzers import Analyzer
+from findings import Finding
+from staged_snapshot import StagedSnapshot
+
+# Analyzers deferred to the background, as 'Name' or 'Name:KB'
+SLOW_TIER_VARIABLE = "QUALITY_GATE_SLOW_TIER"
+
+# Finished jobs kept for the pre-push check and ``background status``
+MAX_FINISHED_JOBS = 20
+
+# Findings listed when showing the results of earlier commits
+SHOWN_FINDINGS = 20
+
+# Seconds the pre-push hook waits for unfinished jobs by default
+DEFAULT_PUSH_WAIT = 600
+
+# Seconds between attempts to take the worker lock while waiting
+WAIT_INTERVAL = 0.5
+
+# Size above which the worker log is started afresh
+MAX_LOG_BYTES = 1024 * 1024
+
+
+def slow_tier(analyzers: List[Analyzer]) -> Dict[str, float]:
+    """Return the analyzers that are deferred to the background.
+
+    QUALITY_GATE_SLOW_TIER lists them, comma-separated, as 'Name' (always
+    deferred) or 'Name:KB' (deferred when the files it checks exceed KB);
+    the analyzers it does not list block the commit. When the variable is
+    not set, each analyzer's ``tier`` and ``fast_max_kb`` decide.
+
+    Args:
+        analyzers: Analyzers of the quality gate
+
+    Returns:
+        Input size in KB above which each slow analyzer is deferred
+        (0 = always), by analyzer name
+    """
+    variable = os.environ.get(SLOW_TIER_VARIABLE)
+    tiers: Dict[str, float] = {}
+    if variable is None:
+        for analyzer in analyzers:
+            if analyzer.tier == "slow":
+                tiers[analyzer.name] = 0.0
+            elif analyzer.fast_max_kb:
+                tiers[analyzer.name] = analyzer.fast_max_kb
+        return tiers
+    names = {analyzer.name.lower(): analyzer.name for analyzer in analyzers}
+    for entry in variable.split(","):
+        name, _, limit = entry.strip().partition(":")
+        if name.lower() not in names:
+            continue
+        try:
+            tiers[names[name.lower()]] = max(0.0, float(limit)) if limit else 0.0
+        except ValueError:
+            tiers[names[name.lower()]] = 0.0
+    return tiers
+
+
+class BackgroundChecks:
+    """Queue and results of the background checks of a repository.
+
+    Each job is a JSON file named so that jobs sort in the order they were
+    queued. One worker process at a time, holding an exclusive lock on the
+    directory's lock file, runs the pending jobs.
+
+    Attributes:
+        directory (str): Directory holding the jobs, the lock and the log.
+    """
+
+    DIRNAME = "quality-gate-background"
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str):
+        """Initialize the queue stored in the given directory.
+
+        Args:
+            directory: Directory holding the jobs
+        """
+        self.directory = directory
+
+    @classmethod
+    def for_repository(cls, git_dir: Optional[str]) -> Optional["BackgroundChecks"]:
+        """Return the queue of a repository, or None outside a repository.
+
+        Args:
+            git_dir: Git directory of the repository
+        """
+        return cls(os.path.join(git_dir, cls.DIRNAME)) if git_dir else None
+
+    def enqueue(
+        self, analyzers: List[str], paths: List[str], blob_shas: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """Queue a background check of some staged content.
+
+        Args:
+            analyzers: Names of the analyzers to run
+            paths: Staged files to check
+            blob_shas: Blob SHA of each staged file and of the analyzers'
+                configuration files
+
+        Returns:
+            The queued job
+
+        Raises:
+            OSError: If the job cannot be written
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        queued = time.time()
+        job = {
+            "format": self.FORMAT_VERSION,
+            "id": f"{int(queued * 1000):015d}-{os.getpid()}",
+            "queued": queued,
+            "state": "pending",
+            "analyzers": analyzers,
+            "paths": paths,
+            "blobs": blob_shas,
+            "findings": [],
+            "interrupted": {},
+            "seen": False,
+        }
+        self._write(job)
+        return job
+
+    def start_worker(self) -> None:
+        """Start a detached worker process that runs the pending jobs.
+
+        A worker is started for every job: one that finds another worker
+        running waits for it and then runs whatever is left, so no job is
+        stranded by a worker that was just exiting.
+
+        Raises:
+            OSError: If the worker cannot be started
+        """
+        gate = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "quality_gate.py"
+        )
+        env = dict(os.environ)
+        # git commit may point this at a temporary index that is gone by then
+        env.pop("GIT_INDEX_FILE", None)
+        log_path = os.path.join(self.directory, "worker.log")
+        try:
+            mode = "ab" if os.path.getsize(log_path) < MAX_LOG_BYTES else "wb"
+        except OSError:
+            mode = "ab"
+        with open(log_path, mode) as log:
+            subprocess.Popen(
+                [sys.executable, gate, "background", "run"],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=env,
+                start_new_session=True,
+            )
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Return every stored job, oldest first (unreadable ones are skipped)."""
+        try:
+            names = sorted(
+                name for name in os.listdir(self.directory) if name.endswith(".json")
+            )
+        except OSError:
+            return []
+        jobs = []
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if isinstance(job, dict) and job.get("format") == self.FORMAT_VERSION:
+                jobs.append(job)
+        return jobs
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Return the jobs that are pending or running."""
+        return [job for job in self.jobs() if job["state"] != "done"]
+
+    def run_pending(self, check: Any, timeout: Optional[float] = None) -> bool:
+        """Run the pending jobs, one at a time, until none is left.
+
+        Jobs left 'running' by a worker that died are run again.
+
+        Args:
+            check: Callable running a job's analyzers, filling in its
+                'findings' and 'interrupted'
+            timeout: Seconds to wait for another worker to finish
+                (default: as long as it takes)
+
+        Returns:
+            False if another worker was still running after ``timeout``
+        """
+        with self._locked(timeout) as acquired:
+            if not acquired:
+                return False
+            while True:
+                pending = [job for job in self.jobs() if job["state"] != "done"]
+                if not pending:
+                    break
+                job = pending[0]
+                job.update(state="running", pid=os.getpid(), started=time.time())
+                self._write(job)
+                check(job)
+                job.update(state="done", finished=time.time())
+                self._write(job)
+            self._prune()
+        return True
+
+    def show_news(self) -> List[str]:
+        """Describe the background results not shown yet and mark them shown.
+
+        Returns:
+            Lines to print (none when there is nothing new)
+        """
+        jobs = self.jobs()
+        news = [job for job in jobs if job["state"] == "done" and not job["seen"]]
+        lines = []
+        if news:
+            analyzers = sorted({name for job in news for name in job["analyzers"]})
+            findings = _findings(news)
+            errors = sum(1 for finding in findings if finding.is_error)
+            lines.append(
+                f"\n📬 Background checks ({', '.join(analyzers)}) of {len(news)} "
+                f"earlier commit(s): {errors} error(s), "
+                f"{len(findings) - errors} warning(s)"
+            )
+            findings.sort(key=lambda finding: not finding.is_error)
+            for finding in findings[:SHOWN_FINDINGS]:
+                icon = "🚫" if finding.is_error else "⚠️"
+                lines.append(f"  {icon} {finding.render()}")
+            if len(findings) > SHOWN_FINDINGS:
+                lines.append(
+                    f"  ... and {len(findings) - SHOWN_FINDINGS} more "
+                    "(python3 src/quality_gate.py background status)"
+                )
+            for job in news:
+                for tool, reason in sorted(job["interrupted"].items()):
+                    lines.append(f"  ⏱️ {tool} did not finish: {reason}")
+                job["seen"] = True
+                self._write(job)
+        running = len(jobs) - len([job for job in jobs if job["state"] == "done"])
+        if running:
+            lines.append(
+                f"\n⏳ Background checks of {running} earlier commit(s) are still "
+                "running."
+            )
+        return lines
+
+    def errors_in(self, ref: str, base: Optional[str] = None) -> List[Finding]:
+        """Return the errors found in content that a ref still holds.
+
+        An error counts when the file it was found in has, at ``ref``, the
+        very content the background check saw.
+
+        Args:
+            ref: Commit being pushed
+            base: Commit the remote already has; when given, only files
+                changed since it count
+
+        Returns:
+            The errors, without duplicates, by file and line
+        """
+        done = [job for job in self.jobs() if job["state"] == "done"]
+        candidates = [
+            (job, finding)
+            for job in done
+            for finding in _findings([job])
+            if finding.is_error and finding.path
+        ]
+        paths = sorted({finding.path for _, finding in candidates})
+        if not paths:
+            return []
+        blobs = _tree_blobs(ref, paths)
+        if base:
+            changed = _changed_paths(base, ref)
+            if changed is not None:
+                blobs = {path: sha for path, sha in blobs.items() if path in changed}
+        errors: Dict[Tuple, Finding] = {}
+        for job, finding in candidates:
+            if blobs.get(finding.path) == job["blobs"].get(finding.path):
+                key = (finding.tool, finding.path, finding.line, finding.message)
+                errors.setdefault(key, finding)
+        return sorted(
+            errors.values(), key=lambda finding: (finding.path, finding.line or 0)
+        )
+
+    @contextmanager
+    def _locked(self, timeout: Optional[float]) -> Iterator[bool]:
+        """Hold the worker lock, waiting at most ``timeout`` seconds for it."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "worker.lock"), "a") as lock:
+            if timeout is None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            else:
+                deadline = time.monotonic() + timeout
+                while True:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            yield False
+                            return
+                        time.sleep(WAIT_INTERVAL)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        """Atomically write a job."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(job, handle)
+        os.replace(tmp_path, os.path.join(self.directory, f"{job['id']}.json"))
+
+    def _prune(self) -> None:
+        """Delete the oldest finished jobs beyond MAX_FINISHED_JOBS."""
+        done = [job for job in self.jobs() if job["state"] == "done"]
+        for job in done[:-MAX_FINISHED_JOBS]:
+            try:
+                os.remove(os.path.join(self.directory, f"{job['id']}.json"))
+            except OSError:
+                pass
+
+
+def _findings(jobs: List[Dict[str, Any]]) -> List[Finding]:
+    """Rebuild the findings stored in some jobs."""
+    return [
+        Finding.from_row(row[0], row[1], row[2:])
+        for job in jobs
+        for row in job["findings"]
+    ]
+
+
+def _tree_blobs(ref: str, paths: List[str]) -> Dict[str, str]:
+    """Return the blob SHA of each path at a commit (missing paths are left out)."""
+    try:
+        result = subprocess.run(
+            ["git", "ls-tree", "-r", "-z", ref, "--"] + paths,
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    blobs = {}
+    for entry in os.fsdecode(result.stdout).split("\0"):
+        if entry:
+            info, path = entry.split("\t", 1)
+            blobs[path] = info.split()[2]
+    return blobs
+
+
+def _changed_paths(base: str, ref: str) -> Optional[set]:
+    """Return the paths changed between two commits, or None if unknown."""
+    try:
+        result = subprocess.run(
+            ["git", "diff", "--name-only", "-z", "--no-renames", base, ref],
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return {path for path in os.fsdecode(result.stdout).split("\0") if path}
+
+
+def _check_job(job: Dict[str, Any]) -> None:
+    """Run a job's analyzers on the content it recorded (in the worker)."""
+    import quality_gate
+
+    gate = quality_gate.QualityGate(diff_only=False, fail_fast=False, defer_slow=False)
+    gate.analyzers = [
+        analyzer for analyzer in gate.analyzers if analyzer.name in job["analyzers"]
+    ]
+    try:
+        snapshot = StagedSnapshot.from_blobs(job["blobs"], job["paths"])
+    except (OSError, subprocess.SubprocessError) as e:
+        job["interrupted"] = {
+            name: f"could not read the committed content: {e}"
+            for name in job["analyzers"]
+        }
+        return
+    gate.run_all_checks(snapshot=snapshot)
+    job["findings"] = [
+        [finding.tool, finding.path] + finding.to_row()
+        for finding in gate.errors + gate.warnings
+        if finding.path
+    ]
+    job["interrupted"] = gate.interrupted
+
+
+def background_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py background``.
+
+    ``run`` is the detached worker, ``status`` lists the recent results and
+    ``pre-push`` is the pre-push hook, which fails while the commits being
+    pushed have errors.
+
+    Args:
+        argv: Arguments following the ``background`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py background",
+        description="Run or report the background checks of slow analyzers",
+    )
+    parser.add_argument("action", choices=["run", "status", "pre-push"])
+    parser.add_argument(
+        "--ref",
+        default=os.environ.get("PRE_COMMIT_TO_REF") or "HEAD",
+        help="Commit being pushed (default: PRE_COMMIT_TO_REF or HEAD)",
+    )
+    parser.add_argument(
+        "--base",
+        default=os.environ.get("PRE_COMMIT_FROM_REF"),
+        help="Commit the remote already has (default: PRE_COMMIT_FROM_REF)",
+    )
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=None,
+        help="Seconds the pre-push check waits for a running worker (default: "
+        f"QUALITY_GATE_PUSH_WAIT or {DEFAULT_PUSH_WAIT})",
+    )
+    args = parser.parse_args(argv)
+
+    import quality_gate
+
+    checks = BackgroundChecks.for_repository(quality_gate.git_common_dir())
+    if checks is None:
+        print("Error: Not a git repository")
+        return 1
+
+    if args.action == "run":
+        try:
+            os.nice(10)
+        except (AttributeError, OSError):
+            pass
+        checks.run_pending(_check_job)
+        return 0
+
+    if args.action == "status":
+        jobs = checks.jobs()
+        if not jobs:
+            print("No background checks have run yet.")
+        for job in jobs:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(job["queued"]))
+            findings = _findings([job])
+            errors = sum(1 for finding in findings if finding.is_error)
+            state = (
+                f"{errors} error(s), {len(findings) - errors} warning(s)"
+                if job["state"] == "done"
+                else job["state"]
+            )
+            print(f"\n🕒 {when} ({', '.join(job['analyzers'])}): {state}")
+            for finding in findings:
+                print(f"  - {finding.render()}")
+            for tool, reason in sorted(job["interrupted"].items()):
+                print(f"  ⏱️ {tool} did not finish: {reason}")
+        return 0
+
+    wait = args.wait
+    if wait is None:
+        try:
+            wait = float(os.environ.get("QUALITY_GATE_PUSH_WAIT", DEFAULT_PUSH_WAIT))
+        except ValueError:
+            wait = DEFAULT_PUSH_WAIT
+    if checks.unfinished():
+        print("⏳ Waiting for the background checks of earlier commits...")
+    if not checks.run_pending(_check_job, timeout=wait):
+        print(
+            f"⏱️ The background checks are still running after {wait:g}s; "
+            "push again once they finish (or use 'git push --no-verify')."
+        )
+        return 1
+    # An all-zero base means the remote does not have the branch yet
+    base = args.base if args.base and args.base.strip("0") else None
+    errors = checks.errors_in(args.ref, base)
+    if not errors:
+        print("✅ Background checks found no errors in the pushed commits.")
+        return 0
+    print("\n🚫 ERRORS found by the background checks:")
+    for finding in errors:
+        print(f"  - {finding.render()}")
+    print(
+        "\n❌ Push blocked: fix the errors above and commit, or push with "
+        "'git push --no-verify' (not recommended)."
+    )
+    return 1
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Files changed on a branch since it forked from another ref.
+
+Used by ``--since <ref>`` in CI, where nothing is staged and a full scan is
+too slow: the gate checks only the files a merge request changes, i.e. those
+that differ between the merge-base of HEAD and the ref, and HEAD. The whole
+range is listed by a single ``git diff`` invocation, with renames detected so
+a moved file is checked under its new path and deleted files are skipped.
+"""
+import subprocess
+from typing import List, NamedTuple, Tuple
+
+from staged_snapshot import parse_name_status
+
+
+class ChangeRange(NamedTuple):
+    """Changes between the merge-base of HEAD and a ref, and HEAD.
+
+    Attributes:
+        ref: Ref the range starts from, as given (e.g. 'origin/main')
+        base: Merge-base commit of HEAD and the ref
+        changes: (status letter, path) of each added, copied, modified,
+            renamed or type-changed file; renamed and copied files under
+            their new path
+        deleted: Paths deleted in the range
+    """
+
+    ref: str
+    base: str
+    changes: List[Tuple[str, str]]
+    deleted: List[str]
+
+    @classmethod
+    def since(cls, ref: str) -> "ChangeRange":
+        """List the changes made on HEAD since it forked from a ref.
+
+        Args:
+            ref: Branch, tag or commit the range starts from
+
+        Returns:
+            ChangeRange of the branch
+
+        Raises:
+            ValueError: If the ref does not exist or shares no history with
+                HEAD (e.g. in a shallow clone)
+            OSError: If git cannot be run
+        """
+        try:
+            result = subprocess.run(
+                ["git", "merge-base", ref, "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            detail = e.stderr.strip().splitlines()
+            raise ValueError(
+                detail[-1]
+                if detail
+                else "no common history with HEAD (in a shallow clone, fetch "
+                "enough history to reach the merge-base)"
+            ) from e
+        base = result.stdout.strip()
+
+        result = subprocess.run(
+            [
+                "git",
+                "diff",
+                "-z",
+                "--name-status",
+                "--find-renames",
+                "--no-ext-diff",
+                base,
+                "HEAD",
+            ],
+            capture_output=True,
+            check=True,
+        )
+        changes = []
+        deleted = []
+        for status, path in parse_name_status(result.stdout):
+            if status == "D":
+                deleted.append(path)
+            else:
+                changes.append((status, path))
+        return cls(ref, base, changes, deleted)
+
+    @property
+    def paths(self) -> List[str]:
+        """Paths of the files to check, in git's order."""
+        return [path for _, path in self.changes]
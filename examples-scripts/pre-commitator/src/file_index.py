@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Single-pass classification of the files a quality gate run checks.
+
+Every analyzer used to filter the whole file list by extension on its own.
+The FileIndex classifies each file once per run instead: its language (by
+extension, or by shebang for scripts without one), its size, and whether it
+should be analyzed at all. Files marked ``linguist-generated`` or
+``linguist-vendored`` in ``.gitattributes``, files in well-known third-party
+directories, minified bundles and oversize files are left out, since they
+dominate the runtime of Lizard and Semgrep without being reviewable code.
+Analyzers then pick their files from per-extension buckets.
+"""
+
+import os
+import re
+import subprocess
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+# Bytes read from the start of a file to sniff its shebang and line lengths
+SAMPLE_BYTES = 64 * 1024
+
+# Files larger than this are not analyzed, overridable with
+# QUALITY_GATE_MAX_FILE_KB (0 disables the limit)
+DEFAULT_MAX_FILE_KB = 1024
+
+# A sample whose lines average this many characters, or that has a line this
+# long, is minified or generated code
+MINIFIED_AVERAGE_LINE = 200
+MINIFIED_LONGEST_LINE = 1000
+
+# Directories treated as vendored unless .gitattributes says otherwise
+VENDORED_DIRECTORIES = frozenset(
+    {"node_modules", "bower_components", "vendor", "third_party", "venv", ".venv"}
+)
+
+# Bundles named as minified, whatever their content
+MINIFIED_NAME = re.compile(r"[.-]min\.(?:js|css)$")
+
+# Extension given to extensionless scripts, by interpreter
+SHEBANG_EXTENSIONS = {
+    "python": ".py",
+    "node": ".js",
+    "nodejs": ".js",
+    "sh": ".sh",
+    "bash": ".sh",
+    "zsh": ".sh",
+    "ruby": ".rb",
+    "php": ".php",
+}
+SHEBANG = re.compile(rb"#!\s*(\S+)(?:\s+(\S+))?")
+
+# .gitattributes attributes excluding a file, and the reason reported
+ATTRIBUTES = {"linguist-generated": "generated", "linguist-vendored": "vendored"}
+
+
+class FileInfo(NamedTuple):
+    """Classification of one file.
+
+    Attributes:
+        path: Path as given to the gate
+        extension: Extension the file is analyzed as ('.py' for a Python
+            script without one), or '' if it has none
+        size: Size in bytes (0 if unknown)
+        excluded: Why the file is not analyzed ('generated', 'vendored',
+            'minified' or 'oversize'), or '' if it is
+    """
+
+    path: str
+    extension: str
+    size: int
+    excluded: str
+
+
+class FileIndex:
+    """Files of a run, classified once and bucketed by extension.
+
+    Attributes:
+        files (Dict[str, FileInfo]): Classification of each file, in the
+            order the files were given.
+        buckets (Dict[str, List[str]]): Analyzed files by extension.
+    """
+
+    def __init__(self, files: Iterable[FileInfo]):
+        """Initialize the index from classified files.
+
+        Args:
+            files: Classification of each file, in order
+        """
+        self.files = {info.path: info for info in files}
+        self.buckets: Dict[str, List[str]] = {}
+        for info in self.files.values():
+            if not info.excluded:
+                self.buckets.setdefault(info.extension, []).append(info.path)
+        self._order = {path: index for index, path in enumerate(self.files)}
+        self._selections: Dict[FrozenSet[str], List[str]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        files: List[str],
+        root: Optional[str] = None,
+        sniff: FrozenSet[str] = frozenset(),
+        cached: bool = False,
+    ) -> "FileIndex":
+        """Classify files.
+
+        Args:
+            files: Repository-relative paths to classify
+            root: Directory holding the files' content (default: current
+                directory), e.g. the staged snapshot
+            sniff: Extensions of the files worth reading (those some analyzer
+                handles); extensionless files are always read for a shebang
+            cached: Read .gitattributes from the index instead of the working
+                tree, when checking staged content
+
+        Returns:
+            FileIndex of the files
+        """
+        attributes = _linguist_attributes(files, cached)
+        max_bytes = _max_file_bytes()
+        infos = []
+        for path in files:
+            extension = os.path.splitext(path)[1]
+            full_path = os.path.join(root or "", path)
+            try:
+                size = os.path.getsize(full_path)
+            except OSError:
+                size = 0
+
+            file_attributes = attributes.get(path, {})
+            excluded = _excluded_by_path(path, file_attributes)
+            if not excluded and (extension in sniff or not extension):
+                sample = _read_sample(full_path)
+                if not extension:
+                    extension = _shebang_extension(sample)
+                if extension in sniff:
+                    if max_bytes and size > max_bytes:
+                        excluded = "oversize"
+                    elif _is_minified(sample) and not _kept(
+                        file_attributes, "linguist-generated"
+                    ):
+                        excluded = "minified"
+            infos.append(FileInfo(path, extension, size, excluded))
+        return cls(infos)
+
+    def select(
+        self, extensions: FrozenSet[str], files: Optional[List[str]] = None
+    ) -> List[str]:
+        """Return the analyzed files with one of the given extensions.
+
+        Args:
+            extensions: Extensions an analyzer handles
+            files: Subset of the indexed files to pick from (e.g. a shard);
+                files outside the index are classified by their name only
+
+        Returns:
+            Matching files, in index (or ``files``) order
+        """
+        if files is None:
+            if extensions not in self._selections:
+                chosen = [
+                    path
+                    for extension in extensions
+                    for path in self.buckets.get(extension, ())
+                ]
+                chosen.sort(key=self._order.__getitem__)
+                self._selections[extensions] = chosen
+            return list(self._selections[extensions])
+
+        selected = []
+        for path in files:
+            info = self.files.get(path)
+            if info is None:
+                info = FileInfo(path, os.path.splitext(path)[1], 0, "")
+            if not info.excluded and info.extension in extensions:
+                selected.append(path)
+        return selected
+
+    def subset(self, files: List[str]) -> "FileIndex":
+        """Return the index of some of the files, e.g. to send with a shard."""
+        return FileIndex(self.files[path] for path in files if path in self.files)
+
+    def size(self, path: str) -> int:
+        """Return the size of an indexed file in bytes (0 if unknown)."""
+        info = self.files.get(path)
+        return info.size if info else 0
+
+    def included(self) -> List[str]:
+        """Return the files that are analyzed, in order."""
+        return [path for path, info in self.files.items() if not info.excluded]
+
+    def exclusions(self) -> Dict[str, int]:
+        """Count the files left out, by reason."""
+        counts: Dict[str, int] = {}
+        for info in self.files.values():
+            if info.excluded:
+                counts[info.excluded] = counts.get(info.excluded, 0) + 1
+        return counts
+
+
+def _max_file_bytes() -> int:
+    """Size limit of analyzed files in bytes (0 = unlimited)."""
+    try:
+        kilobytes = float(
+            os.environ.get("QUALITY_GATE_MAX_FILE_KB", DEFAULT_MAX_FILE_KB)
+        )
+    except ValueError:
+        kilobytes = DEFAULT_MAX_FILE_KB
+    return max(0, int(kilobytes * 1024))
+
+
+def _linguist_attributes(files: List[str], cached: bool) -> Dict[str, Dict[str, str]]:
+    """Read the linguist attributes of files with one ``git check-attr``.
+
+    Args:
+        files: Repository-relative paths
+        cached: Read .gitattributes from the index
+
+    Returns:
+        Attribute values ('set', 'unset', 'true', ...) by path and attribute,
+        for the attributes that are specified; empty outside a repository
+    """
+    if not files:
+        return {}
+    command = ["git", "check-attr", "-z", "--stdin"]
+    if cached:
+        command.append("--cached")
+    command += list(ATTRIBUTES)
+    try:
+        result = subprocess.run(
+            command,
+            input=b"".join(os.fsencode(path) + b"\0" for path in files),
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+
+    # Output: path NUL attribute NUL value NUL, for every path and attribute
+    fields = os.fsdecode(result.stdout).split("\0")
+    attributes: Dict[str, Dict[str, str]] = {}
+    for index in range(0, len(fields) - 2, 3):
+        path, name, value = fields[index : index + 3]
+        if value != "unspecified":
+            attributes.setdefault(path, {})[name] = value
+    return attributes
+
+
+def _excluded_by_path(path: str, attributes: Dict[str, str]) -> str:
+    """Apply .gitattributes and the default vendored directories to a path.
+
+    ``linguist-generated=false`` or ``linguist-vendored=false`` (or ``-attr``)
+    brings back a file the defaults would leave out.
+
+    Returns:
+        Exclusion reason, or ''
+    """
+    for name, reason in ATTRIBUTES.items():
+        value = attributes.get(name)
+        if value in ("set", "true"):
+            return reason
+    directories = path.replace(os.sep, "/").split("/")[:-1]
+    if VENDORED_DIRECTORIES.intersection(directories) and not _kept(
+        attributes, "linguist-vendored"
+    ):
+        return "vendored"
+    if MINIFIED_NAME.search(path) and not _kept(attributes, "linguist-generated"):
+        return "minified"
+    return ""
+
+
+def _kept(attributes: Dict[str, str], name: str) -> bool:
+    """Whether .gitattributes explicitly unsets an exclusion attribute."""
+    return attributes.get(name) in ("unset", "false")
+
+
+def _read_sample(path: str) -> bytes:
+    """Read the start of a file (empty if it cannot be read)."""
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(SAMPLE_BYTES)
+    except OSError:
+        return b""
+
+
+def _shebang_extension(sample: bytes) -> str:
+    """Return the extension matching a script's interpreter, or ''."""
+    match = SHEBANG.match(sample)
+    if not match:
+        return ""
+    interpreter = os.path.basename(match.group(1).decode("latin-1"))
+    if interpreter == "env" and match.group(2):
+        interpreter = match.group(2).decode("latin-1")
+    # python3, python3.11, nodejs...
+    return SHEBANG_EXTENSIONS.get(interpreter.rstrip("0123456789."), "")
+
+
+def _is_minified(sample: bytes) -> bool:
+    """Tell minified or machine-generated code by its line lengths."""
+    lines = sample.splitlines()
+    if len(sample) == SAMPLE_BYTES and len(lines) > 1:
+        # The last line of a partial sample is cut short
+        lines = lines[:-1]
+    if not lines:
+        return False
+    longest = max(len(line) for line in lines)
+    average = sum(len(line) for line in lines) / len(lines)
+    return longest >= MINIFIED_LONGEST_LINE or average >= MINIFIED_AVERAGE_LINE
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Structured findings reported by the validation tools.
+
+Findings are compact slotted records rather than preformatted strings. File
+paths and rule ids are interned, since large scans repeat them many times, and
+the human-readable text is only rendered when the quality gate prints its
+report. Each finding also has a location key used to merge the same issue when
+several tools report it (Bandit and Semgrep both flag ``eval``, for example).
+"""
+import re
+import sys
+from typing import List, Optional, Tuple
+
+ERROR = "error"
+WARNING = "warning"
+
+# Label printed in front of each tool's findings
+TOOL_LABELS = {
+    "Lizard": "Complexity",
+    "Bandit": "Security",
+    "ESLint": "ESLint",
+    "Semgrep": "Semgrep",
+}
+
+# Canonical names of issues that several tools detect under different rule ids.
+# Keys are normalized rule ids (see ``normalize_rule``).
+RULE_ALIASES = {
+    # eval / exec
+    "b307": "eval",
+    "eval-detected": "eval",
+    "no-eval": "eval",
+    "detect-eval-with-expression": "eval",
+    "b102": "exec",
+    "exec-detected": "exec",
+    # Shell injection
+    "b602": "subprocess-shell",
+    "subprocess-shell-true": "subprocess-shell",
+    "b605": "os-system",
+    "system-wildcard-detected": "os-system",
+    # Deserialization
+    "b301": "pickle",
+    "avoid-pickle": "pickle",
+    "b506": "yaml-load",
+    "avoid-pyyaml-load": "yaml-load",
+    # Weak cryptography
+    "b303": "insecure-hash",
+    "b324": "insecure-hash",
+    "insecure-hash-algorithm-md5": "insecure-hash",
+    "insecure-hash-algorithm-sha1": "insecure-hash",
+    # SQL injection
+    "b608": "sql-injection",
+    "formatted-sql-query": "sql-injection",
+    # TLS certificate validation
+    "b501": "no-cert-validation",
+    "disabled-cert-validation": "no-cert-validation",
+    # Debug mode in production
+    "b201": "flask-debug",
+    "debug-enabled": "flask-debug",
+}
+
+RULE_SEPARATOR = re.compile(r"[./]")
+
+
+def normalize_rule(rule: str) -> str:
+    """Map a tool-specific rule id to a name shared across tools.
+
+    The last component of dotted or slashed ids is used, so
+    ``python.lang.security.audit.eval-detected.eval-detected`` and
+    ``security/detect-eval-with-expression`` reduce to their rule names, which
+    are then looked up in RULE_ALIASES.
+
+    Args:
+        rule: Rule id as reported by the tool
+
+    Returns:
+        Normalized rule name
+    """
+    name = RULE_SEPARATOR.split(rule.strip())[-1].lower().replace("_", "-")
+    return RULE_ALIASES.get(name, name)
+
+
+class Finding:
+    """A single issue reported by a tool.
+
+    Attributes:
+        tool (str): Name of the tool that reported the issue.
+        path (Optional[str]): File path, or None for messages about the run
+            itself (e.g. a skipped or missing tool).
+        line (Optional[int]): First line the issue covers.
+        end_line (Optional[int]): Last line the issue covers.
+        rule (str): Tool-specific rule id, or '' if the tool gives none.
+        severity (str): ERROR (blocks the commit) or WARNING.
+        message (str): Description of the issue.
+        also_reported_by (Tuple[str, ...]): Other tools that reported the same
+            issue at the same location.
+    """
+
+    __slots__ = (
+        "tool",
+        "path",
+        "line",
+        "end_line",
+        "rule",
+        "severity",
+        "message",
+        "also_reported_by",
+    )
+
+    def __init__(
+        self,
+        tool: str,
+        path: Optional[str],
+        line: Optional[int],
+        end_line: Optional[int],
+        rule: str,
+        severity: str,
+        message: str,
+    ):
+        """Initialize a finding, interning its path and rule id."""
+        self.tool = tool
+        self.path = sys.intern(path) if path else None
+        self.line = line
+        self.end_line = end_line if end_line is not None else line
+        self.rule = sys.intern(rule) if rule else ""
+        self.severity = severity
+        self.message = message
+        self.also_reported_by: Tuple[str, ...] = ()
+
+    @classmethod
+    def notice(cls, message: str, severity: str = WARNING, tool: str = "") -> "Finding":
+        """Create a message that is not attached to a file.
+
+        Args:
+            message: Complete message text
+            severity: ERROR or WARNING
+            tool: Tool the message is about, if any
+
+        Returns:
+            Finding without location
+        """
+        return cls(tool, None, None, None, "", severity, message)
+
+    @classmethod
+    def from_row(cls, tool: str, path: str, row: List) -> "Finding":
+        """Rebuild a finding from its cached representation.
+
+        Args:
+            tool: Tool that reported the finding
+            path: File the finding belongs to
+            row: [line, end_line, rule, severity, message] as from ``to_row()``
+
+        Returns:
+            Finding for the row
+        """
+        line, end_line, rule, severity, message = row
+        return cls(tool, path, line, end_line, rule, severity, message)
+
+    def to_row(self) -> List:
+        """Return the compact, JSON-serializable form stored in the cache."""
+        return [self.line, self.end_line, self.rule, self.severity, self.message]
+
+    @property
+    def is_error(self) -> bool:
+        """Whether the finding fails the quality gate."""
+        return self.severity == ERROR
+
+    def dedup_key(self) -> Optional[Tuple[str, int, str]]:
+        """Return the (file, line, normalized rule) key of the finding.
+
+        Returns:
+            Key shared by the same issue reported by different tools, or None
+            for findings that cannot be matched (no location or no rule id).
+            Findings of one tool may share a key and still be distinct.
+        """
+        if not self.path or not self.line or not self.rule:
+            return None
+        return (self.path, self.line, normalize_rule(self.rule))
+
+    def render(self) -> str:
+        """Format the finding for display.
+
+        Returns:
+            e.g. 'Security: app.py:12 - Use of possibly insecure function'
+        """
+        if not self.path:
+            return self.message
+        label = TOOL_LABELS.get(self.tool, self.tool)
+        text = f"{label}: {self.path}:{self.line} - {self.message}"
+        if self.also_reported_by:
+            text += f" (also reported by {', '.join(self.also_reported_by)})"
+        return text
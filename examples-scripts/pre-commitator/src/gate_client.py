@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Thin pre-commit client for the quality gate daemon.
+
+The client forwards its arguments, working directory and quality gate
+environment variables to the per-repository daemon over a Unix domain socket
+and prints the results as they are streamed back. When no daemon is running,
+it runs the quality gate in-process instead, so the hook works either way.
+
+It deliberately imports only the standard library modules it needs, keeping
+its own startup cost minimal.
+"""
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+SOCKET_NAME = "quality-gate.sock"
+
+# Environment variables that influence the quality gate and are forwarded
+FORWARDED_ENV_PREFIXES = ("DISABLE_", "QUALITY_GATE_")
+
+# Unix socket paths are limited to about 100 bytes on most platforms
+MAX_SOCKET_PATH = 100
+
+
+def git_dir() -> Optional[str]:
+    """Locate the git directory shared by all worktrees of the current repository.
+
+    Returns:
+        Absolute path of the git directory, or None outside a repository
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--git-common-dir"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return os.path.abspath(result.stdout.strip())
+
+
+def socket_path(repository_git_dir: str) -> str:
+    """Return the daemon socket path for a repository.
+
+    The socket lives in the git directory unless that path would be too long
+    for a Unix socket, in which case a per-user path in the temp directory
+    derived from the git directory is used.
+
+    Args:
+        repository_git_dir: Git directory of the repository
+
+    Returns:
+        Filesystem path of the daemon socket
+    """
+    path = os.path.join(repository_git_dir, SOCKET_NAME)
+    if len(path.encode()) < MAX_SOCKET_PATH:
+        return path
+    digest = hashlib.sha256(repository_git_dir.encode()).hexdigest()[:16]
+    return os.path.join(
+        tempfile.gettempdir(), f"quality-gate-{os.getuid()}-{digest}.sock"
+    )
+
+
+def forwarded_environment() -> Dict[str, str]:
+    """Collect the environment variables that configure the quality gate."""
+    return {
+        key: value
+        for key, value in os.environ.items()
+        if key.startswith(FORWARDED_ENV_PREFIXES)
+    }
+
+
+def request(argv: List[str], repository_git_dir: str) -> Optional[int]:
+    """Run the quality gate through the daemon, printing its output.
+
+    Args:
+        argv: Quality gate command-line arguments
+        repository_git_dir: Git directory of the repository
+
+    Returns:
+        Exit status reported by the daemon, or None if no daemon answered
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path(repository_git_dir))
+    except OSError:
+        client.close()
+        return None
+
+    env = forwarded_environment()
+    if sys.stdout.isatty():
+        # The daemon's output is not a terminal; show progress as in-process runs do
+        env.setdefault("QUALITY_GATE_PROGRESS", "1")
+    payload = {"argv": argv, "cwd": os.getcwd(), "env": env}
+    with client, client.makefile("rb") as responses:
+        try:
+            client.sendall(json.dumps(payload).encode() + b"\n")
+            for raw in responses:
+                response = json.loads(raw)
+                if "line" in response:
+                    print(response["line"], flush=True)
+                elif "exit" in response:
+                    return int(response["exit"])
+                elif "error" in response:
+                    print(f"Quality gate daemon error: {response['error']}")
+                    return None
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+def start_daemon() -> None:
+    """Start the quality gate daemon in the background for later commits."""
+    gate = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quality_gate.py")
+    subprocess.Popen(
+        [sys.executable, gate, "daemon"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def main() -> None:
+    """Entry point used by the pre-commit hook.
+
+    Falls back to running the quality gate in this process when the daemon is
+    not available. With QUALITY_GATE_DAEMON_AUTOSTART=1 a daemon is started in
+    the background so that the next commit can use it.
+    """
+    repository_git_dir = git_dir()
+    if repository_git_dir:
+        status = request(sys.argv[1:], repository_git_dir)
+        if status is not None:
+            sys.exit(status)
+        if os.environ.get("QUALITY_GATE_DAEMON_AUTOSTART") == "1":
+            start_daemon()
+
+    import quality_gate
+
+    quality_gate.main()
+
+
+if __name__ == "__main__":
+    main()
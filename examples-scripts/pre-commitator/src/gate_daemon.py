@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Per-repository quality gate daemon.
+
+The daemon listens on a Unix domain socket (see ``gate_client.socket_path``)
+and runs the quality gate for each request it receives, streaming the output
+lines back to the client. Keeping one process alive across commits avoids
+re-importing the gate and the in-process analyzers, re-resolving tool
+versions and re-reading the tool manifest and Semgrep rule index on every
+commit. The daemon exits after a
+configurable idle period.
+
+Protocol: the client sends one JSON line ``{"argv", "cwd", "env"}``; the daemon
+answers with JSON lines ``{"line": ...}`` followed by ``{"exit": status}``,
+or ``{"error": ...}`` if the request could not be served.
+"""
+import argparse
+import json
+import os
+import socket
+from typing import Any, Dict, List, Optional
+
+import gate_client
+import inprocess_analyzers
+import quality_gate
+from result_cache import ResultCache, git_common_dir
+from semgrep_rules import SemgrepRuleStore
+from tool_manifest import ToolResolver
+
+
+class GateDaemon:
+    """Serves quality gate runs for one repository, one request at a time.
+
+    Requests are handled sequentially because each one temporarily changes
+    the process working directory and environment. The tool resolver, result
+    cache and Semgrep rule store are kept across requests and only replaced
+    once they no longer match the request's environment or files on disk.
+
+    Attributes:
+        git_dir (str): Git directory of the served repository.
+        idle_timeout (float): Seconds without requests before shutting down.
+        tools (Optional[ToolResolver]): Resolver reused across requests.
+        cache (Optional[ResultCache]): Result cache reused across requests.
+        semgrep_rules (Optional[SemgrepRuleStore]): Rule store reused across
+            requests.
+    """
+
+    DEFAULT_IDLE_TIMEOUT = 1800
+
+    def __init__(self, git_dir: str, idle_timeout: Optional[float] = None):
+        """Initialize the daemon for a repository.
+
+        Args:
+            git_dir: Git directory of the repository
+            idle_timeout: Idle shutdown delay in seconds. Defaults to the
+                          QUALITY_GATE_DAEMON_IDLE environment variable.
+        """
+        self.git_dir = git_dir
+        if idle_timeout is None:
+            env_idle = os.environ.get("QUALITY_GATE_DAEMON_IDLE", "")
+            idle_timeout = (
+                float(env_idle) if env_idle.isdigit() else self.DEFAULT_IDLE_TIMEOUT
+            )
+        self.idle_timeout = idle_timeout
+        self.socket_path = gate_client.socket_path(git_dir)
+        self._base_env = {
+            key: value
+            for key, value in os.environ.items()
+            if not key.startswith(gate_client.FORWARDED_ENV_PREFIXES)
+        }
+        self.tools: Optional[ToolResolver] = None
+        self.cache: Optional[ResultCache] = None
+        self.semgrep_rules: Optional[SemgrepRuleStore] = None
+
+    def serve_forever(self) -> None:
+        """Accept and serve requests until the idle timeout expires."""
+        server = self._bind()
+        if server is None:
+            return
+        self._warm_up()
+        server.settimeout(self.idle_timeout)
+        try:
+            while True:
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    break
+                with connection:
+                    if self._handle(connection) == "stop":
+                        break
+        finally:
+            server.close()
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+
+    def _bind(self) -> Optional[socket.socket]:
+        """Bind the daemon socket, replacing a stale one.
+
+        Returns:
+            Listening socket, or None if another daemon is already serving
+        """
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                probe.close()
+                return None
+            except OSError:
+                probe.close()
+                os.remove(self.socket_path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o077)
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(previous_umask)
+        server.listen(8)
+        return server
+
+    def _warm_up(self) -> None:
+        """Import the in-process analyzers so the first request does not pay for it."""
+        inprocess_analyzers.lizard_version()
+        inprocess_analyzers.bandit_version()
+
+    def _handle(self, connection: socket.socket) -> Optional[str]:
+        """Serve one client request.
+
+        Args:
+            connection: Accepted client connection
+
+        Returns:
+            'stop' if the client asked the daemon to shut down, else None
+        """
+        connection.settimeout(None)
+        with connection.makefile("rb") as requests:
+            raw = requests.readline()
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            self._send(connection, {"error": "malformed request"})
+            return None
+        if payload.get("command") == "stop":
+            self._send(connection, {"exit": 0})
+            return "stop"
+
+        def emit(line: str) -> None:
+            self._send(connection, {"line": line})
+
+        previous_cwd = os.getcwd()
+        previous_env = dict(os.environ)
+        try:
+            os.chdir(payload.get("cwd") or previous_cwd)
+            self._apply_env(payload.get("env") or {})
+            args = quality_gate.build_parser().parse_args(payload.get("argv") or [])
+            status = quality_gate.run(
+                args, emit=emit, git_dir=self.git_dir, **self._resident_objects()
+            )
+            self._send(connection, {"exit": status})
+        except SystemExit:
+            # argparse rejected the arguments; let the client report it
+            self._send(connection, {"error": "invalid arguments"})
+        except Exception as e:
+            self._send(connection, {"error": str(e)})
+        finally:
+            os.chdir(previous_cwd)
+            os.environ.clear()
+            os.environ.update(previous_env)
+        return None
+
+    def _resident_objects(self) -> Dict[str, Any]:
+        """Return the objects kept across requests, replacing stale ones.
+
+        Must be called once the request's working directory and environment
+        are in place, since they decide whether the objects are still valid.
+
+        Returns:
+            Keyword arguments for ``quality_gate.run``
+        """
+        if self.tools is None or not self.tools.is_current():
+            self.tools = ToolResolver.for_repository(self.git_dir)
+        if (
+            self.cache is None
+            or self.cache.max_bytes != ResultCache.configured_max_bytes()
+        ):
+            self.cache = ResultCache.for_repository(self.git_dir)
+        # Only computes the location; QUALITY_GATE_SEMGREP_RULES may move it
+        store = SemgrepRuleStore.default(self.git_dir)
+        if (
+            self.semgrep_rules is None
+            or store is None
+            or self.semgrep_rules.directory != store.directory
+            or not self.semgrep_rules.is_current()
+        ):
+            self.semgrep_rules = store
+        return {
+            "tools": self.tools,
+            "cache": self.cache,
+            "semgrep_rules": self.semgrep_rules,
+        }
+
+    def _apply_env(self, forwarded: Dict[str, str]) -> None:
+        """Use the client's quality gate variables instead of the daemon's own."""
+        os.environ.clear()
+        os.environ.update(self._base_env)
+        os.environ.update(forwarded)
+
+    @staticmethod
+    def _send(connection: socket.socket, message: Dict) -> None:
+        """Send one JSON line to the client, ignoring disconnected clients."""
+        try:
+            connection.sendall(json.dumps(message).encode() + b"\n")
+        except OSError:
+            pass
+
+
+def stop_daemon(git_dir: str) -> bool:
+    """Ask a running daemon to shut down.
+
+    Args:
+        git_dir: Git directory of the repository
+
+    Returns:
+        True if a daemon acknowledged the request
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(gate_client.socket_path(git_dir))
+        client.sendall(json.dumps({"command": "stop"}).encode() + b"\n")
+        return bool(client.recv(64))
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+
+def serve_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py daemon``.
+
+    Args:
+        argv: Arguments following the ``daemon`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py daemon",
+        description="Serve quality gate runs for this repository over a Unix socket",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="Seconds without requests before the daemon exits",
+    )
+    parser.add_argument(
+        "--stop", action="store_true", help="Stop the running daemon and exit"
+    )
+    args = parser.parse_args(argv)
+
+    git_dir = git_common_dir()
+    if not git_dir:
+        print("Error: The quality gate daemon must be started inside a git repository")
+        return 1
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: Unix domain sockets are not supported on this platform")
+        return 1
+    if args.stop:
+        return 0 if stop_daemon(git_dir) else 1
+
+    GateDaemon(git_dir, args.idle_timeout).serve_forever()
+    return 0
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Timing and resource instrumentation for quality gate runs.
+
+A Profiler records spans: named intervals with their wall time, the CPU time
+and peak memory of the work done in them, and free-form arguments such as the
+number of files scanned. Spans of external tools are measured on the tool's
+own process through ``os.wait4``, so concurrent tools do not blur each other's
+numbers. The spans can be printed as a per-tool summary table or written as
+a Chrome trace-event file (open it in chrome://tracing or Perfetto).
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from process_runner import run_captured
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Category of spans measuring a single tool invocation
+TOOL_CATEGORY = "tool"
+
+
+class Span(NamedTuple):
+    """A measured interval of a quality gate run.
+
+    Attributes:
+        name: What was measured (a tool name or a gate phase)
+        category: 'tool' for tool invocations, 'gate' for gate phases, ...
+        start: Start time in seconds on the monotonic clock
+        duration: Wall time in seconds
+        pid: Process that did the work
+        tid: Thread that did the work
+        args: Measurements and details (files, user, sys, max_rss_kb, ...)
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    pid: int
+    tid: int
+    args: Dict[str, Any]
+
+
+class RusagePopen(subprocess.Popen):
+    """Popen that keeps the resource usage of the child when reaping it."""
+
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        """Reap the child with ``os.wait4`` to capture its resource usage."""
+        try:
+            pid, status, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return (self.pid, 0)
+        if pid:
+            self.rusage = rusage
+        return (pid, status)
+
+
+def max_rss_kb(rusage) -> int:
+    """Return ru_maxrss in kilobytes (macOS reports bytes)."""
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss // 1024
+    return rusage.ru_maxrss
+
+
+def _thread_rusage():
+    """Resource usage of the calling thread, or of the process if unsupported."""
+    if resource is None:
+        return None
+    who = getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF)
+    return resource.getrusage(who)
+
+
+class _Usage(NamedTuple):
+    """The subset of ``struct rusage`` the profiler reports."""
+
+    ru_utime: float
+    ru_stime: float
+    ru_maxrss: int
+
+
+def _process_rusage():
+    """Resource usage of this process and its reaped children, or None."""
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return _Usage(
+        own.ru_utime + children.ru_utime,
+        own.ru_stime + children.ru_stime,
+        max(own.ru_maxrss, children.ru_maxrss),
+    )
+
+
+class Profiler:
+    """Collects spans for one quality gate run.
+
+    Attributes:
+        origin (float): Monotonic time the run started; trace timestamps are
+            relative to it.
+        spans (List[Span]): Recorded spans, in completion order.
+    """
+
+    def __init__(self):
+        """Initialize an empty profile starting now."""
+        self.origin = time.monotonic()
+        self.spans: List[Span] = []
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        category: str,
+        into: Optional[List[Span]] = None,
+        whole_process: bool = False,
+        **args: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """Measure the wall and CPU time of a block.
+
+        Args:
+            name: Span name
+            category: Span category
+            into: List receiving the span (default: this profiler's spans)
+            whole_process: Count the CPU time of all threads and finished
+                           child processes instead of the calling thread only
+            **args: Details recorded with the span
+
+        Yields:
+            The span's argument dict, to which the block may add details
+        """
+        usage = _process_rusage if whole_process else _thread_rusage
+        before = usage()
+        start = time.monotonic()
+        try:
+            yield args
+        finally:
+            duration = time.monotonic() - start
+            after = usage()
+            if before is not None and after is not None:
+                args["user"] = after.ru_utime - before.ru_utime
+                args["sys"] = after.ru_stime - before.ru_stime
+                # Peak so far, since ru_maxrss is a high-water mark
+                args["max_rss_kb"] = max_rss_kb(after)
+            self._add(into, name, category, start, duration, args)
+
+    def run_process(
+        self,
+        command: List[str],
+        name: str,
+        into: Optional[List[Span]] = None,
+        cwd: Optional[str] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        on_stdout: Optional[Callable[[str], None]] = None,
+        on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+        **args: Any,
+    ) -> subprocess.CompletedProcess:
+        """Run a command through ``run_captured`` and record its resource usage.
+
+        Args:
+            command: Command to run, with captured text output
+            name: Span name
+            into: List receiving the span (default: this profiler's spans)
+            cwd: Working directory of the command
+            deadline: Monotonic time at which the command is killed
+            cancel: Event that kills the command when set
+            on_stdout: Receives stdout chunk by chunk instead of capturing it
+            on_start: Called with the process once it has started
+            **args: Details recorded with the span
+
+        Returns:
+            CompletedProcess of the command
+
+        Raises:
+            OSError: If the command cannot be started
+            subprocess.TimeoutExpired: If the deadline passed
+            process_runner.ToolCancelled: If the command was cancelled
+        """
+        start = time.monotonic()
+        try:
+            completed, process = run_captured(
+                command,
+                cwd,
+                deadline,
+                cancel,
+                popen_class=RusagePopen,
+                on_stdout=on_stdout,
+                on_start=on_start,
+            )
+        except Exception:
+            args["interrupted"] = True
+            self._add(into, name, TOOL_CATEGORY, start, time.monotonic() - start, args)
+            raise
+        duration = time.monotonic() - start
+        if process.rusage is not None:
+            args["user"] = process.rusage.ru_utime
+            args["sys"] = process.rusage.ru_stime
+            args["max_rss_kb"] = max_rss_kb(process.rusage)
+        self._add(into, name, TOOL_CATEGORY, start, duration, args)
+        return completed
+
+    def _add(
+        self,
+        into: Optional[List[Span]],
+        name: str,
+        category: str,
+        start: float,
+        duration: float,
+        args: Dict[str, Any],
+    ) -> None:
+        """Append a span for the current process and thread."""
+        span = Span(
+            name, category, start, duration, os.getpid(), threading.get_ident(), args
+        )
+        (self.spans if into is None else into).append(span)
+
+    def summary(self) -> List[str]:
+        """Format the recorded spans as a table, one row per tool and phase.
+
+        Tool rows add up all invocations of the tool (e.g. one per shard in
+        ``--all`` mode); the memory column is the largest peak of any of them.
+
+        Returns:
+            Table lines
+        """
+        rows: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for span in self.spans:
+            row = rows.setdefault(
+                (span.category, span.name),
+                {"runs": 0, "files": 0, "wall": 0.0, "user": 0.0, "sys": 0.0, "rss": 0},
+            )
+            row["runs"] += 1
+            row["files"] += span.args.get("files", 0)
+            row["wall"] += span.duration
+            row["user"] += span.args.get("user", 0.0)
+            row["sys"] += span.args.get("sys", 0.0)
+            row["rss"] = max(row["rss"], span.args.get("max_rss_kb", 0))
+
+        header = (
+            f"{'Phase / tool':<28}{'Runs':>5}{'Files':>7}{'Wall s':>9}"
+            f"{'User s':>9}{'Sys s':>8}{'Max RSS MB':>12}"
+        )
+        lines = ["\n⏱️ PROFILE:", header, "-" * len(header)]
+        # Gate phases first, then tools by decreasing wall time
+        for (category, name), row in sorted(
+            rows.items(),
+            key=lambda item: (item[0][0] == TOOL_CATEGORY, -item[1]["wall"]),
+        ):
+            label = f"{name} ({category})" if category != TOOL_CATEGORY else name
+            lines.append(
+                f"{label[:27]:<28}{row['runs']:>5}{row['files']:>7}"
+                f"{row['wall']:>9.3f}{row['user']:>9.3f}{row['sys']:>8.3f}"
+                f"{row['rss'] / 1024:>12.1f}"
+            )
+        total = time.monotonic() - self.origin
+        lines.append(f"Total wall time: {total:.3f}s")
+        return lines
+
+    def write_trace(self, path: str) -> None:
+        """Write the spans as a Chrome trace-event JSON file.
+
+        Args:
+            path: Output file path
+        """
+        events = []
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start - self.origin) * 1e6),
+                    "dur": round(span.duration * 1e6),
+                    "pid": span.pid,
+                    "tid": span.tid,
+                    "args": span.args,
+                }
+            )
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
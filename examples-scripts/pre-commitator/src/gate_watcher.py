@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Watch mode: pre-scan tracked files as they are saved.
+
+The watcher waits for tracked files of the repository to change, lets bursts
+of saves settle for a short debounce delay and then runs the quality gate
+analyzers on the changed files in the background. Their findings land in the
+result cache, keyed by the git blob SHA of the scanned content, so when the
+same content is later staged and committed the pre-commit hook replays them
+instead of running the tools again.
+
+Changes are detected with Linux inotify (through ctypes, no extra packages)
+and, where inotify is unavailable or runs out of watches, by polling
+``git ls-files --modified``.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+import quality_gate
+
+# Seconds without further changes before the changed files are scanned
+DEFAULT_DEBOUNCE = 1.0
+
+# Seconds between two polls of the working tree in polling mode
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify event masks (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def _git_paths(*args: str) -> List[str]:
+    """Run a git command listing NUL-separated paths and return them.
+
+    Args:
+        *args: git arguments, which must include ``-z``
+
+    Returns:
+        Listed paths, or an empty list if git fails
+    """
+    try:
+        result = subprocess.run(["git"] + list(args), capture_output=True, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return [path for path in os.fsdecode(result.stdout).split("\0") if path]
+
+
+def changed_tracked_files() -> List[str]:
+    """List tracked files whose working tree or staged content differs from HEAD.
+
+    Returns:
+        Repository-relative paths of modified and staged files
+    """
+    modified = _git_paths("ls-files", "--modified", "-z")
+    staged = _git_paths("diff", "--cached", "--name-only", "--diff-filter=ACMR", "-z")
+    return sorted(set(modified) | set(staged))
+
+
+class PollingSource:
+    """Detects changed tracked files by polling ``git ls-files --modified``.
+
+    A file is reported whenever its size or modification time differs from
+    the previous poll, so repeated saves of an already modified file count.
+    """
+
+    name = "polling"
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        """Initialize the source and remember the current state of the tree.
+
+        Args:
+            interval: Seconds between two polls
+        """
+        self.interval = interval
+        self._next_poll = 0.0
+        self._signatures: Dict[str, tuple] = {}
+        self._poll()
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Wait for changes.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait for a change
+
+        Returns:
+            Paths that changed (empty if the timeout expired first)
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if now >= self._next_poll:
+                changed = self._poll()
+                if changed:
+                    return changed
+            if end is not None and now >= end:
+                return set()
+            wake = self._next_poll if end is None else min(self._next_poll, end)
+            time.sleep(max(0.0, wake - time.monotonic()))
+
+    def close(self) -> None:
+        """Release the source (nothing to release when polling)."""
+
+    def _poll(self) -> Set[str]:
+        """Compare the modified files with the previous poll."""
+        self._next_poll = time.monotonic() + self.interval
+        signatures = {}
+        for path in _git_paths("ls-files", "--modified", "-z"):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        changed = {
+            path
+            for path, signature in signatures.items()
+            if self._signatures.get(path) != signature
+        }
+        self._signatures = signatures
+        return changed
+
+
+class InotifySource:
+    """Detects writes to tracked files with Linux inotify.
+
+    Every directory containing tracked files is watched, as is the git
+    directory: when the index changes (``git add``, checkouts, ...), the
+    tracked file list is reloaded and new directories are watched.
+    """
+
+    name = "inotify"
+
+    def __init__(self, git_dir: str):
+        """Start watching the repository in the current directory.
+
+        Args:
+            git_dir: Per-worktree git directory holding the index
+
+        Raises:
+            OSError: If inotify is unavailable or the watch limit is reached
+        """
+        library = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not library:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.git_dir = git_dir
+        self._directories: Dict[int, str] = {}
+        self._watched: Set[str] = set()
+        self.tracked: Set[str] = set()
+        try:
+            self._watch(git_dir)
+            self._reload_tracked()
+        except OSError:
+            self.close()
+            raise
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Wait for changes.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait for a change
+
+        Returns:
+            Paths that changed (empty if the timeout expired first)
+
+        Raises:
+            OSError: If new directories cannot be watched
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        index_changed = False
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; fall back to what git considers modified
+                changed.update(changed_tracked_files())
+                continue
+            if mask & IN_IGNORED:
+                self._watched.discard(self._directories.pop(wd, ""))
+                continue
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+            if directory == self.git_dir:
+                index_changed = index_changed or name == "index"
+                continue
+            path = os.path.normpath(os.path.join(directory, name))
+            if path in self.tracked:
+                changed.add(path)
+        if index_changed:
+            self._reload_tracked()
+        return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _reload_tracked(self) -> None:
+        """Reload the tracked files and watch the directories containing them."""
+        self.tracked = set(_git_paths("ls-files", "-z"))
+        for directory in {os.path.dirname(path) or "." for path in self.tracked}:
+            if directory not in self._watched and os.path.isdir(directory):
+                self._watch(directory)
+
+    def _watch(self, directory: str) -> None:
+        """Add an inotify watch for writes and renames into a directory."""
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+        self._directories[wd] = directory
+        self._watched.add(directory)
+
+    def _read_events(self) -> List[tuple]:
+        """Read the pending inotify events as (watch descriptor, mask, name)."""
+        events = []
+        while True:
+            try:
+                buffer = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += INOTIFY_EVENT.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+
+class FileWatcher:
+    """Pre-scans changed tracked files into the result cache.
+
+    Attributes:
+        debounce (float): Seconds without changes before scanning.
+        source (PollingSource or InotifySource): Change detector in use.
+        gate (QualityGate): Gate running the analyzers; reused across scans.
+    """
+
+    def __init__(
+        self,
+        debounce: float = DEFAULT_DEBOUNCE,
+        interval: float = DEFAULT_POLL_INTERVAL,
+        poll: bool = False,
+        jobs: Optional[int] = None,
+        emit: Callable[[str], None] = print,
+    ):
+        """Prepare to watch the repository in the current directory.
+
+        Args:
+            debounce: Seconds without changes before the changed files are scanned
+            interval: Seconds between polls when inotify is not used
+            poll: Whether to poll even when inotify is available
+            jobs: Number of tools to run concurrently for each scan
+            emit: Callable receiving each output line
+        """
+        self.debounce = debounce
+        self.emit = emit
+        self.source = None
+        if not poll:
+            try:
+                self.source = InotifySource(_absolute_git_dir())
+            except OSError as e:
+                emit(f"ℹ️ inotify unavailable ({e}); polling for changes instead")
+        if self.source is None:
+            self.source = PollingSource(interval)
+        # The budget only matters at commit time; watch scans may take their time
+        self.gate = quality_gate.QualityGate(jobs=jobs, budget=0)
+
+    def run(self) -> None:
+        """Scan the files changed so far, then watch until interrupted."""
+        pending = set(changed_tracked_files())
+        last_change = time.monotonic() - self.debounce
+        self.emit(f"👀 Watching {os.getcwd()} for changes ({self.source.name})...")
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0.0, last_change + self.debounce - time.monotonic())
+                changed = self.source.wait(timeout)
+                if changed:
+                    pending |= changed
+                    last_change = time.monotonic()
+                elif pending:
+                    self.scan(sorted(pending))
+                    pending = set()
+        finally:
+            self.source.close()
+
+    def scan(self, paths: List[str]) -> None:
+        """Run the analyzers on the given files, storing their findings.
+
+        Args:
+            paths: Repository-relative paths of changed files
+        """
+        files = [
+            path
+            for path in paths
+            if any(analyzer.select([path]) for analyzer in self.gate.analyzers)
+            and os.path.isfile(path)
+        ]
+        if not files:
+            return
+        start = time.monotonic()
+        self.gate.run_all_checks(files)
+        self.emit(
+            f"🔍 Pre-scanned {len(files)} file(s) in {time.monotonic() - start:.1f}s: "
+            f"{len(self.gate.errors)} error(s), {len(self.gate.warnings)} warning(s)"
+        )
+
+
+def _absolute_git_dir() -> str:
+    """Return the per-worktree git directory of the current repository."""
+    result = subprocess.run(
+        ["git", "rev-parse", "--absolute-git-dir"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def watch_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py watch``.
+
+    Args:
+        argv: Arguments following the ``watch`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py watch",
+        description="Pre-scan tracked files as they are saved, so commits find "
+        "their results in the cache",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="Seconds without changes before scanning (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between polls in polling mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll", action="store_true", help="Poll for changes instead of using inotify"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of tools to run concurrently",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        root = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        print("Error: Watch mode must be started inside a git repository")
+        return 1
+    os.chdir(root)
+
+    if os.environ.get("QUALITY_GATE_NO_CACHE") == "1":
+        print(
+            "Error: Watch mode stores its results in the result cache, "
+            "which is disabled"
+        )
+        return 1
+
+    watcher = FileWatcher(args.debounce, args.interval, args.poll, args.jobs)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    return 0
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Index of the line ranges changed by the staged diff (or, with ``--since``, by
+the commits of a branch).
+
+Used by the quality gate's diff-aware mode: findings are only reported when
+they overlap a changed hunk, so a one-line change in a large legacy file does
+not surface every pre-existing issue in that file.
+"""
+import bisect
+import re
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+class HunkIndex:
+    """Changed line intervals of each file, as sorted disjoint ranges.
+
+    Attributes:
+        intervals (Dict[str, List[Tuple[int, int]]]): Inclusive (start, end)
+            line ranges per repository-relative path.
+    """
+
+    def __init__(self, intervals: Dict[str, List[Tuple[int, int]]]):
+        """Initialize the index from per-file line ranges.
+
+        Args:
+            intervals: Inclusive (start, end) ranges per path, in any order
+        """
+        self.intervals = {
+            path: _merge_intervals(ranges) for path, ranges in intervals.items()
+        }
+        self._starts = {
+            path: [start for start, _ in ranges]
+            for path, ranges in self.intervals.items()
+        }
+
+    @classmethod
+    def from_staged(cls) -> "HunkIndex":
+        """Build the index from ``git diff --cached -U0``.
+
+        Returns:
+            HunkIndex of the staged changes
+
+        Raises:
+            subprocess.SubprocessError: If git fails
+        """
+        return cls._from_diff(["--cached"])
+
+    @classmethod
+    def from_range(cls, base: str) -> "HunkIndex":
+        """Build the index from the changes between a commit and HEAD.
+
+        Args:
+            base: Commit the range starts from, e.g. a merge-base
+
+        Returns:
+            HunkIndex of the range
+
+        Raises:
+            subprocess.SubprocessError: If git fails
+        """
+        return cls._from_diff(["--find-renames", base, "HEAD"])
+
+    @classmethod
+    def _from_diff(cls, arguments: List[str]) -> "HunkIndex":
+        """Run ``git diff -U0`` with the given arguments and parse it."""
+        result = subprocess.run(
+            [
+                "git",
+                "diff",
+                "-U0",
+                "--no-color",
+                "--no-ext-diff",
+                "--src-prefix=a/",
+                "--dst-prefix=b/",
+            ]
+            + arguments,
+            capture_output=True,
+            check=True,
+        )
+        return cls.parse(result.stdout.decode("utf-8", "surrogateescape"))
+
+    @classmethod
+    def parse(cls, diff: str) -> "HunkIndex":
+        """Parse a zero-context unified diff.
+
+        A pure deletion is recorded as the lines on either side of the removed
+        block (git's new-side start is the line before it), so the code
+        around a deletion still counts as changed.
+
+        Args:
+            diff: Output of ``git diff -U0``
+
+        Returns:
+            HunkIndex of the diff
+        """
+        intervals: Dict[str, List[Tuple[int, int]]] = {}
+        path = None
+        for line in diff.splitlines():
+            if line.startswith("+++ "):
+                path = _diff_path(line[4:])
+                if path is not None:
+                    intervals.setdefault(path, [])
+                continue
+            match = HUNK_HEADER.match(line)
+            if match and path is not None:
+                start = int(match.group(1))
+                count = int(match.group(2)) if match.group(2) is not None else 1
+                if count == 0:
+                    intervals[path].append((max(start, 1), start + 1))
+                else:
+                    intervals[path].append((start, start + count - 1))
+        return cls(intervals)
+
+    def __contains__(self, path: str) -> bool:
+        """Whether the diff touches the given path."""
+        return path in self.intervals
+
+    def overlaps(self, path: str, start: int, end: int) -> bool:
+        """Check whether a line range intersects a changed hunk.
+
+        Args:
+            path: Repository-relative file path
+            start: First line of the range
+            end: Last line of the range (inclusive)
+
+        Returns:
+            True if any line in [start, end] was changed
+        """
+        ranges = self.intervals.get(path)
+        if not ranges:
+            return False
+        # Last hunk starting at or before the end of the range
+        position = bisect.bisect_right(self._starts[path], max(start, end)) - 1
+        return position >= 0 and ranges[position][1] >= min(start, end)
+
+
+def _merge_intervals(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort ranges and merge overlapping or adjacent ones."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _diff_path(header: str) -> Optional[str]:
+    """Extract the destination path from a '+++ b/path' header line.
+
+    Returns:
+        Repository-relative path, or None for deleted files ('/dev/null')
+    """
+    # Git terminates paths containing spaces with a tab
+    header = header.rstrip("\t")
+    if header.startswith('"'):
+        # Quoted paths escape special characters C-style
+        header = (
+            header[1:-1]
+            .encode("latin-1", "backslashreplace")
+            .decode("unicode_escape")
+            .encode("latin-1")
+            .decode("utf-8", "surrogateescape")
+        )
+    if header == "/dev/null" or not header.startswith("b/"):
+        return None
+    return header[2:]
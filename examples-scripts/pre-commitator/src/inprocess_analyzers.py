@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+In-process backends for the Python-native analyzers (Lizard and Bandit).
+
+Running these tools through their library APIs avoids paying for interpreter
+startup, imports and JSON serialization on every commit. Each backend is
+optional: when the library cannot be imported, the quality gate falls back to
+running the tool as a subprocess.
+
+Both backends accept a ``stop`` callback, checked between files (Lizard) or
+batches of files (Bandit), so a time budget can interrupt them; they then
+return the issues found so far.
+"""
+import os
+from typing import Callable, List, NamedTuple, Optional
+
+# Rule id given to Lizard's threshold warnings, which have no id of their own
+LIZARD_RULE = "lizard-thresholds"
+
+# Files analyzed by Bandit between two checks of the stop callback
+BANDIT_BATCH_SIZE = 25
+
+
+class Issue(NamedTuple):
+    """A finding reported by an in-process analyzer.
+
+    Attributes:
+        path: File path as passed to the analyzer (relative to its root)
+        line: First line of the finding
+        end_line: Last line of the finding
+        severity: Tool-specific severity ('HIGH', 'MEDIUM', ... or 'WARNING')
+        text: Human-readable description
+        rule: Tool-specific rule id (e.g. Bandit's 'B307')
+    """
+
+    path: str
+    line: int
+    end_line: int
+    severity: str
+    text: str
+    rule: str
+
+
+def lizard_version() -> Optional[str]:
+    """Return the version of the importable Lizard library, or None."""
+    try:
+        import lizard
+    except ImportError:
+        return None
+    return f"lizard {getattr(lizard, 'version', 'unknown')} (in-process)"
+
+
+def bandit_version() -> Optional[str]:
+    """Return the version of the importable Bandit library, or None."""
+    try:
+        import bandit
+        from bandit.core import manager  # noqa: F401
+    except ImportError:
+        return None
+    return f"bandit {getattr(bandit, '__version__', 'unknown')} (in-process)"
+
+
+def run_lizard(
+    files: List[str],
+    ccn: int,
+    length: int,
+    arguments: int,
+    root: Optional[str] = None,
+    stop: Optional[Callable[[], bool]] = None,
+) -> List[Issue]:
+    """Analyze files with Lizard and report functions exceeding the thresholds.
+
+    The thresholds have the same meaning as Lizard's ``--CCN``, ``--length``
+    and ``--arguments`` options; the warning text mirrors ``--warnings_only``
+    without the leading location.
+
+    Args:
+        files: Files to analyze, relative to ``root``
+        ccn: Maximum cyclomatic complexity
+        length: Maximum function length in lines
+        arguments: Maximum number of parameters
+        root: Directory the paths are relative to (default: current directory)
+        stop: Callback returning True when the analysis must be abandoned
+
+    Returns:
+        One Issue per function over a threshold, spanning the whole function
+    """
+    import lizard
+
+    issues = []
+    for path in files:
+        if stop and stop():
+            break
+        info = lizard.analyze_file(os.path.join(root or "", path))
+        for function in info.function_list:
+            if (
+                function.cyclomatic_complexity <= ccn
+                and function.length <= length
+                and function.parameter_count <= arguments
+            ):
+                continue
+            text = (
+                f"{function.name} has {function.nloc} NLOC, "
+                f"{function.cyclomatic_complexity} CCN, "
+                f"{function.token_count} token, {function.parameter_count} PARAM, "
+                f"{function.length} length"
+            )
+            issues.append(
+                Issue(
+                    path,
+                    function.start_line,
+                    function.end_line,
+                    "WARNING",
+                    text,
+                    LIZARD_RULE,
+                )
+            )
+    return issues
+
+
+def run_bandit(
+    files: List[str],
+    root: Optional[str] = None,
+    stop: Optional[Callable[[], bool]] = None,
+) -> List[Issue]:
+    """Analyze Python files with Bandit's default configuration.
+
+    Args:
+        files: Files to analyze, relative to ``root``
+        root: Directory the paths are relative to (default: current directory)
+        stop: Callback returning True when the analysis must be abandoned
+
+    Returns:
+        One Issue per Bandit finding
+    """
+    from bandit.core import config as bandit_config
+    from bandit.core import manager as bandit_manager
+
+    by_target = {os.path.join(root or "", path): path for path in files}
+    targets = list(by_target)
+    config = bandit_config.BanditConfig()
+    issues = []
+    for start in range(0, len(targets), BANDIT_BATCH_SIZE):
+        if stop and stop():
+            break
+        bandit = bandit_manager.BanditManager(config, "file", quiet=True)
+        bandit.discover_files(
+            targets[start : start + BANDIT_BATCH_SIZE], recursive=False
+        )
+        bandit.run_tests()
+        for issue in bandit.get_issue_list():
+            line_range = issue.linerange or [issue.lineno]
+            issues.append(
+                Issue(
+                    by_target.get(issue.fname, issue.fname),
+                    issue.lineno,
+                    max(line_range),
+                    str(issue.severity),
+                    issue.text,
+                    issue.test_id,
+                )
+            )
+    return issues
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Incremental decoding of the finding arrays in a tool's JSON output.
+
+Semgrep, ESLint and Bandit print a single JSON document whose size grows with
+the repository: hundreds of MB for a full Semgrep scan. Reading it whole and
+building the complete object tree makes the gate's memory follow the size of
+the output. JsonStream is fed the output as it arrives and decodes only the
+items of selected arrays (e.g. Semgrep's ``results``), handing each one to a
+callback as soon as it is complete. Everything else is skipped without being
+materialized, so at most one item and one chunk of output are held at a time.
+"""
+import json
+import re
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Characters read from a file per feed
+CHUNK_SIZE = 64 * 1024
+
+# JSON path of an array: the keys leading to it from the document root
+Path = Tuple[str, ...]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Next character that matters when skipping a value
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_CLOSING = {"{": "}", "[": "]"}
+# Characters that can follow a complete number, boolean or null
+_DELIMITERS = frozenset(",]} \t\n\r")
+
+
+class _Frame:
+    """An object or array being decoded.
+
+    Attributes:
+        opening (str): '{' or '['.
+        path (Path): Path of the container.
+        target (bool): The container is one of the selected arrays.
+        key (Optional[str]): Key of the member being decoded (objects).
+        empty (bool): No member or item has been read yet.
+    """
+
+    def __init__(self, opening: str, path: Path, target: bool):
+        self.opening = opening
+        self.path = path
+        self.target = target
+        self.key: Optional[str] = None
+        self.empty = True
+
+    def child_path(self) -> Path:
+        """Path of the value being decoded inside this container."""
+        if self.opening == "{":
+            return self.path + (self.key or "",)
+        return self.path
+
+
+class JsonStream:
+    """Decodes the items of selected arrays of a JSON document fed in chunks.
+
+    Attributes:
+        arrays (Set[Path]): Paths of the arrays whose items are decoded,
+            e.g. ``("results",)``, or ``()`` for a document that is an array.
+        fields (Dict[str, Any]): Strings, numbers, booleans and nulls that are
+            members of the top-level object (e.g. a status), by key.
+        items (int): Number of items decoded so far.
+        error (Optional[str]): Why the document is invalid, if it is.
+    """
+
+    def __init__(
+        self, arrays: Iterable[Path], on_item: Callable[[Path, Any], None]
+    ) -> None:
+        """Initialize a decoder.
+
+        Args:
+            arrays: Paths of the arrays whose items are decoded
+            on_item: Called with the array path and each decoded item
+        """
+        self.arrays = set(arrays)
+        self.on_item = on_item
+        self.fields: Dict[str, Any] = {}
+        self.items = 0
+        self.error: Optional[str] = None
+        # Containers leading to a selected array are descended into
+        self._prefixes = {
+            array[:length] for array in self.arrays for length in range(len(array))
+        }
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._state = "value"
+        self._skip_depth = 0
+        self._started = False
+
+    def feed(self, text: str) -> None:
+        """Decode the next part of the document.
+
+        Items completed by ``text`` are passed to the callback before this
+        returns. Once the document is found to be invalid, further input is
+        discarded and ``close`` reports the error.
+
+        Args:
+            text: Next characters of the document
+        """
+        if self.error is not None or not text:
+            return
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+        self._decode(final=False)
+
+    def feed_file(self, handle: IO[str]) -> None:
+        """Decode a whole document from a file, one chunk at a time.
+
+        Args:
+            handle: File opened in text mode
+
+        Raises:
+            ValueError: If the document is not valid JSON
+        """
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), ""):
+            self.feed(chunk)
+        self.close()
+
+    def close(self) -> None:
+        """Check that the document is complete.
+
+        Raises:
+            ValueError: If the document is empty, truncated or invalid
+        """
+        if self.error is None:
+            self._decode(final=True)
+        if self.error is None and not self._started:
+            self.error = "no JSON output"
+        elif self.error is None and self._state != "end":
+            self.error = "truncated JSON output"
+        if self.error is not None:
+            raise ValueError(self.error)
+
+    def _decode(self, final: bool) -> None:
+        """Decode as much of the buffer as possible."""
+        handlers = {
+            "value": self._value,
+            "key": self._key,
+            "colon": self._colon,
+            "after": self._after,
+            "skip": self._skip,
+            "end": self._end,
+        }
+        try:
+            while handlers[self._state](final):
+                pass
+        except ValueError as e:
+            self.error = str(e)
+            self._buffer = ""
+            self._pos = 0
+
+    def _whitespace(self) -> bool:
+        """Skip whitespace; False if the buffer is exhausted."""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _scalar(self, final: bool) -> Tuple[bool, Any]:
+        """Decode a string, number, boolean or null at the current position.
+
+        Returns:
+            Tuple of whether a value was decoded and the value
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError as e:
+            if final:
+                raise ValueError(f"invalid JSON: {e}") from e
+            return False, None
+        # A number may continue in the next chunk ("1" then "2.5e3"), so until
+        # the input ends it is only complete once a delimiter follows it
+        if not final and not isinstance(value, str):
+            if end == len(self._buffer) or self._buffer[end] not in _DELIMITERS:
+                return False, None
+        self._pos = end
+        return True, value
+
+    def _value(self, final: bool) -> bool:
+        """Decode, descend into or skip the next value."""
+        if not self._whitespace():
+            return False
+        self._started = True
+        parent = self._stack[-1] if self._stack else None
+        char = self._buffer[self._pos]
+
+        if parent and parent.opening == "[" and char == "]" and parent.empty:
+            return self._close_container()
+        if parent and parent.target:
+            decoded, item = self._item(final)
+            if not decoded:
+                return False
+            parent.empty = False
+            self.items += 1
+            self.on_item(parent.path, item)
+            self._state = "after"
+            return True
+
+        path = parent.child_path() if parent else ()
+        if char == "{" and path in self._prefixes:
+            self._open(char, path, target=False)
+            self._state = "key"
+        elif char == "[" and path in self.arrays:
+            self._open(char, path, target=True)
+            self._state = "value"
+        elif char in "{[":
+            self._skip_depth = 0
+            self._state = "skip"
+        else:
+            decoded, value = self._scalar(final)
+            if not decoded:
+                return False
+            if parent and parent.opening == "{" and len(self._stack) == 1:
+                self.fields[parent.key or ""] = value
+            self._state = "after"
+        if parent:
+            parent.empty = False
+        return True
+
+    def _item(self, final: bool) -> Tuple[bool, Any]:
+        """Decode one item of a selected array."""
+        if self._buffer[self._pos] not in "{[":
+            return self._scalar(final)
+        try:
+            item, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError as e:
+            # The item is usually just not complete yet
+            if final:
+                raise ValueError(f"invalid JSON: {e}") from e
+            return False, None
+        self._pos = end
+        return True, item
+
+    def _open(self, opening: str, path: Path, target: bool) -> None:
+        """Enter an object or array."""
+        self._stack.append(_Frame(opening, path, target))
+        self._pos += 1
+
+    def _close_container(self) -> bool:
+        """Leave the current object or array."""
+        self._stack.pop()
+        self._pos += 1
+        self._state = "after" if self._stack else "end"
+        return True
+
+    def _key(self, final: bool) -> bool:
+        """Read the key of the next object member."""
+        if not self._whitespace():
+            return False
+        frame = self._stack[-1]
+        char = self._buffer[self._pos]
+        if char == "}" and frame.empty:
+            return self._close_container()
+        if char != '"':
+            raise ValueError(f"expected an object key at {char!r}")
+        decoded, key = self._scalar(final)
+        if not decoded:
+            return False
+        frame.key = key
+        self._state = "colon"
+        return True
+
+    def _colon(self, final: bool) -> bool:
+        """Read the colon after an object key."""
+        if not self._whitespace():
+            return False
+        if self._buffer[self._pos] != ":":
+            raise ValueError(f"expected ':' at {self._buffer[self._pos]!r}")
+        self._pos += 1
+        self._state = "value"
+        return True
+
+    def _after(self, final: bool) -> bool:
+        """Read the separator or closing bracket after a value."""
+        if not self._stack:
+            self._state = "end"
+            return True
+        if not self._whitespace():
+            return False
+        frame = self._stack[-1]
+        char = self._buffer[self._pos]
+        if char == ",":
+            self._pos += 1
+            self._state = "key" if frame.opening == "{" else "value"
+            return True
+        if char == _CLOSING[frame.opening]:
+            return self._close_container()
+        raise ValueError(f"expected ',' or {_CLOSING[frame.opening]!r} at {char!r}")
+
+    def _skip(self, final: bool) -> bool:
+        """Pass over an object or array nobody asked for without decoding it."""
+        buffer = self._buffer
+        while True:
+            match = _STRUCTURE.search(buffer, self._pos)
+            if not match:
+                self._pos = len(buffer)
+                return False
+            self._pos = match.start()
+            char = match.group()
+            if char == '"':
+                string = _STRING.match(buffer, self._pos)
+                if not string:
+                    # The string ends in a later chunk
+                    return False
+                self._pos = string.end()
+                continue
+            self._pos += 1
+            self._skip_depth += 1 if char in "{[" else -1
+            if self._skip_depth == 0:
+                self._state = "after"
+                return True
+
+    def _end(self, final: bool) -> bool:
+        """Accept only whitespace after the document."""
+        if self._whitespace():
+            raise ValueError("extra data after the JSON document")
+        return False
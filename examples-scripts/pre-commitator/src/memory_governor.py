@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Memory-aware admission of concurrent tool invocations.
+
+Semgrep and ESLint can each use hundreds of MB to several GB on large inputs,
+so running them side by side, or several shards of one, can make a laptop
+swap or get a CI job OOM-killed. The MemoryGovernor starts a tool invocation
+only while the memory reserved by the invocations already running, plus an
+estimate for the new one, fits in a budget. The resident memory of each
+running tool (its whole process group, read from /proc) is sampled, and its
+reservation grows when it uses more than estimated. Estimates are learned
+from the peaks measured in previous runs.
+
+Under memory pressure invocations wait for each other instead of failing:
+one is always admitted when nothing else is running, so the run degrades to
+sequential execution. The reservations live in multiprocessing primitives,
+so the worker processes of a sharded scan share one budget.
+"""
+
+import json
+import multiprocessing
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gate_profiler import max_rss_kb
+
+# Share of the memory available at the start of a run that tools may use
+DEFAULT_BUDGET_SHARE = 0.75
+
+# Seconds between samples of the running tools' resident memory
+SAMPLE_INTERVAL = 0.5
+
+# Seconds between checks for cancellation while waiting for memory
+WAIT_INTERVAL = 0.1
+
+# Measured invocations remembered per tool
+MAX_OBSERVATIONS = 32
+
+
+def available_memory_kb() -> Optional[int]:
+    """Return the memory available for new processes, in KB.
+
+    Returns:
+        MemAvailable from /proc/meminfo, the free physical memory where
+        there is no /proc, or None if it cannot be determined
+    """
+    try:
+        with open("/proc/meminfo", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def memory_budget_kb(budget_mb: Optional[float] = None) -> int:
+    """Resolve the memory budget of a run.
+
+    Args:
+        budget_mb: Budget in MB. Defaults to QUALITY_GATE_MEMORY_MB, or
+            DEFAULT_BUDGET_SHARE of the memory available now.
+
+    Returns:
+        Budget in KB, or 0 for no limit (also when the available memory
+        cannot be determined)
+    """
+    if budget_mb is None:
+        variable = os.environ.get("QUALITY_GATE_MEMORY_MB", "")
+        try:
+            budget_mb = float(variable) if variable else None
+        except ValueError:
+            budget_mb = None
+    if budget_mb is None:
+        available = available_memory_kb()
+        return int(available * DEFAULT_BUDGET_SHARE) if available else 0
+    return max(0, int(budget_mb * 1024))
+
+
+def process_group_rss_kb() -> Dict[int, int]:
+    """Return the resident memory of every process group, in KB.
+
+    Tools run in their own session, so their group id is their pid and the
+    group holds everything they started (e.g. node under npx). One pass over
+    /proc measures all running tools at once.
+
+    Returns:
+        Total RSS per process group id; empty without /proc
+    """
+    page_kb = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+    usage: Dict[int, int] = {}
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return usage
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as handle:
+                data = handle.read()
+        except OSError:
+            continue
+        # Fields after the parenthesized command name, which may hold spaces
+        fields = data[data.rfind(b")") + 2 :].split()
+        try:
+            group, pages = int(fields[2]), int(fields[21])
+        except (IndexError, ValueError):
+            continue
+        usage[group] = usage.get(group, 0) + pages * page_kb
+    return usage
+
+
+class MemoryLease:
+    """Memory reserved for one running tool invocation.
+
+    Attributes:
+        tool (str): Name of the tool.
+        input_kb (int): Size of the files passed to the invocation.
+        reserved_kb (int): Memory reserved for it; grows with its usage.
+        peak_kb (int): Highest resident memory sampled so far.
+        process (Optional[subprocess.Popen]): The running tool, once started.
+    """
+
+    def __init__(self, tool: str, input_kb: int, reserved_kb: int):
+        """Initialize a lease.
+
+        Args:
+            tool: Name of the tool
+            input_kb: Size of the files passed to the invocation
+            reserved_kb: Memory reserved for the invocation
+        """
+        self.tool = tool
+        self.input_kb = input_kb
+        self.reserved_kb = reserved_kb
+        self.peak_kb = 0
+        self.process: Optional[subprocess.Popen] = None
+
+
+class MemoryGovernor:
+    """Admits tool invocations while a memory budget allows.
+
+    Attributes:
+        budget_kb (int): Memory the running tools may use together.
+        path (Optional[str]): File holding the learned estimates, or None.
+        observations (Dict[str, List[Tuple[int, int]]]): (input KB, peak KB)
+            of recent invocations of each tool, oldest first.
+    """
+
+    ESTIMATES_FILENAME = "quality-gate-memory.json"
+    FORMAT_VERSION = 1
+
+    def __init__(self, budget_kb: int, path: Optional[str] = None):
+        """Initialize a governor with no tool running.
+
+        Args:
+            budget_kb: Memory the running tools may use together
+            path: File the learned estimates are loaded from and saved to
+        """
+        self.budget_kb = budget_kb
+        self.path = path
+        self.observations = self._load()
+        self._condition = multiprocessing.Condition()
+        self._reserved = multiprocessing.Value("q", 0, lock=False)
+        self._running = multiprocessing.Value("i", 0, lock=False)
+        self._waits = multiprocessing.Value("i", 0, lock=False)
+        self._waited = multiprocessing.Value("d", 0.0, lock=False)
+        self._init_local()
+
+    @classmethod
+    def for_repository(
+        cls, git_dir: Optional[str], budget_mb: Optional[float] = None
+    ) -> Optional["MemoryGovernor"]:
+        """Create the governor of a run in the given repository.
+
+        Args:
+            git_dir: Git directory holding the learned estimates, if any
+            budget_mb: Memory budget in MB. Defaults to QUALITY_GATE_MEMORY_MB,
+                or DEFAULT_BUDGET_SHARE of the memory available now.
+
+        Returns:
+            MemoryGovernor, or None when the budget is 0 (disabled) or the
+            available memory cannot be determined
+        """
+        budget_kb = memory_budget_kb(budget_mb)
+        if budget_kb <= 0:
+            return None
+        path = os.path.join(git_dir, cls.ESTIMATES_FILENAME) if git_dir else None
+        return cls(budget_kb, path)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the shared state for a worker process, not the local one."""
+        state = self.__dict__.copy()
+        for name in ("_lock", "_leases", "_sampler"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled governor with its own sampler."""
+        self.__dict__.update(state)
+        self._init_local()
+
+    def _init_local(self) -> None:
+        """Create the state private to this process: its leases and sampler."""
+        self._lock = threading.Lock()
+        self._leases: List[MemoryLease] = []
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def waits(self) -> int:
+        """Number of invocations that had to wait for memory since ``reset``."""
+        return self._waits.value
+
+    @property
+    def waited(self) -> float:
+        """Seconds those invocations spent waiting, in total."""
+        return self._waited.value
+
+    def reset(self) -> None:
+        """Clear the wait statistics at the start of a run."""
+        with self._condition:
+            self._waits.value = 0
+            self._waited.value = 0.0
+
+    def estimate(self, tool: str, input_kb: int, default_kb: int) -> int:
+        """Estimate the peak memory of a tool invocation.
+
+        Memory is assumed to grow with the input: the estimate is the lowest
+        peak among past invocations on at least as much input. Larger inputs
+        than ever measured are extrapolated linearly from the smallest and
+        largest measured ones.
+
+        Args:
+            tool: Name of the tool
+            input_kb: Size of the files to be passed to the tool
+            default_kb: Estimate used until the tool has been measured
+
+        Returns:
+            Estimated peak resident memory in KB
+        """
+        observations = self.observations.get(tool)
+        if not observations:
+            return default_kb
+        larger = [peak for size, peak in observations if size >= input_kb]
+        if larger:
+            return min(larger)
+        small = min(observations)
+        large = max(observations)
+        if large[0] == small[0]:
+            return max(large[1], default_kb)
+        slope = max(0.0, (large[1] - small[1]) / (large[0] - small[0]))
+        return int(large[1] + slope * (input_kb - large[0]))
+
+    def admit(
+        self,
+        tool: str,
+        input_kb: int,
+        default_kb: int,
+        stop: Callable[[], bool],
+    ) -> Optional[MemoryLease]:
+        """Wait until a tool invocation fits in the budget and reserve it.
+
+        An invocation is admitted right away when no other one is running,
+        even if its estimate exceeds the budget.
+
+        Args:
+            tool: Name of the tool
+            input_kb: Size of the files to be passed to the tool
+            default_kb: Estimate used until the tool has been measured
+            stop: Returns True when the run is cancelled or out of time
+
+        Returns:
+            Lease to pass to ``release``, or None if ``stop`` fired while
+            waiting
+        """
+        need = self.estimate(tool, input_kb, default_kb)
+        start = None
+        with self._condition:
+            while self._running.value and self._reserved.value + need > self.budget_kb:
+                if start is None:
+                    start = time.monotonic()
+                if stop():
+                    return None
+                self._condition.wait(WAIT_INTERVAL)
+            self._reserved.value += need
+            self._running.value += 1
+            if start is not None:
+                self._waits.value += 1
+                self._waited.value += time.monotonic() - start
+        return MemoryLease(tool, input_kb, need)
+
+    def track(self, lease: MemoryLease, process: subprocess.Popen) -> None:
+        """Start sampling the memory of an admitted invocation's process.
+
+        Args:
+            lease: Lease returned by ``admit``
+            process: The started tool, leading its own process group
+        """
+        lease.process = process
+        with self._lock:
+            self._leases.append(lease)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, daemon=True)
+                self._sampler.start()
+
+    def release(self, lease: MemoryLease) -> int:
+        """Give back an invocation's reservation once it has exited.
+
+        Args:
+            lease: Lease returned by ``admit``
+
+        Returns:
+            Peak resident memory measured for the invocation, in KB
+        """
+        with self._lock:
+            if lease in self._leases:
+                self._leases.remove(lease)
+        rusage = getattr(lease.process, "rusage", None)
+        if rusage is not None:
+            lease.peak_kb = max(lease.peak_kb, max_rss_kb(rusage))
+        with self._condition:
+            self._reserved.value -= lease.reserved_kb
+            self._running.value -= 1
+            self._condition.notify_all()
+        return lease.peak_kb
+
+    def record(self, observations: Dict[str, List[Tuple[int, int]]]) -> None:
+        """Learn from the invocations of a run and save the estimates.
+
+        Args:
+            observations: (input KB, peak KB) of each completed invocation,
+                per tool
+        """
+        changed = False
+        for tool, measured in observations.items():
+            measured = [(size, peak) for size, peak in measured if peak > 0]
+            if measured:
+                history = self.observations.setdefault(tool, []) + measured
+                self.observations[tool] = history[-MAX_OBSERVATIONS:]
+                changed = True
+        if changed:
+            self._save()
+
+    def _sample(self) -> None:
+        """Sample the tracked invocations until none is left (sampler thread)."""
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            with self._lock:
+                leases = list(self._leases)
+                if not leases:
+                    self._sampler = None
+                    return
+            usage = process_group_rss_kb()
+            for lease in leases:
+                rss = usage.get(lease.process.pid, 0)
+                lease.peak_kb = max(lease.peak_kb, rss)
+                if rss > lease.reserved_kb:
+                    # Using more than estimated: hold back new invocations
+                    with self._condition:
+                        self._reserved.value += rss - lease.reserved_kb
+                    lease.reserved_kb = rss
+
+    def _load(self) -> Dict[str, List[Tuple[int, int]]]:
+        """Read the learned estimates, treating a missing or corrupt file as empty."""
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                data = json.load(handle)
+            if data.get("format") != self.FORMAT_VERSION:
+                return {}
+            return {
+                str(tool): [(int(size), int(peak)) for size, peak in rows]
+                for tool, rows in data["tools"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return {}
+
+    def _save(self) -> None:
+        """Atomically write the learned estimates, ignoring failures."""
+        if not self.path:
+            return
+        data = {
+            "format": self.FORMAT_VERSION,
+            "tools": {
+                tool: [list(row) for row in rows]
+                for tool, rows in self.observations.items()
+            },
+        }
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.path), suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -17,9 +17,10 @@ SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 # Source .env file if it exists
 if [ -f "$SCRIPT_DIR/../.env" ]; then
     echo "Loading environment from $SCRIPT_DIR/../.env"
+    # Export every variable to make it available to the Python subprocess
+    set -a
     source "$SCRIPT_DIR/../.env"
-    # Export to make it available to Python subprocess
-    export DISABLE_ESLINT
+    set +a
 fi
 
 # Define colors for output
@@ -46,8 +47,9 @@ if ! command -v python3 &> /dev/null; then
     exit 1
 fi
 
-# Run the quality gate script
-python3 "${SCRIPT_DIR}/quality_gate.py"
+# Run the quality gate (through the daemon when one is running); arguments
+# such as --run-plan are passed on
+python3 "${SCRIPT_DIR}/gate_client.py" "$@"
 EXIT_CODE=$?
 
 # Display appropriate message based on validation result
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Interruptible execution of external tools.
+
+``subprocess.run`` only kills the direct child on timeout, and it cannot be
+cancelled from another thread. Tools such as ``npx eslint`` start their own
+children, which would keep running (and keep the output pipes open). This
+module runs each tool in its own process group, waits for it until a deadline
+while polling a cancellation event, and kills the whole group when either
+fires.
+
+Output is normally captured whole. Tools whose output grows with the
+repository can instead have their stdout handed to a callback chunk by chunk
+as it is produced, through a bounded queue, so it is never held in memory.
+"""
+import codecs
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from typing import Callable, List, Optional, Tuple, Type
+
+# Seconds between checks of the cancellation event while a tool runs
+POLL_INTERVAL = 0.1
+
+# Bytes read from a streamed tool's stdout at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Chunks read ahead of the callback before the tool is made to wait
+STREAM_QUEUE_CHUNKS = 16
+
+
+class ToolCancelled(Exception):
+    """Raised when a running tool was stopped through its cancellation event."""
+
+
+def run_captured(
+    command: list,
+    cwd: Optional[str] = None,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+    popen_class: Type[subprocess.Popen] = subprocess.Popen,
+    on_stdout: Optional[Callable[[str], None]] = None,
+    on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+) -> Tuple[subprocess.CompletedProcess, subprocess.Popen]:
+    """Run a command with captured text output, a deadline and cancellation.
+
+    Args:
+        command: Command to run
+        cwd: Working directory of the command
+        deadline: ``time.monotonic()`` value at which the command is killed
+        cancel: Event that kills the command when set
+        popen_class: Popen class to use (e.g. one recording resource usage)
+        on_stdout: Called on this thread with each chunk of stdout (UTF-8)
+            as it arrives; the CompletedProcess then has an empty stdout
+        on_start: Called with the process as soon as it has started (e.g. to
+            watch its memory use)
+
+    Returns:
+        Tuple of the CompletedProcess and the finished Popen object
+
+    Raises:
+        OSError: If the command cannot be started
+        subprocess.TimeoutExpired: If the deadline passed
+        ToolCancelled: If the cancellation event was set
+    """
+    if on_stdout is not None:
+        return _run_streamed(
+            command, cwd, deadline, cancel, popen_class, on_stdout, on_start
+        )
+    process = popen_class(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    if on_start is not None:
+        on_start(process)
+    start = time.monotonic()
+    with process:
+        while True:
+            try:
+                stdout, stderr = process.communicate(
+                    timeout=_wait_time(deadline, cancel)
+                )
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    _kill(process)
+                    raise ToolCancelled(command[0])
+                if deadline is not None and time.monotonic() >= deadline:
+                    _kill(process)
+                    raise subprocess.TimeoutExpired(command, time.monotonic() - start)
+            except BaseException:
+                _kill(process)
+                raise
+    completed = subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+    return completed, process
+
+
+def _run_streamed(
+    command: list,
+    cwd: Optional[str],
+    deadline: Optional[float],
+    cancel: Optional[threading.Event],
+    popen_class: Type[subprocess.Popen],
+    on_stdout: Callable[[str], None],
+    on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+) -> Tuple[subprocess.CompletedProcess, subprocess.Popen]:
+    """Run a command, passing its stdout to a callback as it is produced.
+
+    A reader thread moves stdout through a bounded queue, so a tool that
+    writes faster than the callback consumes blocks on its pipe instead of
+    filling memory. Stderr is captured whole.
+    """
+    process = popen_class(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    if on_start is not None:
+        on_start(process)
+    chunks: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+    stderr: List[bytes] = []
+    fd = process.stdout.fileno()
+
+    def read_stdout() -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            for data in iter(lambda: os.read(fd, STREAM_CHUNK_SIZE), b""):
+                text = decoder.decode(data)
+                if text:
+                    chunks.put(text)
+            text = decoder.decode(b"", final=True)
+            if text:
+                chunks.put(text)
+        finally:
+            chunks.put(None)
+
+    readers = [
+        threading.Thread(target=read_stdout, daemon=True),
+        threading.Thread(
+            target=lambda: stderr.append(process.stderr.read()), daemon=True
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+    start = time.monotonic()
+
+    def check() -> Optional[float]:
+        """Raise once cancelled or past the deadline, else return the wait time."""
+        if cancel is not None and cancel.is_set():
+            raise ToolCancelled(command[0])
+        if deadline is not None and time.monotonic() >= deadline:
+            raise subprocess.TimeoutExpired(command, time.monotonic() - start)
+        return _wait_time(deadline, cancel)
+
+    def exited(wait: Optional[float]) -> bool:
+        try:
+            process.wait(timeout=wait)
+        except subprocess.TimeoutExpired:
+            return False
+        return True
+
+    def joined(reader: threading.Thread, wait: Optional[float]) -> bool:
+        reader.join(wait)
+        return not reader.is_alive()
+
+    ended = False
+    with process:
+        try:
+            while not ended:
+                try:
+                    chunk = chunks.get(timeout=check())
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    ended = True
+                    break
+                # Hand over what has piled up at once, not one small read at a time
+                parts = [chunk]
+                while parts[-1] is not None and len(parts) < STREAM_QUEUE_CHUNKS:
+                    try:
+                        parts.append(chunks.get_nowait())
+                    except queue.Empty:
+                        break
+                ended = parts[-1] is None
+                on_stdout("".join(parts[:-1] if ended else parts))
+            # A tool may close stdout long before it exits, or leave a child
+            # holding stderr open: both waits stay bound by the deadline
+            while not exited(check()):
+                pass
+            for reader in readers:
+                while not joined(reader, check()):
+                    pass
+        except BaseException:
+            _kill_group(process)
+            # Unblock the reader, which may be waiting for room in the queue
+            while not ended and chunks.get() is not None:
+                pass
+            process.wait()
+            for reader in readers:
+                reader.join()
+            raise
+    completed = subprocess.CompletedProcess(
+        command,
+        process.returncode,
+        "",
+        b"".join(stderr).decode("utf-8", errors="replace"),
+    )
+    return completed, process
+
+
+def _wait_time(
+    deadline: Optional[float], cancel: Optional[threading.Event]
+) -> Optional[float]:
+    """Seconds to block before checking the deadline and cancellation again."""
+    wait = POLL_INTERVAL if cancel is not None else None
+    if deadline is not None:
+        remaining = max(0.0, deadline - time.monotonic())
+        wait = remaining if wait is None else min(wait, remaining)
+    return wait
+
+
+def _kill(process: subprocess.Popen) -> None:
+    """Kill a process and everything it started, then reap it."""
+    _kill_group(process)
+    process.communicate()
+
+
+def _kill_group(process: subprocess.Popen) -> None:
+    """Kill a process and everything it started."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        # No process groups on this platform, or the group is already gone
+        process.kill()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Live progress of a quality gate run.
+
+Without it nothing is printed between "Running Code Quality Gate..." and the
+final report, however long the tools take. The ProgressReporter prints a
+line as each tool finishes, with the tool's findings, and findings that a
+tool streams (see ``Analyzer.stream_arrays``) as soon as they are decoded, so
+the first error shows up while the other tools are still running. The final
+ERRORS / WARNINGS summary is printed afterwards as usual.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from findings import Finding
+from tool_result import ToolResult
+
+# Findings printed live per tool; the rest are only in the final summary
+STREAM_LIMIT = 20
+
+
+class ProgressReporter:
+    """Prints per-tool progress and findings while the gate runs.
+
+    Tools may run on several threads at once; lines are printed one at a
+    time. A tool run in several parts (one per shard with ``--all``) gets its
+    status line once every part has finished.
+
+    Attributes:
+        emit (Callable[[str], None]): Receives each output line.
+        limit (int): Findings printed live per tool.
+    """
+
+    def __init__(self, emit: Callable[[str], None], limit: int = STREAM_LIMIT):
+        """Initialize a reporter.
+
+        Args:
+            emit: Callable receiving each output line
+            limit: Findings printed live per tool
+        """
+        self.emit = emit
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._parts: Dict[str, int] = {}
+        self._done: Dict[str, int] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._shown: Dict[str, int] = {}
+        # The findings themselves, not their ids: ids of freed findings are reused
+        self._seen: Set[Finding] = set()
+        self._notices: Set[Tuple[str, str]] = set()
+        self._stopping = False
+
+    def start(self, parts: Dict[str, int], files: int) -> None:
+        """Announce the tools about to run.
+
+        Args:
+            parts: Number of results expected from each tool, in run order
+            files: Number of files checked
+        """
+        with self._lock:
+            self._start = time.monotonic()
+            self._parts = dict(parts)
+            self._done = {tool: 0 for tool in parts}
+            self._totals = {}
+            self._shown = {}
+            self._seen = set()
+            self._notices = set()
+            self._stopping = False
+            self.emit(
+                f"⏳ Checking {files} file(s) with {', '.join(parts) or 'no tools'}..."
+            )
+
+    def finding(self, tool: str, finding: Finding) -> None:
+        """Print a finding as soon as a tool reports it.
+
+        Args:
+            tool: Tool that reported the finding
+            finding: The finding
+        """
+        with self._lock:
+            self._show(tool, finding)
+
+    def stopping(self, tool: str) -> None:
+        """Announce that fail-fast is stopping the run after a tool's error."""
+        with self._lock:
+            if not self._stopping:
+                self._stopping = True
+                self.emit(f"  ⛔ {tool} reported an error; stopping the other tools")
+
+    def finished(self, result: ToolResult, skipped: Optional[str] = None) -> None:
+        """Print a finished tool's remaining findings and, once all its parts
+        are done, its status line.
+
+        Args:
+            result: Result of the tool, or of one part of it
+            skipped: Why the tool did not run (e.g. left to another hook)
+        """
+        tool = result.tool_name
+        with self._lock:
+            for finding in result.errors + result.warnings:
+                self._show(tool, finding)
+            totals = self._totals.setdefault(
+                tool, {"errors": 0, "warnings": 0, "interrupted": 0}
+            )
+            totals["errors"] += sum(1 for finding in result.errors if finding.path)
+            totals["warnings"] += sum(1 for finding in result.warnings if finding.path)
+            totals["interrupted"] += bool(result.interrupted)
+            self._done[tool] = self._done.get(tool, 0) + 1
+            if self._done[tool] < self._parts.get(tool, 1):
+                return
+            self.emit(f"  {self._status(tool, result, totals, skipped)}")
+
+    def _status(
+        self,
+        tool: str,
+        result: ToolResult,
+        totals: Dict[str, int],
+        skipped: Optional[str],
+    ) -> str:
+        """Status line of a tool whose parts have all finished."""
+        elapsed = f"[{time.monotonic() - self._start:.1f}s]"
+        if skipped:
+            return f"⏭️ {tool}: {skipped} {elapsed}"
+        counts = []
+        if totals["errors"]:
+            counts.append(f"{totals['errors']} error(s)")
+        if totals["warnings"]:
+            counts.append(f"{totals['warnings']} warning(s)")
+        hidden = self._shown.get(tool, 0) - self.limit
+        if hidden > 0:
+            counts.append(f"{hidden} only in the summary")
+        if totals["interrupted"]:
+            # The reason of the last part; parts stop for the same reason
+            reason = result.interrupted or "incomplete"
+            summary = "; ".join([", ".join(counts), reason] if counts else [reason])
+            return f"⏱️ {tool}: {summary} {elapsed}"
+        summary = ", ".join(counts) or "no issues"
+        icon = "❌" if totals["errors"] else "⚠️" if totals["warnings"] else "✅"
+        return f"{icon} {tool}: {summary} {elapsed}"
+
+    def _show(self, tool: str, finding: Finding) -> None:
+        """Print a finding once, up to the per-tool limit (lock held)."""
+        if finding in self._seen:
+            return
+        self._seen.add(finding)
+        if not finding.path:
+            # Notices repeat once per shard; print each once
+            key = (tool, finding.message)
+            if key in self._notices:
+                return
+            self._notices.add(key)
+        self._shown[tool] = self._shown.get(tool, 0) + 1
+        if self._shown[tool] <= self.limit:
+            icon = "🚫" if finding.is_error else "⚠️"
+            self.emit(f"    {icon} {finding.render()}")
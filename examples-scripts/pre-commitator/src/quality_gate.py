@@ -7,11 +7,44 @@ This module provides the core validation engine for the Pre-Commitator tool.
 It runs various code quality and security tools on specified files and reports
 issues found.
 """
-import json
+
+import argparse
+import functools
+import heapq
+import multiprocessing
 import os
+import sqlite3
 import subprocess
 import sys
-from typing import Dict, List, Optional, Set, Tuple
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+from analyzers import Analyzer, create_analyzers, load_plugins
+from background_checks import BackgroundChecks, slow_tier
+from change_range import ChangeRange
+from file_index import FileIndex
+from findings import ERROR, Finding
+from gate_profiler import TOOL_CATEGORY, Profiler, RusagePopen, Span
+from hunk_index import HunkIndex
+from memory_governor import MemoryGovernor
+from process_runner import ToolCancelled, run_captured
+from progress_reporter import ProgressReporter
+from result_cache import ResultCache, git_common_dir
+from run_history import RunHistory, history_enabled
+from run_plan import RunPlan, publish_results, results_path
+from semgrep_rules import SemgrepRuleStore
+from staged_snapshot import StagedSnapshot, list_staged_changes
+from tool_manifest import ToolResolver
+from tool_result import ToolResult
+
+# Cancellation event shared by the worker processes of a sharded scan
+_worker_cancel: Optional[Any] = None
+
+# Memory governor shared by the worker processes of a sharded scan
+_worker_governor: Optional[MemoryGovernor] = None
 
 
 class QualityGate:
@@ -21,299 +54,1300 @@ class QualityGate:
     validation tools, collects their results, and formats them for display.
 
     Attributes:
-        errors (List[str]): List of error messages found during validation.
-        warnings (List[str]): List of warning messages found during validation.
+        errors (List[Finding]): Errors found during validation.
+        warnings (List[Finding]): Warnings found during validation.
         files (List[str]): List of files to be checked.
+        jobs (int): Maximum number of tools run concurrently (1 = sequential).
+        cache (Optional[ResultCache]): Per-file findings cache, or None when
+            caching is disabled or unavailable.
+        snapshot (Optional[StagedSnapshot]): Staged content being checked, or
+            None when checking files from the working tree.
+        semgrep_rules (Optional[SemgrepRuleStore]): Pinned Semgrep rule packs;
+            ``--config auto`` is used when no snapshot has been downloaded.
+        tools (ToolResolver): Resolved analyzer executables and versions.
+        analyzers (List[Analyzer]): Registered analyzers, in report order.
+        plugin_errors (List[str]): Analyzer plugins that failed to load,
+            reported as warnings on every run.
+        diff_only (bool): Report only findings overlapping staged hunks.
+        hunks (Optional[HunkIndex]): Staged hunks used in diff-aware mode.
+        suppressed (int): Findings hidden because they are outside the diff.
+        duplicates (int): Findings merged into the same issue reported by
+            another tool at the same location.
+        profiler (Optional[Profiler]): Timing and resource measurements, or
+            None when profiling is off.
+        budget (float): Seconds the whole run may take (0 = unlimited).
+        deadline (Optional[float]): Monotonic time the current run's budget
+            runs out, or None when unlimited.
+        fail_fast (bool): Cancel the remaining tools once one reports an error.
+        interrupted (Dict[str, str]): Tools that timed out, were cancelled or
+            were skipped, with the reason.
+        run_plan (Optional[RunPlan]): Pre-commit run plan; analyzers it leaves
+            to standalone hooks are not run, and the findings of the others
+            are published for the hooks that reuse them.
+        deferred (Dict[str, str]): Analyzers left to a standalone hook, with
+            the hook id.
+        file_index (Optional[FileIndex]): Classification of the run's files,
+            from which the analyzers pick theirs.
+        change_range (Optional[ChangeRange]): Branch changes being checked
+            with ``--since``, or None.
+        tool_seconds (Dict[str, float]): Wall time spent running each tool.
+        file_seconds (Dict[Tuple[str, str], float]): Estimated time each
+            (tool, file) pair cost, for the run history.
+        reporter (Optional[ProgressReporter]): Prints progress and findings
+            while the tools run, or None for the final report only.
+        governor (Optional[MemoryGovernor]): Holds tool invocations back
+            while the memory budget is used up, or None when unlimited.
+        memory (Dict[str, List[Tuple[int, int]]]): Input size and peak memory
+            (KB) of each completed invocation of each tool in the run.
+        defer_slow (bool): Leave the slow analyzers of a staged run to a
+            background check after the commit (two-tier gating).
+        background (Dict[str, List[str]]): Slow analyzers deferred to the
+            background check, with the files they would have checked.
     """
 
-    # File extension mappings
-    PYTHON_EXTENSIONS = {".py"}
-    JAVASCRIPT_EXTENSIONS = {".js", ".jsx", ".ts", ".tsx"}
-    CODE_EXTENSIONS = {
-        ".py",
-        ".js",
-        ".jsx",
-        ".ts",
-        ".tsx",
-        ".java",
-        ".cpp",
-        ".c",
-        ".go",
-        ".rb",
-        ".php",
-        ".swift",
-        ".kt",
-    }
-
-    def __init__(self):
-        """Initialize the QualityGate with empty results lists."""
+    # Upper bound on the bytes of file arguments passed to one tool invocation,
+    # well below ARG_MAX on all supported platforms
+    SHARD_ARG_BUDGET = 100_000
+
+    # Seconds the whole gate may run, overridable with QUALITY_GATE_BUDGET
+    DEFAULT_BUDGET = 300
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        use_cache: bool = True,
+        diff_only: Optional[bool] = None,
+        git_dir: Optional[str] = None,
+        profile: bool = False,
+        budget: Optional[float] = None,
+        fail_fast: Optional[bool] = None,
+        run_plan: Optional[RunPlan] = None,
+        memory_mb: Optional[float] = None,
+        defer_slow: Optional[bool] = None,
+        tools: Optional[ToolResolver] = None,
+        cache: Optional[ResultCache] = None,
+        semgrep_rules: Optional[SemgrepRuleStore] = None,
+    ):
+        """Initialize the QualityGate with empty results lists.
+
+        Args:
+            jobs: Maximum number of tools to run concurrently. Defaults to the
+                  QUALITY_GATE_JOBS environment variable, or one worker per tool.
+            use_cache: Whether to reuse findings for unchanged file content.
+                       Also disabled by QUALITY_GATE_NO_CACHE=1.
+            diff_only: Whether to report only findings on staged changed lines.
+                       Defaults to the QUALITY_GATE_DIFF_ONLY environment variable.
+            git_dir: Git directory of the repository, if already known.
+            profile: Whether to measure the time and resources of each tool
+                     and phase of the run.
+            budget: Seconds the whole run may take; 0 disables the limit.
+                    Defaults to QUALITY_GATE_BUDGET, or DEFAULT_BUDGET.
+            fail_fast: Whether to cancel the remaining tools once one reports
+                       an error. Defaults to QUALITY_GATE_FAIL_FAST.
+            run_plan: Pre-commit run plan to follow when checking staged files.
+            memory_mb: Memory in MB the tools running at once may use; 0
+                       disables the limit. Defaults to QUALITY_GATE_MEMORY_MB,
+                       or three quarters of the memory available now.
+            defer_slow: Whether to leave the slow analyzers of a staged run to
+                        a background check after the commit. Defaults to
+                        QUALITY_GATE_DEFER_SLOW.
+            tools: Tool resolver to reuse (e.g. the daemon's); by default one
+                   backed by the repository's manifest.
+            cache: Result cache to reuse when caching is enabled; by default
+                   the repository's.
+            semgrep_rules: Semgrep rule store to reuse; by default the
+                           repository's.
+        """
         self.errors = []
         self.warnings = []
         self.files = []
+        if diff_only is None:
+            diff_only = os.environ.get("QUALITY_GATE_DIFF_ONLY") == "1"
+        self.diff_only = diff_only
+        self.hunks: Optional[HunkIndex] = None
+        self.suppressed = 0
+        self.duplicates = 0
+        self._by_location: Dict[Tuple[str, int, str], List[Finding]] = {}
+        self.plugin_errors = load_plugins()
+        self.analyzers = create_analyzers()
+        self.jobs = self._resolve_jobs(jobs)
+        git_dir = git_dir or git_common_dir()
+        self.git_dir = git_dir
+        self.cache = None
+        if use_cache and os.environ.get("QUALITY_GATE_NO_CACHE") != "1":
+            self.cache = cache or ResultCache.for_repository(git_dir)
+        self.snapshot: Optional[StagedSnapshot] = None
+        if semgrep_rules is None:
+            semgrep_rules = SemgrepRuleStore.default(git_dir)
+        self.semgrep_rules = semgrep_rules
+        self.tools = tools or ToolResolver.for_repository(git_dir)
+        self.profiler = Profiler() if profile else None
+        if budget is None:
+            budget = _env_seconds("QUALITY_GATE_BUDGET", self.DEFAULT_BUDGET)
+        self.budget = max(0.0, budget)
+        self.deadline: Optional[float] = None
+        if fail_fast is None:
+            fail_fast = os.environ.get("QUALITY_GATE_FAIL_FAST") == "1"
+        self.fail_fast = fail_fast
+        self.interrupted: Dict[str, str] = {}
+        self._cancel = threading.Event()
+        self.run_plan = run_plan
+        self.deferred: Dict[str, str] = {}
+        self.file_index: Optional[FileIndex] = None
+        self.change_range: Optional[ChangeRange] = None
+        self.tool_seconds: Dict[str, float] = {}
+        self.file_seconds: Dict[Tuple[str, str], float] = {}
+        self.reporter: Optional[ProgressReporter] = None
+        self._stopped_by: Optional[str] = None
+        self.governor = MemoryGovernor.for_repository(git_dir, memory_mb)
+        self.memory: Dict[str, List[Tuple[int, int]]] = {}
+        if defer_slow is None:
+            defer_slow = os.environ.get("QUALITY_GATE_DEFER_SLOW") == "1"
+        self.defer_slow = defer_slow
+        self.slow_tier = slow_tier(self.analyzers) if defer_slow else {}
+        self.background: Dict[str, List[str]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the gate for worker processes, without its cancellation event.
+
+        The file index is left out too; each shard carries its own part. So
+        is the progress reporter, which only prints in the parent process,
+        and the memory governor, which workers receive when they start.
+        """
+        state = self.__dict__.copy()
+        del state["_cancel"]
+        state["file_index"] = None
+        state["reporter"] = None
+        state["governor"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled gate with a fresh cancellation event."""
+        self.__dict__.update(state)
+        self._cancel = threading.Event()
+
+    @property
+    def workdir(self) -> Optional[str]:
+        """Directory the tools run in: the staged snapshot, or None for the cwd."""
+        return self.snapshot.root if self.snapshot else None
+
+    def _new_result(self, tool_name: str) -> ToolResult:
+        """Create an empty ToolResult for a tool running in the gate's workdir.
+
+        With a progress reporter or in fail-fast mode, the result reports
+        each finding to the gate as soon as the tool's output yields it.
+        """
+        listener = None
+        if self.reporter or self.fail_fast:
+            listener = functools.partial(self._on_finding, tool_name)
+        return ToolResult(
+            tool_name, root=self.workdir, hunks=self.hunks, listener=listener
+        )
+
+    def _on_finding(self, tool_name: str, finding: Finding) -> None:
+        """Show a finding live and, in fail-fast mode, stop at the first error.
+
+        Args:
+            tool_name: Tool that reported the finding
+            finding: The finding
+        """
+        if self.reporter:
+            self.reporter.finding(tool_name, finding)
+        if self.fail_fast and finding.is_error and not self._cancel.is_set():
+            self._stopped_by = tool_name
+            self._cancel.set()
+            if self.reporter:
+                self.reporter.stopping(tool_name)
+
+    def _span(
+        self,
+        name: str,
+        category: str = "gate",
+        into: Optional[List[Span]] = None,
+        **args: Any,
+    ) -> ContextManager[Dict[str, Any]]:
+        """Measure a block when profiling, or do nothing.
+
+        Gate phases are measured across all threads and child processes;
+        other spans only in the calling thread.
+
+        Args:
+            name: Span name
+            category: Span category
+            into: List receiving the span (default: the profiler's spans)
+            **args: Details recorded with the span
+
+        Returns:
+            Context manager yielding the span's argument dict
+        """
+        if not self.profiler:
+            return nullcontext({})
+        return self.profiler.span(
+            name, category, into, whole_process=category == "gate", **args
+        )
+
+    def _resolve_jobs(self, jobs: Optional[int]) -> int:
+        """Determine the number of concurrent tool workers.
+
+        Args:
+            jobs: Explicitly requested worker count, or None
+
+        Returns:
+            Worker count of at least 1
+        """
+        if jobs is None:
+            env_jobs = os.environ.get("QUALITY_GATE_JOBS", "")
+            jobs = int(env_jobs) if env_jobs.isdigit() else len(self.analyzers)
+        return max(1, jobs)
+
+    def _reset_results(self) -> None:
+        """Forget the findings of a previous run and start the time budget."""
+        self.errors = []
+        self.warnings = [Finding.notice(message) for message in self.plugin_errors]
+        self.suppressed = 0
+        self.duplicates = 0
+        self._by_location = {}
+        self.interrupted = {}
+        self.deferred = {}
+        self.background = {}
+        self.file_index = None
+        self.change_range = None
+        self.tool_seconds = {}
+        self.file_seconds = {}
+        self.memory = {}
+        if self.governor:
+            self.governor.reset()
+        self._stopped_by = None
+        self._cancel.clear()
+        self.deadline = time.monotonic() + self.budget if self.budget else None
+
+    def tool_timeout(self, tool_name: str) -> float:
+        """Return the seconds one invocation of a tool may run (0 = no limit).
+
+        Args:
+            tool_name: Name of the analyzer, e.g. 'Semgrep'
+
+        Returns:
+            QUALITY_GATE_TIMEOUT_<TOOL> if set, else the analyzer's default
+        """
+        analyzer = self.analyzer(tool_name)
+        return _env_seconds(
+            f"QUALITY_GATE_TIMEOUT_{tool_name.upper()}",
+            analyzer.timeout if analyzer else 0,
+        )
+
+    def _tool_deadline(self, tool_name: str) -> Optional[float]:
+        """Return the monotonic time a tool invocation starting now must end by.
+
+        Args:
+            tool_name: Name of the tool
+
+        Returns:
+            The earlier of the tool timeout and the gate deadline, or None
+        """
+        timeout = self.tool_timeout(tool_name)
+        deadlines = [
+            deadline
+            for deadline in (
+                self.deadline,
+                time.monotonic() + timeout if timeout else None,
+            )
+            if deadline is not None
+        ]
+        return min(deadlines) if deadlines else None
+
+    def _interruption(
+        self, tool_name: str, deadline: Optional[float] = None
+    ) -> Optional[str]:
+        """Tell whether a tool must stop now.
+
+        Args:
+            tool_name: Name of the tool
+            deadline: The tool invocation's own deadline, if any
+
+        Returns:
+            Why the tool must stop, or None to let it run
+        """
+        if self._cancel.is_set():
+            if tool_name == self._stopped_by:
+                return "stopped at its first error (fail-fast)"
+            return "cancelled after another tool reported an error (fail-fast)"
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            return f"time budget of {self.budget:g}s exhausted"
+        if deadline is not None and now >= deadline:
+            return f"timed out after {self.tool_timeout(tool_name):g}s"
+        return None
+
+    def _stopper(
+        self, tool_result: ToolResult, deadline: Optional[float]
+    ) -> Callable[[], bool]:
+        """Build the stop callback of an in-process analyzer.
+
+        Args:
+            tool_result: Result marked as interrupted when the callback fires
+            deadline: Deadline of the analyzer run
+
+        Returns:
+            Callback returning True once the analyzer must stop
+        """
+
+        def stop() -> bool:
+            reason = self._interruption(tool_result.tool_name, deadline)
+            if reason:
+                tool_result.interrupt(reason)
+            return reason is not None
+
+        return stop
+
+    def _merge_result(self, result: ToolResult) -> None:
+        """Add a tool's findings to the gate-wide results lists.
+
+        A finding on the same file, line and normalized rule as one that
+        another tool already reported is merged into it instead of being
+        listed twice; the merged finding keeps the higher severity. Findings
+        of the same tool are never merged: they are distinct issues, such as
+        two unused variables on one line.
+
+        Args:
+            result: Findings collected by a single tool run
+        """
+        for finding in result.errors + result.warnings:
+            key = finding.dedup_key()
+            existing = next(
+                (
+                    recorded
+                    for recorded in self._by_location.get(key, [])
+                    if recorded.tool != finding.tool
+                    and finding.tool not in recorded.also_reported_by
+                ),
+                None,
+            )
+            if existing is None:
+                if key:
+                    self._by_location.setdefault(key, []).append(finding)
+                if finding.is_error:
+                    self.errors.append(finding)
+                else:
+                    self.warnings.append(finding)
+                continue
+
+            self.duplicates += 1
+            existing.also_reported_by += (finding.tool,)
+            if finding.is_error and not existing.is_error:
+                self.warnings.remove(existing)
+                existing.severity = ERROR
+                self.errors.append(existing)
+        self.suppressed += result.suppressed
+        tool = result.tool_name
+        self.tool_seconds[tool] = self.tool_seconds.get(tool, 0.0) + result.seconds
+        for path, seconds in result.file_seconds.items():
+            key = (tool, path)
+            self.file_seconds[key] = self.file_seconds.get(key, 0.0) + seconds
+        if result.memory:
+            self.memory.setdefault(tool, []).extend(result.memory)
+        if result.interrupted:
+            self.interrupted.setdefault(result.tool_name, result.interrupted)
+        if self.profiler:
+            self.profiler.spans.extend(result.spans)
 
     def get_staged_files(self) -> List[str]:
         """Get list of files staged for commit in the git repository.
 
+        Deleted files are excluded; renamed and copied files are listed under
+        their new path.
+
         Returns:
             List[str]: A list of file paths that are staged for commit.
         """
         try:
-            result = subprocess.run(
-                ["git", "diff", "--name-only", "--cached"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            files = [f.strip() for f in result.stdout.splitlines() if os.path.exists(f)]
+            files = [path for _, path in list_staged_changes()]
             self.files = files
             return files
-        except subprocess.SubprocessError:
-            self.errors.append("Error: Failed to get staged files from git")
+        except (OSError, subprocess.SubprocessError):
+            self.errors.append(
+                Finding.notice("Error: Failed to get staged files from git", ERROR)
+            )
             return []
 
-    def _filter_files_by_extension(
-        self, files: List[str], extensions: Set[str]
-    ) -> List[str]:
-        """Filter files by their extensions.
+    def get_tracked_files(self) -> List[str]:
+        """Get list of all tracked files present in the working tree.
+
+        Returns:
+            List[str]: A list of tracked file paths.
+        """
+        try:
+            result = subprocess.run(
+                ["git", "ls-files", "-z"], capture_output=True, check=True
+            )
+        except (OSError, subprocess.SubprocessError):
+            self.errors.append(
+                Finding.notice("Error: Failed to list tracked files from git", ERROR)
+            )
+            return []
+        paths = result.stdout.decode("utf-8", "surrogateescape").split("\0")
+        files = [path for path in paths if path and os.path.isfile(path)]
+        self.files = files
+        return files
+
+    def get_changed_files(self, ref: str) -> List[str]:
+        """Get the files changed on the current branch since it forked from a ref.
+
+        The range runs from the merge-base of HEAD and the ref to HEAD, as in
+        a merge request. Deleted files are excluded; renamed and copied files
+        are listed under their new path. In diff-only mode, findings are then
+        reported only when they overlap the range's hunks.
 
         Args:
-            files: List of file paths to filter
-            extensions: Set of extensions to include (with dot, e.g. {'.py', '.js'})
+            ref: Branch, tag or commit the branch is compared with
+
+        Returns:
+            List[str]: Changed file paths present in the working tree.
+        """
+        try:
+            self.change_range = ChangeRange.since(ref)
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            self.errors.append(
+                Finding.notice(f"Error: Cannot compare with {ref}: {e}", ERROR)
+            )
+            return []
+        if self.diff_only:
+            try:
+                self.hunks = HunkIndex.from_range(self.change_range.base)
+            except (OSError, subprocess.SubprocessError):
+                self.warnings.append(
+                    Finding.notice(
+                        f"Warning: Could not read the diff since {ref}; "
+                        "reporting all findings"
+                    )
+                )
+                self.hunks = None
+        files = [path for path in self.change_range.paths if os.path.isfile(path)]
+        self.files = files
+        return files
+
+    def load_staged_snapshot(self) -> List[str]:
+        """Materialize the staged content of the changed files and check that.
+
+        The tools then see exactly what is about to be committed, even when
+        the working tree has unstaged edits. If the snapshot cannot be
+        created, the staged files are checked in the working tree instead.
 
         Returns:
-            List of filtered file paths
+            List[str]: A list of file paths that are staged for commit.
         """
-        return [f for f in files if any(f.endswith(ext) for ext in extensions)]
+        if self.diff_only:
+            self.load_hunk_index()
+        try:
+            self.snapshot = StagedSnapshot.create()
+        except (OSError, subprocess.SubprocessError):
+            return self.get_staged_files()
+        self.files = self.snapshot.paths
+        return self.files
+
+    def load_hunk_index(self) -> None:
+        """Index the staged hunks so findings outside them can be filtered."""
+        try:
+            self.hunks = HunkIndex.from_staged()
+        except (OSError, subprocess.SubprocessError):
+            self.warnings.append(
+                Finding.notice(
+                    "Warning: Could not read the staged diff; reporting all findings"
+                )
+            )
+            self.hunks = None
+
+    def _release_snapshot(self) -> None:
+        """Delete the staged snapshot, if one was created."""
+        if self.snapshot:
+            self.snapshot.cleanup()
+            self.snapshot = None
 
     def _run_tool(
-        self, command: List[str], tool_name: str
+        self,
+        command: List[str],
+        tool_name: str,
+        result: ToolResult,
+        file_count: int = 0,
+        cwd: Optional[str] = None,
+        install_hint: Optional[str] = None,
+        on_stdout: Optional[Callable[[str], None]] = None,
+        input_kb: int = 0,
     ) -> Optional[subprocess.CompletedProcess]:
         """Run an external tool and handle common errors.
 
+        The tool is killed when its timeout or the gate's time budget runs
+        out, or when fail-fast cancels the run; ``result`` then records why.
+        With a memory governor, the tool first waits until its estimated
+        memory fits in the budget, and its measured peak is recorded in
+        ``result.memory``. When profiling, the tool's wall time, CPU time and
+        peak memory are recorded in ``result.spans``. With ``on_stdout``, the
+        output is consumed while the tool runs instead of being captured.
+
         Args:
             command: Command to run as a list of strings
             tool_name: Name of the tool for error reporting
+            result: Result collecting warnings about the tool invocation
+            file_count: Number of files passed to the tool (for profiling)
+            cwd: Working directory of the tool (default: the gate's workdir)
+            install_hint: How to install the tool, shown when it is missing
+            on_stdout: Receives the tool's stdout chunk by chunk
+            input_kb: Size of the files passed to the tool
 
         Returns:
-            CompletedProcess object or None if the tool is not found
+            CompletedProcess object or None if the tool did not finish
         """
+        lease = None
+        if self.governor:
+            analyzer = self.analyzer(tool_name)
+            memory_mb = analyzer.memory_mb if analyzer else Analyzer.memory_mb
+            lease = self.governor.admit(
+                tool_name,
+                input_kb,
+                int(memory_mb * 1024),
+                lambda: self._interruption(tool_name) is not None,
+            )
+            if lease is None:
+                result.interrupt(f"not started, {self._interruption(tool_name)}")
+                return None
+        on_start = functools.partial(self.governor.track, lease) if lease else None
+        deadline = self._tool_deadline(tool_name)
+        cwd = cwd or self.workdir
         try:
-            return subprocess.run(command, capture_output=True, text=True, check=False)
+            if self.profiler:
+                completed = self.profiler.run_process(
+                    command,
+                    tool_name,
+                    into=result.spans,
+                    cwd=cwd,
+                    deadline=deadline,
+                    cancel=self._cancel,
+                    on_stdout=on_stdout,
+                    on_start=on_start,
+                    files=file_count,
+                    backend="subprocess",
+                )
+            else:
+                completed, _ = run_captured(
+                    command,
+                    cwd,
+                    deadline,
+                    self._cancel,
+                    # Reaped with wait4, for the peak memory of short runs
+                    popen_class=RusagePopen if lease else subprocess.Popen,
+                    on_stdout=on_stdout,
+                    on_start=on_start,
+                )
+        except (subprocess.TimeoutExpired, ToolCancelled):
+            reason = self._interruption(tool_name, deadline)
+            result.interrupt(
+                reason or f"timed out after {self.tool_timeout(tool_name):g}s"
+            )
+            return None
         except FileNotFoundError:
             msg = f"Warning: {tool_name} not found."
-            self.warnings.append(
-                f"{msg} Install with 'pip install {tool_name.lower()}'"
-            )
+            hint = install_hint or f"pip install {tool_name.lower()}"
+            result.add_warning(f"{msg} Install with '{hint}'")
+            result.complete = False
             return None
         except Exception as e:
-            self.warnings.append(f"Warning: {tool_name} failed with error: {str(e)}")
+            result.add_warning(f"Warning: {tool_name} failed with error: {str(e)}")
+            result.complete = False
             return None
-
-    def run_lizard(self, files: List[str]) -> None:
-        """Run Lizard complexity analysis on code files.
-
-        Lizard analyzes code complexity metrics such as:
-        - Cyclomatic complexity (CCN)
-        - Function length
-        - Number of parameters
+        finally:
+            if lease:
+                self.governor.release(lease)
+        if lease:
+            result.memory.append((input_kb, lease.peak_kb))
+        return completed
+
+    def _scan_files(
+        self,
+        tool_result: ToolResult,
+        analyzer: Analyzer,
+        arguments: List[str],
+        files: List[str],
+        key_args: Optional[List[str]],
+        version: Optional[str] = None,
+    ) -> None:
+        """Run an analyzer on the files whose findings are not already cached.
+
+        Cached findings are replayed into ``tool_result``; the remaining files
+        are scanned in a single tool invocation, or one invocation per file for
+        analyzers that are not batchable (in-process when a backend version is
+        given and the backend succeeds, as a subprocess otherwise). The output
+        of analyzers with ``stream_arrays`` is decoded while the tool runs.
+        Their per-file findings are stored in the cache if the run completed
+        cleanly.
+        When the time budget is exhausted or fail-fast cancelled the run, only
+        the findings collected so far are reported. The tool's executable and
+        version come from the tool manifest, and are only looked up when needed.
 
         Args:
-            files: List of file paths to analyze
+            tool_result: Result receiving the findings
+            analyzer: Analyzer being run
+            arguments: Tool arguments without the executable and the file list
+            files: Files to scan
+            key_args: Additional strings identifying the tool configuration,
+                or None to neither use nor fill the cache
+            version: Version of the in-process backend, if one is used
         """
-        # Check if Lizard should be disabled (e.g., for VS Code mode)
-        if os.environ.get("DISABLE_LIZARD") == "1":
-            self.warnings.append(
-                "Lizard skipped: Disabled by DISABLE_LIZARD=1 environment variable"
-            )
+        tool = None
+        in_process = version is not None
+        pending: Dict[str, str] = {}
+        misses = files
+        cache = self.cache if key_args is not None else None
+        if cache:
+            if version is None:
+                tool = analyzer.resolve(self.tools)
+                version = tool.version if tool else None
+            with self._span(
+                tool_result.tool_name, "cache", tool_result.spans, files=len(files)
+            ) as span_args:
+                misses = self._replay_cached(
+                    tool_result,
+                    arguments,
+                    files,
+                    pending,
+                    analyzer.config_files,
+                    key_args,
+                    version,
+                )
+                span_args["hits"] = len(files) - len(misses)
+
+        if not misses:
             return
 
-        code_files = self._filter_files_by_extension(files, self.CODE_EXTENSIONS)
-        if not code_files:
+        reason = self._interruption(tool_result.tool_name)
+        if reason:
+            tool_result.interrupt(f"not started, {reason}")
             return
 
-        cmd = [
-            "lizard",
-            "--warnings_only",
-            "--CCN",
-            "10",  # Maximum cyclomatic complexity
-            "--length",
-            "100",  # Maximum function length
-            "--arguments",
-            "5",  # Maximum number of arguments
-        ] + code_files
-
-        result = self._run_tool(cmd, "Lizard")
-        if result and result.stdout.strip():
-            complexity_issues = result.stdout.strip().split("\n")
-            for issue in complexity_issues:
-                if issue.strip():
-                    self.warnings.append(f"Complexity: {issue.strip()}")
-
-    def _parse_json_output(
-        self, output: str, error_output: str, tool_name: str
-    ) -> Optional[Dict]:
-        """Parse JSON output from a tool.
+        scanned = False
+        if in_process:
+            start = time.monotonic()
+            with self._span(
+                tool_result.tool_name,
+                TOOL_CATEGORY,
+                tool_result.spans,
+                files=len(misses),
+                backend="in-process",
+            ):
+                scanned = analyzer.run_in_process(
+                    misses,
+                    tool_result,
+                    self.workdir,
+                    self._stopper(
+                        tool_result, self._tool_deadline(tool_result.tool_name)
+                    ),
+                )
+            if scanned:
+                self._add_time(tool_result, time.monotonic() - start, misses)
+        if not scanned:
+            tool = tool or analyzer.resolve(self.tools)
+            if in_process and pending:
+                # The command-line tool ran instead of the backend whose
+                # version keyed the lookup: store its findings under its own
+                pending = self._cache_keys(
+                    tool_result,
+                    arguments,
+                    list(pending),
+                    analyzer.config_files,
+                    key_args,
+                    tool.version if tool else None,
+                )
+            # An unresolved tool is run by name, so it is reported as not found
+            command = tool.command if tool else [analyzer.tool]
+            batches = [misses] if analyzer.batchable else [[path] for path in misses]
+            for batch in batches:
+                if batch is not misses:
+                    reason = self._interruption(tool_result.tool_name)
+                    if reason:
+                        tool_result.interrupt(reason)
+                        return
+                stream = (
+                    analyzer.open_stream(tool_result)
+                    if analyzer.stream_arrays
+                    else None
+                )
+                with analyzer.invocation(batch, self.workdir) as (file_args, cwd):
+                    start = time.monotonic()
+                    result = self._run_tool(
+                        command + arguments + file_args,
+                        tool_result.tool_name,
+                        tool_result,
+                        len(batch),
+                        cwd,
+                        analyzer.install_hint,
+                        stream.feed if stream else None,
+                        self._input_kb(batch),
+                    )
+                    self._add_time(tool_result, time.monotonic() - start, batch)
+                    if not result:
+                        return
+                    if stream:
+                        analyzer.close_stream(stream, result, tool_result)
+                    else:
+                        analyzer.parse(result, tool_result)
+
+        if cache and tool_result.complete:
+            for path, key in pending.items():
+                findings = tool_result.file_findings.get(
+                    tool_result.relative_path(path), []
+                )
+                self.cache.put(key, [finding.to_row() for finding in findings])
+
+    def _input_kb(self, files: List[str]) -> int:
+        """Return the total size of some of the run's files in KB."""
+        if self.file_index is None:
+            return 0
+        return sum(self.file_index.size(path) for path in files) // 1024
+
+    def _add_time(
+        self, tool_result: ToolResult, seconds: float, files: List[str]
+    ) -> None:
+        """Record the wall time of one tool invocation on some files."""
+        if self.file_index is not None:
+            sizes = [self.file_index.size(path) for path in files]
+        else:
+            sizes = [0] * len(files)
+        tool_result.add_time(seconds, files, sizes)
+
+    def _replay_cached(
+        self,
+        tool_result: ToolResult,
+        arguments: List[str],
+        files: List[str],
+        pending: Dict[str, str],
+        config_files: Optional[List[str]],
+        key_args: Optional[List[str]],
+        version: Optional[str],
+    ) -> List[str]:
+        """Replay cached findings into ``tool_result`` and list the cache misses.
 
         Args:
-            output: Standard output containing JSON
-            error_output: Standard error output
-            tool_name: Name of the tool for error reporting
+            tool_result: Result receiving the cached findings
+            arguments: Tool arguments without the executable and the file list
+            files: Files to scan
+            pending: Receives the cache key of each missed file that can be cached
+            config_files: Configuration files whose content is part of the key
+            key_args: Additional strings identifying the tool configuration
+            version: Tool version, or None if the tool is not installed
 
         Returns:
-            Parsed JSON as dict or None if parsing failed
+            Files that must be scanned
         """
-        try:
-            return json.loads(output)
-        except json.JSONDecodeError:
-            if error_output:
-                self.warnings.append(f"{tool_name} warning: {error_output}")
+        misses = []
+        keys = self._cache_keys(
+            tool_result, arguments, files, config_files, key_args, version
+        )
+        for path in files:
+            key = keys.get(path)
+            cached = self.cache.get(key) if key else None
+            if cached is None:
+                misses.append(path)
+                if key:
+                    pending[path] = key
+                continue
+            relative = tool_result.relative_path(path)
+            for row in cached:
+                tool_result.add_finding(
+                    Finding.from_row(tool_result.tool_name, relative, row)
+                )
+        return misses
+
+    def _cache_keys(
+        self,
+        tool_result: ToolResult,
+        arguments: List[str],
+        files: List[str],
+        config_files: Optional[List[str]],
+        key_args: Optional[List[str]],
+        version: Optional[str],
+    ) -> Dict[str, str]:
+        """Compute the cache key of each file for one version of a tool.
+
+        Args:
+            tool_result: Result of the tool being run
+            arguments: Tool arguments without the executable and the file list
+            files: Files to scan
+            config_files: Configuration files whose content is part of the key
+            key_args: Additional strings identifying the tool configuration
+            version: Tool version, or None if the tool is not installed
+
+        Returns:
+            Cache key by path, for the files that can be cached
+        """
+        if version is None:
+            return {}
+        key_args = (
+            arguments + self._config_digests(config_files or []) + (key_args or [])
+        )
+        keys = {}
+        for path in files:
+            blob_sha = self._blob_sha(path)
+            if blob_sha is not None:
+                keys[path] = self.cache.key(
+                    blob_sha, path, tool_result.tool_name, version, key_args
+                )
+        return keys
+
+    def _blob_sha(self, path: str) -> Optional[str]:
+        """Return the git blob SHA of the content a tool will scan.
+
+        Args:
+            path: File path relative to the gate's workdir
+
+        Returns:
+            Hex blob SHA, or None if the file cannot be read
+        """
+        if self.snapshot and path in self.snapshot.blob_shas:
+            return self.snapshot.blob_shas[path]
+        return ResultCache.blob_sha(os.path.join(self.workdir or "", path))
+
+    def _config_digests(self, config_files: List[str]) -> List[str]:
+        """Describe the content of tool configuration files for the cache key.
+
+        Args:
+            config_files: Configuration file paths
+
+        Returns:
+            One 'path=blob-sha' entry per configuration file
+        """
+        return [f"{path}={self._blob_sha(path) or 'missing'}" for path in config_files]
+
+    def _in_process_version(self, analyzer: Analyzer) -> Optional[str]:
+        """Return an analyzer's in-process backend version, or None if unavailable.
+
+        In-process execution can be disabled with QUALITY_GATE_IN_PROCESS=0.
+
+        Args:
+            analyzer: Analyzer that may have a library backend
+
+        Returns:
+            Version string, or None to use the subprocess backend
+        """
+        if os.environ.get("QUALITY_GATE_IN_PROCESS") == "0":
             return None
+        return analyzer.in_process_version()
 
-    def run_bandit(self, files: List[str]) -> None:
-        """Run Bandit security analysis on Python files.
+    def analyzer(self, name: str) -> Optional[Analyzer]:
+        """Return the analyzer with the given name, or None if there is none."""
+        return next((item for item in self.analyzers if item.name == name), None)
 
-        Bandit is a security linter designed to find common security issues in Python code.
-        It checks for issues like:
-        - Use of dangerous functions (eval, exec)
-        - Hardcoded passwords
-        - SQL injection vulnerabilities
-        - Shell injection vulnerabilities
+    def _check(self, analyzer: Analyzer, files: List[str]) -> ToolResult:
+        """Run one analyzer on the files it handles.
 
         Args:
+            analyzer: Analyzer to run
             files: List of file paths to analyze
+
+        Returns:
+            ToolResult holding the tool's errors and warnings
         """
-        # Check if Bandit should be disabled
-        if os.environ.get("DISABLE_BANDIT") == "1":
-            self.warnings.append(
-                "Bandit skipped: Disabled by DISABLE_BANDIT=1 environment variable"
+        tool_result = self._new_result(analyzer.name)
+        # Check if the analyzer should be disabled (e.g., for VS Code mode)
+        variable = analyzer.disable_variable
+        if os.environ.get(variable) == "1":
+            tool_result.add_warning(
+                f"{analyzer.name} skipped: "
+                f"Disabled by {variable}=1 environment variable"
             )
-            return
+            return tool_result
+
+        # Run once per commit: leave the analyzer to its own pre-commit hook
+        hook = self.run_plan.runner(analyzer) if self.run_plan else None
+        if hook:
+            self.deferred[analyzer.name] = hook.id
+            return tool_result
+
+        selected = analyzer.select(files, self.file_index)
+        if not selected:
+            return tool_result
+
+        # Optional tools that are not installed are skipped silently
+        if analyzer.optional and not analyzer.resolve(self.tools):
+            return tool_result
+
+        # Two-tier gating: slow analyzers check the commit in the background
+        limit = self.slow_tier.get(analyzer.name) if self.snapshot else None
+        if limit is not None and (not limit or self._input_kb(selected) > limit):
+            self.background[analyzer.name] = selected
+            return tool_result
+
+        plan = analyzer.prepare(selected, self)
+        if plan is None:
+            return tool_result
+        arguments, key_args = plan
+        self._scan_files(
+            tool_result,
+            analyzer,
+            arguments,
+            selected,
+            key_args,
+            self._in_process_version(analyzer),
+        )
 
-        py_files = self._filter_files_by_extension(files, self.PYTHON_EXTENSIONS)
-        if not py_files:
-            return
+        return tool_result
 
-        cmd = ["bandit", "-f", "json"] + py_files
-        result = self._run_tool(cmd, "Bandit")
-        if not result:
-            return
+    def run_analyzer(self, name: str, files: List[str]) -> None:
+        """Run an analyzer and record its findings on the gate.
 
-        bandit_results = self._parse_json_output(result.stdout, result.stderr, "Bandit")
-        if not bandit_results:
-            return
+        Args:
+            name: Analyzer name, e.g. 'Bandit'
+            files: List of file paths to analyze
 
-        for issue in bandit_results.get("results", []):
-            severity = issue.get("issue_severity", "?")
-            issue_text = issue.get("issue_text", "Unknown issue")
-            filename = issue.get("filename", "unknown")
-            line = issue.get("line_number", 0)
+        Raises:
+            KeyError: If no analyzer has that name
+        """
+        analyzer = self.analyzer(name)
+        if analyzer is None:
+            raise KeyError(name)
+        self._merge_result(self._check(analyzer, files))
 
-            if severity == "HIGH":
-                self.errors.append(f"Security: {filename}:{line} - {issue_text}")
-            else:
-                self.warnings.append(f"Security: {filename}:{line} - {issue_text}")
+    def scan_unit(self, name: str, files: List[str]) -> ToolResult:
+        """Run one analyzer on a shard of the repository, for a scan worker.
+
+        Args:
+            name: Analyzer name, e.g. 'Semgrep'
+            files: Repository-relative paths of the shard
+
+        Returns:
+            ToolResult holding the analyzer's findings on the shard
+
+        Raises:
+            KeyError: If no analyzer has that name
+        """
+        analyzer = self.analyzer(name)
+        if analyzer is None:
+            raise KeyError(name)
+        self._reset_results()
+        self.classify_files(files)
+        return self._check(analyzer, files)
+
+    def run_lizard(self, files: List[str]) -> None:
+        """Run Lizard and record its findings on the gate."""
+        self.run_analyzer("Lizard", files)
+
+    def run_bandit(self, files: List[str]) -> None:
+        """Run Bandit and record its findings on the gate."""
+        self.run_analyzer("Bandit", files)
 
     def run_eslint(self, files: List[str]) -> None:
-        """Run ESLint on JavaScript/TypeScript files.
+        """Run ESLint and record its findings on the gate."""
+        self.run_analyzer("ESLint", files)
+
+    def run_semgrep(self, files: List[str]) -> None:
+        """Run Semgrep and record its findings on the gate."""
+        self.run_analyzer("Semgrep", files)
 
-        ESLint is a static code analysis tool for identifying problematic patterns in JavaScript code.
-        It checks for issues like:
-        - Syntax errors
-        - Bad practices
-        - Style inconsistencies
-        - Security vulnerabilities (with security plugin)
+    def _by_cost(self, tasks: List[Tuple[Analyzer, List[str]]]) -> List[int]:
+        """Order analyzer tasks by their estimated cost.
 
         Args:
+            tasks: (analyzer, files) pairs
+
+        Returns:
+            Indexes into ``tasks``, cheapest first
+        """
+        costs = [
+            analyzer.estimated_cost(files, self.workdir, self.file_index)
+            for analyzer, files in tasks
+        ]
+        return sorted(range(len(tasks)), key=lambda index: costs[index])
+
+    def _run_check(self, analyzer: Analyzer, files: List[str]) -> ToolResult:
+        """Run one analyzer, cancelling the others in fail-fast mode if it fails.
+
+        Args:
+            analyzer: Analyzer to run
             files: List of file paths to analyze
+
+        Returns:
+            The analyzer's ToolResult
         """
-        # Check if ESLint should be disabled (e.g., for VS Code mode)
-        if os.environ.get("DISABLE_ESLINT") == "1":
-            self.warnings.append(
-                "ESLint skipped: Disabled by DISABLE_ESLINT=1 environment variable"
-            )
-            return
+        result = self._check(analyzer, files)
+        if self.fail_fast and result.errors:
+            self._cancel.set()
+        if self.reporter:
+            hook = self.deferred.get(analyzer.name)
+            skipped = f"left to the '{hook}' pre-commit hook" if hook else None
+            if analyzer.name in self.background:
+                skipped = "runs in the background after the commit"
+            self.reporter.finished(result, skipped)
+        return result
+
+    def _run_checks(self, files: List[str]) -> List[ToolResult]:
+        """Run every analyzer, concurrently when more than one job is allowed.
+
+        The tools are independent external processes, so a thread pool is
+        enough to overlap them. Analyzers start cheapest first (by their
+        estimated cost for these files), so that with a limited number of jobs
+        or a short time budget the fast tools always report. Analyzers that
+        are not parallel-safe run one at a time once the pool has finished.
+        Results are returned in registration order regardless of start or
+        completion order, keeping output stable.
 
-        js_files = self._filter_files_by_extension(files, self.JAVASCRIPT_EXTENSIONS)
-        if not js_files:
-            return
+        Args:
+            files: List of file paths to analyze
 
-        cmd = ["npx", "eslint", "--format", "json"] + js_files
-        result = self._run_tool(cmd, "ESLint")
-        if not result:
-            return
+        Returns:
+            One ToolResult per analyzer, in registration order
+        """
+        analyzers = self.analyzers
+        order = self._by_cost([(analyzer, files) for analyzer in analyzers])
+        results: List[Optional[ToolResult]] = [None] * len(analyzers)
+        parallel = [index for index in order if analyzers[index].parallel_safe]
+        if self.jobs > 1 and len(parallel) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.jobs, len(parallel))) as pool:
+                futures = {
+                    index: pool.submit(self._run_check, analyzers[index], files)
+                    for index in parallel
+                }
+                try:
+                    for index in parallel:
+                        results[index] = futures[index].result()
+                except BaseException:
+                    # E.g. Ctrl+C: stop the tools still running in the pool
+                    self._cancel.set()
+                    raise
+
+        for index in order:
+            if results[index] is None:
+                results[index] = self._run_check(analyzers[index], files)
+        return results
+
+    def _plan_shards(self, files: List[str], shard_count: int) -> List[List[str]]:
+        """Split files into shards of similar total size.
+
+        Files are assigned largest first to the currently lightest shard
+        (longest-processing-time scheduling). A shard stops accepting files
+        once its arguments would exceed SHARD_ARG_BUDGET, so no single tool
+        invocation can hit the operating system's argument length limit.
 
-        lint_results = self._parse_json_output(result.stdout, result.stderr, "ESLint")
-        if not lint_results:
-            # Special handling for ESLint stderr
-            if result.stderr and "Error:" in result.stderr:
-                self.warnings.append(f"ESLint warning: {result.stderr}")
-            return
+        Args:
+            files: Files to distribute
+            shard_count: Number of shards to start with
+
+        Returns:
+            Non-empty shards, each sorted by path
+        """
+        sized = []
+        for path in files:
+            if self.file_index is not None and path in self.file_index.files:
+                sized.append((self.file_index.size(path), path))
+                continue
+            try:
+                sized.append((os.path.getsize(path), path))
+            except OSError:
+                sized.append((0, path))
+        sized.sort(key=lambda item: (-item[0], item[1]))
+
+        shards: List[List[str]] = [[] for _ in range(max(1, shard_count))]
+        arg_bytes = [0] * len(shards)
+        heap = [(0, index) for index in range(len(shards))]
+        for size, path in sized:
+            cost = len(path.encode("utf-8", "surrogateescape")) + 1
+            # Drop shards from the heap once they cannot take this argument
+            while heap and arg_bytes[heap[0][1]] + cost > self.SHARD_ARG_BUDGET:
+                heapq.heappop(heap)
+            if heap:
+                load, index = heapq.heappop(heap)
+            else:
+                load, index = 0, len(shards)
+                shards.append([])
+                arg_bytes.append(0)
+            shards[index].append(path)
+            arg_bytes[index] += cost
+            heapq.heappush(heap, (load + size, index))
+
+        return [sorted(shard) for shard in shards if shard]
+
+    def _run_sharded_checks(self, files: List[str], workers: int) -> List[ToolResult]:
+        """Run every analyzer over file shards in a process pool.
+
+        Each (analyzer, shard) pair is an independent task; cheaper tasks are
+        queued first. Tasks of analyzers that are not parallel-safe run one
+        at a time in this process once the pool has finished. Results are
+        collected as tasks complete and then ordered by analyzer and shard, so
+        the merged output does not depend on scheduling. In fail-fast mode,
+        the first task reporting an error cancels the other tasks, through an
+        event shared with the workers. The workers also share the memory
+        governor, so tasks wait for each other when memory runs short.
 
-        for file_result in lint_results:
-            filename = file_result.get("filePath", "unknown")
-            for message in file_result.get("messages", []):
-                severity = message.get("severity", 0)
-                msg = message.get("message", "Unknown issue")
-                line = message.get("line", 0)
+        Args:
+            files: Files to analyze
+            workers: Number of worker processes
 
-                # ESLint severity: 1=warning, 2=error
-                if severity >= 2:  # Error
-                    self.errors.append(f"ESLint: {filename}:{line} - {msg}")
-                else:  # Warning
-                    self.warnings.append(f"ESLint: {filename}:{line} - {msg}")
+        Returns:
+            ToolResults ordered by analyzer (in registration order), then by shard
+        """
+        shards = self._plan_shards(files, workers)
+        if self.reporter:
+            self.reporter.start(
+                {analyzer.name: len(shards) for analyzer in self.analyzers}, len(files)
+            )
+        indexes = {
+            id(shard): self.file_index.subset(shard) if self.file_index else None
+            for shard in shards
+        }
+        tasks = [(analyzer, shard) for analyzer in self.analyzers for shard in shards]
+        order = self._by_cost(tasks)
+        results: List[Optional[ToolResult]] = [None] * len(tasks)
+
+        cancel = multiprocessing.Event()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_shard_worker,
+            initargs=(cancel, self.governor),
+        ) as pool:
+            futures = {
+                pool.submit(
+                    _run_shard_check,
+                    self,
+                    tasks[index][0].name,
+                    tasks[index][1],
+                    indexes[id(tasks[index][1])],
+                ): index
+                for index in order
+                if tasks[index][0].parallel_safe
+            }
+            for future in as_completed(futures):
+                if future.cancelled():
+                    name = tasks[futures[future]][0].name
+                    self.interrupted.setdefault(
+                        name,
+                        "cancelled after another tool reported an error (fail-fast)",
+                    )
+                    if self.reporter:
+                        skipped = ToolResult(name)
+                        skipped.interrupt(self.interrupted[name])
+                        self.reporter.finished(skipped)
+                    continue
+                result = future.result()
+                results[futures[future]] = result
+                if self.reporter:
+                    self.reporter.finished(result)
+                if self.fail_fast and result.errors:
+                    cancel.set()
+                    for pending in futures:
+                        pending.cancel()
+
+        if cancel.is_set():
+            self._cancel.set()
+        for index in order:
+            if not tasks[index][0].parallel_safe:
+                results[index] = self._run_check(*tasks[index])
+
+        return [result for result in results if result is not None]
+
+    def _run_distributed_checks(
+        self, files: List[str], coordinator: Any
+    ) -> List[ToolResult]:
+        """Run every analyzer over file shards on remote scan workers.
+
+        Each (analyzer, shard) pair is a work unit served by the coordinator.
+        Analyzers that are not parallel-safe run one shard at a time in this
+        process, and disabled analyzers are reported here once, since worker
+        hosts may be configured differently.
 
-    def run_semgrep(self, files: List[str]) -> None:
-        """Run Semgrep security scanner on code files.
+        Args:
+            files: Files to analyze
+            coordinator: ScanCoordinator serving the units to workers
 
-        Semgrep is a lightweight static analysis tool for finding bugs, security vulnerabilities,
-        and enforcing code standards. It works across many languages and can detect complex patterns.
+        Returns:
+            ToolResults ordered by analyzer (in registration order), then by shard
+        """
+        shards = self._plan_shards(files, coordinator.shards)
+        results: List[ToolResult] = []
+        remote: List[Tuple[str, List[str]]] = []
+        slots: List[int] = []
+        for analyzer in self.analyzers:
+            if os.environ.get(analyzer.disable_variable) == "1":
+                results.append(self._check(analyzer, files))
+                continue
+            for shard in shards:
+                if analyzer.parallel_safe:
+                    slots.append(len(results))
+                    remote.append((analyzer.name, shard))
+                    results.append(self._new_result(analyzer.name))
+                else:
+                    results.append(self._run_check(analyzer, shard))
+
+        for slot, result in zip(slots, coordinator.run(remote)):
+            results[slot] = result
+        return results
+
+    def classify_files(self, files: List[str]) -> List[str]:
+        """Classify the run's files once, for every analyzer to pick from.
 
         Args:
-            files: List of file paths to analyze
+            files: Files of the run
+
+        Returns:
+            The files that are analyzed (not generated, vendored, minified or
+            oversize)
         """
-        # Check if Semgrep should be disabled
-        if os.environ.get("DISABLE_SEMGREP") == "1":
-            self.warnings.append(
-                "Semgrep skipped: Disabled by DISABLE_SEMGREP=1 environment variable"
+        sniff = frozenset().union(*(analyzer.extensions for analyzer in self.analyzers))
+        with self._span("classify files", files=len(files)):
+            self.file_index = FileIndex.build(
+                files, self.workdir, sniff, cached=self.snapshot is not None
             )
-            return
+        return self.file_index.included()
 
-        if not files:
-            return
+    def run_full_scan(
+        self,
+        workers: Optional[int] = None,
+        coordinator: Optional[Any] = None,
+    ) -> Tuple[bool, List[str]]:
+        """Check every tracked file in the repository using all CPU cores.
 
-        # Filter files by common source code extensions
-        filtered_files = self._filter_files_by_extension(files, self.CODE_EXTENSIONS)
-        if not filtered_files:
-            return
+        The file list is read from git directly rather than passed on the
+        command line, split into size-balanced shards and analyzed by a pool
+        of worker processes, or by the scan workers of a coordinator.
 
-        cmd = ["semgrep", "--config", "auto", "--json", "--error"] + filtered_files
-        result = self._run_tool(cmd, "Semgrep")
-        if not result:
-            return
+        Args:
+            workers: Number of worker processes (default: CPU count)
+            coordinator: ScanCoordinator serving the shards to scan workers
+                instead of the local process pool
 
-        semgrep_results = self._parse_json_output(
-            result.stdout, result.stderr, "Semgrep"
-        )
-        if not semgrep_results:
-            return
+        Returns:
+            Tuple containing:
+                - Boolean indicating success (True) or failure (False)
+                - List of message strings to display to the user
+        """
+        self._reset_results()
+        with self._span("discover files") as span_args:
+            files = self.get_tracked_files()
+            span_args["files"] = len(files)
+        if not files:
+            if self.errors:
+                return False, self._format_output_messages()
+            return True, ["No files to check"]
+        files = self.classify_files(files)
 
-        for issue in semgrep_results.get("results", []):
-            # Extract issue details with safe nested access
-            extra = issue.get("extra", {})
-            severity = extra.get("severity", "medium")
-            message = extra.get("message", "Unknown issue")
-            path = issue.get("path", "unknown")
-            start = issue.get("start", {})
-            line = start.get("line", 0)
-
-            # High severity issues are errors, others are warnings
-            if severity == "ERROR" or severity == "HIGH":
-                self.errors.append(f"Semgrep: {path}:{line} - {message}")
+        workers = max(1, workers or os.cpu_count() or 1)
+        with self._span("run checks", files=len(files), workers=workers):
+            if coordinator is not None:
+                tool_results = self._run_distributed_checks(files, coordinator)
             else:
-                self.warnings.append(f"Semgrep: {path}:{line} - {message}")
+                tool_results = self._run_sharded_checks(files, workers)
+            for tool_result in tool_results:
+                self._merge_result(tool_result)
+        if self.cache:
+            self.cache.prune()
+        if self.governor:
+            self.governor.record(self.memory)
+
+        with self._span("format output"):
+            messages = self._format_output_messages()
+        return len(self.errors) == 0, messages
 
     def run_all_checks(
-        self, specified_files: Optional[List[str]] = None
+        self,
+        specified_files: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        snapshot: Optional[StagedSnapshot] = None,
     ) -> Tuple[bool, List[str]]:
         """Run all quality checks and return status and messages.
 
@@ -322,42 +1356,114 @@ class QualityGate:
 
         Args:
             specified_files: Optional list of specific files to check. If not provided,
-                             staged files from git will be used.
+                             the staged content of the changed files is checked.
+            since: Check the files changed since the branch forked from this
+                   ref instead of the staged files (e.g. 'origin/main' in CI).
+            snapshot: Check this snapshot of earlier staged content instead of
+                      the staged files; it is removed afterwards.
 
         Returns:
             Tuple containing:
                 - Boolean indicating success (True) or failure (False)
                 - List of message strings to display to the user
         """
+        # Clear previous results
+        self._reset_results()
+
         # Determine which files to check
-        if specified_files:
-            files = specified_files
-            self.files = files
-        else:
-            files = self.get_staged_files()
+        with self._span("discover files") as span_args:
+            if specified_files:
+                files = specified_files
+                self.files = files
+            elif since:
+                files = self.get_changed_files(since)
+            elif snapshot:
+                self.snapshot = snapshot
+                files = list(snapshot.paths)
+                self.files = files
+            else:
+                files = self.load_staged_snapshot()
+            span_args["files"] = len(files)
 
         if not files:
+            self._release_snapshot()
+            if self.errors:
+                return False, self._format_output_messages()
             return True, ["No files to check"]
+        files = self.classify_files(files)
+        if self.reporter:
+            self.reporter.start(
+                {analyzer.name: 1 for analyzer in self.analyzers}, len(files)
+            )
 
-        # Clear previous results
-        self.errors = []
-        self.warnings = []
-
-        # Run various checks
-        self.run_lizard(files)
-        self.run_bandit(files)
-        self.run_eslint(files)
-        self.run_semgrep(files)
+        # Run the checks (in parallel if configured) and merge in a stable order
+        try:
+            with self._span("run checks", files=len(files), jobs=self.jobs):
+                results = self._run_checks(files)
+                for tool_result in results:
+                    self._merge_result(tool_result)
+            if self.run_plan and self.snapshot and self.git_dir:
+                self._publish(results)
+            if self.background and not self.errors:
+                self._queue_background()
+        finally:
+            self._release_snapshot()
+        if self.cache:
+            self.cache.prune()
+        if self.governor:
+            self.governor.record(self.memory)
 
         # Format the output messages
-        messages = self._format_output_messages()
+        with self._span("format output"):
+            messages = self._format_output_messages()
 
         # Return status (True if no errors, False otherwise)
         return len(self.errors) == 0, messages
 
+    def _publish(self, results: List[ToolResult]) -> None:
+        """Publish the findings of the staged run for the reuse hooks.
+
+        Args:
+            results: One ToolResult per analyzer, in registration order
+        """
+        ran = [
+            (analyzer, result)
+            for analyzer, result in zip(self.analyzers, results)
+            if analyzer.name not in self.deferred
+        ]
+        publish_results(
+            results_path(self.git_dir),
+            [analyzer for analyzer, _ in ran],
+            [result for _, result in ran],
+            {path: self.snapshot.blob_shas[path] for path in self.snapshot.paths},
+            list(self.background),
+        )
+
+    def _queue_background(self) -> None:
+        """Queue the deferred slow analyzers and start the background worker.
+
+        The job records the blob SHAs of the snapshot, so the worker checks
+        exactly the content being committed, whatever happens to the index
+        and working tree meanwhile.
+        """
+        checks = BackgroundChecks.for_repository(self.git_dir)
+        if checks is None:
+            return
+        names = [item.name for item in self.analyzers if item.name in self.background]
+        try:
+            checks.enqueue(names, self.snapshot.paths, self.snapshot.blob_shas)
+            checks.start_worker()
+        except OSError as e:
+            self.warnings.append(
+                Finding.notice(f"Warning: Could not start the background checks: {e}")
+            )
+
     def _format_output_messages(self) -> List[str]:
         """Format validation results into human-readable messages.
 
+        Findings are rendered to text only here. Messages about the run itself
+        come first, followed by the findings grouped by file in line order.
+
         Returns:
             List of formatted message strings
         """
@@ -366,52 +1472,473 @@ class QualityGate:
         # Add errors with emoji and formatting
         if self.errors:
             messages.append("\n🚫 ERRORS:")
-            for error in self.errors:
-                messages.append(f"  - {error}")
+            for error in sorted(self.errors, key=_report_order):
+                messages.append(f"  - {error.render()}")
 
         # Add warnings with emoji and formatting
         if self.warnings:
             messages.append("\n⚠️ WARNINGS:")
-            for warning in self.warnings:
-                messages.append(f"  - {warning}")
+            for warning in sorted(self.warnings, key=_report_order):
+                messages.append(f"  - {warning.render()}")
 
         # Success message if no issues found
         if not self.errors and not self.warnings:
-            messages.append("\n✅ All quality checks passed!")
+            if self.interrupted:
+                messages.append("\n✅ No issues found by the checks that completed.")
+            else:
+                messages.append("\n✅ All quality checks passed!")
+
+        if self.interrupted:
+            messages.append("\n⏱️ INCOMPLETE CHECKS (their findings may be missing):")
+            for tool, reason in sorted(self.interrupted.items()):
+                messages.append(f"  - {tool}: {reason}")
+
+        if self.change_range:
+            line = (
+                f"\nℹ️ Checked {len(self.files)} file(s) changed since "
+                f"{self.change_range.ref} (merge-base {self.change_range.base[:12]})"
+            )
+            if self.change_range.deleted:
+                line += f"; {len(self.change_range.deleted)} deleted file(s) skipped"
+            messages.append(line + ".")
+
+        if self.deferred:
+            hooks = ", ".join(
+                f"{name} ('{hook}' hook)"
+                for name, hook in sorted(self.deferred.items())
+            )
+            messages.append(f"\nℹ️ Left to their own pre-commit hooks: {hooks}.")
+
+        if self.background:
+            names = ", ".join(
+                item.name for item in self.analyzers if item.name in self.background
+            )
+            if self.errors:
+                messages.append(
+                    f"\nℹ️ Slow checks ({names}) run in the background once the "
+                    "fast checks pass."
+                )
+            else:
+                messages.append(
+                    f"\nℹ️ {names} will check this commit in the background; the "
+                    "next commit shows the results and pushing waits for them."
+                )
+
+        if self.suppressed:
+            scope = (
+                f"changes since {self.change_range.ref}"
+                if self.change_range
+                else "staged changes"
+            )
+            messages.append(
+                f"\nℹ️ {self.suppressed} finding(s) outside the {scope} "
+                "were not reported (diff-only mode)."
+            )
+
+        exclusions = self.file_index.exclusions() if self.file_index else {}
+        if exclusions:
+            counts = ", ".join(
+                f"{count} {reason}" for reason, count in sorted(exclusions.items())
+            )
+            messages.append(f"\nℹ️ Not analyzed: {counts} file(s).")
+
+        if self.duplicates:
+            messages.append(
+                f"\nℹ️ {self.duplicates} duplicate finding(s) reported at the same "
+                "location were merged."
+            )
+
+        if self.governor and self.governor.waits:
+            messages.append(
+                f"\nℹ️ {self.governor.waits} tool run(s) waited "
+                f"{self.governor.waited:.1f}s in total to stay within the memory "
+                f"budget of {self.governor.budget_kb // 1024} MB."
+            )
 
         return messages
 
 
-def main() -> None:
-    """Main entry point for the quality gate script.
+def _env_seconds(name: str, default: float) -> float:
+    """Read a duration in seconds from the environment, or return the default."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
 
-    This function handles command-line execution of the quality gate.
-    It processes command-line arguments, runs the quality checks,
-    and displays the results to the user.
+
+def _report_order(finding: Finding) -> Tuple[bool, str, int]:
+    """Sort key placing run messages first, then findings by file and line."""
+    return (finding.path is not None, finding.path or "", finding.line or 0)
+
+
+def _init_shard_worker(cancel: Any, governor: Optional[MemoryGovernor]) -> None:
+    """Remember the scan's shared state in a new worker process.
+
+    Args:
+        cancel: multiprocessing.Event set when the scan is cancelled
+        governor: Memory governor of the scan, or None
+    """
+    global _worker_cancel, _worker_governor
+    _worker_cancel = cancel
+    _worker_governor = governor
+
+
+def _run_shard_check(
+    gate: QualityGate,
+    analyzer_name: str,
+    files: List[str],
+    index: Optional[FileIndex] = None,
+) -> ToolResult:
+    """Run one analyzer on one shard inside a worker process.
+
+    Args:
+        gate: QualityGate configuration (pickled into the worker)
+        analyzer_name: Name of the analyzer to run
+        files: Files in the shard
+        index: Classification of the shard's files
 
     Returns:
-        None. Exits with status code 0 for success, 1 for failure.
+        ToolResult for the shard
     """
-    print("\n🔍 Running Code Quality Gate...")
-    gate = QualityGate()
+    if _worker_cancel is not None:
+        gate._cancel = _worker_cancel
+    gate.governor = _worker_governor
+    gate.file_index = index
+    return gate._check(gate.analyzer(analyzer_name), files)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the command-line parser shared by the script and the daemon.
+
+    Returns:
+        ArgumentParser for the quality gate options
+    """
+    parser = argparse.ArgumentParser(description="Pre-Commitator quality gate")
+    parser.add_argument("files", nargs="*", help="Files to check (default: staged)")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of tools to run concurrently (1 runs them sequentially)",
+    )
+    parser.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        help="Check all tracked files, sharded across worker processes",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Check the files changed since the current branch forked from REF "
+        "(e.g. origin/main in a merge request pipeline)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Scan every file even if its findings are cached",
+    )
+    parser.add_argument(
+        "--diff-only",
+        action="store_true",
+        default=None,
+        help="Report only findings that overlap staged changes (or, with "
+        "--since, the branch's changes)",
+    )
+    parser.add_argument(
+        "--refresh-semgrep-rules",
+        action="store_true",
+        help="Download and pin the Semgrep rule packs used for offline scans",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time, CPU and peak memory of each tool and phase",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        metavar="FILE",
+        help="Write a Chrome trace-event timeline of the run (implies --profile)",
+    )
+    parser.add_argument(
+        "--list-tools",
+        action="store_true",
+        help="Show the resolved path and version of each analyzer and exit",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="Stop the checks after this many seconds, reporting partial results "
+        "(0 = no limit; default: QUALITY_GATE_BUDGET or 300)",
+    )
+    parser.add_argument(
+        "--memory-mb",
+        type=float,
+        metavar="MB",
+        default=None,
+        help="Memory the tools running at once may use; more tools wait (0 = no "
+        "limit; default: QUALITY_GATE_MEMORY_MB or 3/4 of the available memory)",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        default=None,
+        help="Cancel the remaining tools as soon as one reports an error",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        default=None,
+        help="Print each tool's findings as soon as it finishes (default: on "
+        "in a terminal, or QUALITY_GATE_PROGRESS)",
+    )
+    parser.add_argument(
+        "--no-progress",
+        dest="progress",
+        action="store_false",
+        default=None,
+        help="Print only the final report",
+    )
+    parser.add_argument(
+        "--defer-slow",
+        action="store_true",
+        default=None,
+        help="Check staged files with the fast analyzers only and run the slow "
+        "ones in the background after the commit (default: "
+        "QUALITY_GATE_DEFER_SLOW)",
+    )
+    parser.add_argument(
+        "--run-plan",
+        action="store_true",
+        default=None,
+        help="Follow the pre-commit config: skip analyzers that a standalone hook "
+        "runs, and publish the findings for the hooks that reuse them",
+    )
+    return parser
+
+
+def run(
+    args: argparse.Namespace,
+    emit: Callable[[str], None] = print,
+    git_dir: Optional[str] = None,
+    tools: Optional[ToolResolver] = None,
+    cache: Optional[ResultCache] = None,
+    semgrep_rules: Optional[SemgrepRuleStore] = None,
+) -> int:
+    """Run the quality gate for parsed command-line arguments.
+
+    Args:
+        args: Arguments parsed by ``build_parser()``
+        emit: Callable receiving each output line
+        git_dir: Git directory, if already known (saves a git invocation)
+        tools: Tool resolver to reuse instead of loading the manifest
+        cache: Result cache to reuse, if caching is enabled
+        semgrep_rules: Semgrep rule store to reuse instead of reading its index
+
+    Returns:
+        Exit status: 0 for success, 1 for failure
+    """
+    if args.refresh_semgrep_rules:
+        store = semgrep_rules or SemgrepRuleStore.default(git_dir)
+        if not store:
+            emit("Error: Not a git repository; set QUALITY_GATE_SEMGREP_RULES")
+            return 1
+        emit(f"\n📥 Refreshing Semgrep rule packs in {store.directory}...")
+        for line in store.refresh():
+            emit(f"  - {line}")
+        return 0 if store.is_available() else 1
+
+    if args.list_tools:
+        resolver = tools or ToolResolver.for_repository(git_dir or git_common_dir())
+        for message in load_plugins():
+            emit(message)
+        emit("\n🧰 Analyzers:")
+        for analyzer in create_analyzers():
+            name = analyzer.name
+            tool = analyzer.resolve(resolver)
+            if tool is None:
+                emit(f"  - {name}: not found")
+                continue
+            version = tool.version.splitlines()[0] if tool.version else "unknown"
+            emit(f"  - {name}: {' '.join(tool.command)} ({version})")
+        return 0
+
+    if args.since and (args.all or args.files):
+        emit("Error: --since cannot be combined with --all or file arguments")
+        return 1
+
+    emit("\n🔍 Running Code Quality Gate...")
+    started, start = time.time(), time.monotonic()
+    run_plan = None
+    if args.run_plan is None:
+        args.run_plan = os.environ.get("QUALITY_GATE_RUN_PLAN") == "1"
+    if args.run_plan and not (args.all or args.files or args.since):
+        try:
+            run_plan = RunPlan.load()
+        except (OSError, ValueError) as e:
+            emit(f"Warning: No run plan ({e}); running every analyzer")
+    if args.defer_slow is None:
+        args.defer_slow = os.environ.get("QUALITY_GATE_DEFER_SLOW") == "1"
+    defer_slow = args.defer_slow and not (args.all or args.files or args.since)
+    gate = QualityGate(
+        jobs=args.jobs,
+        use_cache=not args.no_cache,
+        diff_only=args.diff_only,
+        git_dir=git_dir,
+        profile=args.profile or bool(args.profile_trace),
+        budget=args.budget,
+        fail_fast=args.fail_fast,
+        run_plan=run_plan,
+        memory_mb=args.memory_mb,
+        defer_slow=defer_slow,
+        tools=tools,
+        cache=cache,
+        semgrep_rules=semgrep_rules,
+    )
+    if _progress_enabled(args, emit):
+        gate.reporter = ProgressReporter(emit)
+    checks = BackgroundChecks.for_repository(gate.git_dir) if defer_slow else None
+    if checks:
+        for line in checks.show_news():
+            emit(line)
 
     # Process command-line arguments
-    specified_files = sys.argv[1:] if len(sys.argv) > 1 else None
+    specified_files = args.files or None
 
     # Run all quality checks
-    success, messages = gate.run_all_checks(specified_files)
+    if args.all:
+        success, messages = gate.run_full_scan(workers=args.jobs)
+    else:
+        success, messages = gate.run_all_checks(specified_files, since=args.since)
 
     # Display results
     for message in messages:
-        print(message)
-
-    # Exit with appropriate status code and message
+        emit(message)
+
+    if gate.profiler:
+        for line in gate.profiler.summary():
+            emit(line)
+        if args.profile_trace:
+            try:
+                gate.profiler.write_trace(args.profile_trace)
+                emit(f"Trace written to {args.profile_trace}")
+            except OSError as e:
+                emit(f"Warning: Could not write the profile trace: {e}")
+
+    if history_enabled():
+        _record_run(gate, args, success, started, time.monotonic() - start, emit)
+
+    # Report the final status
     if not success:
-        print("\n❌ Quality gate failed! Please fix the errors above.")
-        sys.exit(1)
+        emit("\n❌ Quality gate failed! Please fix the errors above.")
+        return 1
+    emit("\n✅ Quality gate passed!")
+    return 0
+
+
+def _progress_enabled(args: argparse.Namespace, emit: Callable[[str], None]) -> bool:
+    """Whether to print progress while the tools run.
+
+    Defaults to QUALITY_GATE_PROGRESS, or to whether the output is a terminal.
+    """
+    if args.progress is not None:
+        return args.progress
+    variable = os.environ.get("QUALITY_GATE_PROGRESS")
+    if variable in ("0", "1"):
+        return variable == "1"
+    return emit is print and sys.stdout.isatty()
+
+
+def _record_run(
+    gate: QualityGate,
+    args: argparse.Namespace,
+    success: bool,
+    started: float,
+    seconds: float,
+    emit: Callable[[str], None],
+) -> None:
+    """Add a finished run to the repository's run history.
+
+    Args:
+        gate: QualityGate after the run
+        args: Arguments of the run
+        success: Whether the gate passed
+        started: Wall-clock time the run started
+        seconds: Duration of the run
+        emit: Callable receiving a warning if the history cannot be written
+    """
+    history = RunHistory.for_repository(gate.git_dir)
+    if history is None:
+        return
+    if args.all:
+        mode = "all"
+    elif args.since:
+        mode = "since"
+    elif args.files:
+        mode = "files"
     else:
-        print("\n✅ Quality gate passed!")
-        sys.exit(0)
+        mode = "staged"
+    try:
+        history.record(gate, mode, 0 if success else 1, started, seconds)
+    except (OSError, sqlite3.Error) as e:
+        emit(f"Warning: Could not record the run history: {e}")
+
+
+def main() -> None:
+    """Main entry point for the quality gate script.
+
+    This function handles command-line execution of the quality gate.
+    It processes command-line arguments, runs the quality checks,
+    and displays the results to the user. ``quality_gate.py daemon``
+    starts the background server used by the pre-commit hook client,
+    ``quality_gate.py watch`` pre-scans files as they are saved,
+    ``quality_gate.py hook <analyzer>`` replays published findings inside a
+    pre-commit hook, ``quality_gate.py plan`` shows the run plan,
+    ``quality_gate.py report`` summarizes the recorded run history,
+    ``quality_gate.py coordinate`` / ``quality_gate.py work`` split a full
+    scan across worker processes or hosts, and ``quality_gate.py background``
+    runs or reports the slow analyzers deferred to the background.
+
+    Returns:
+        None. Exits with status code 0 for success, 1 for failure.
+    """
+    if sys.argv[1:2] == ["daemon"]:
+        import gate_daemon
+
+        sys.exit(gate_daemon.serve_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["watch"]:
+        import gate_watcher
+
+        sys.exit(gate_watcher.watch_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["hook"]:
+        import run_plan
+
+        sys.exit(run_plan.hook_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["plan"]:
+        import run_plan
+
+        sys.exit(run_plan.plan_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["report"]:
+        import run_history
+
+        sys.exit(run_history.report_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["coordinate"]:
+        import scan_coordinator
+
+        sys.exit(scan_coordinator.coordinate_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["work"]:
+        import scan_coordinator
+
+        sys.exit(scan_coordinator.work_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["background"]:
+        import background_checks
+
+        sys.exit(background_checks.background_main(sys.argv[2:]))
+
+    sys.exit(run(build_parser().parse_args()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Persistent, content-addressed cache of quality gate findings.
+
+Findings are stored per file under the repository's git directory, keyed by
+the file's git blob SHA, its path, the tool name, the tool version and the
+exact tool arguments. A file whose content was already scanned with the same
+tool configuration (for example in an aborted commit attempt, or before a
+rebase or amend) is replayed from the cache instead of being scanned again.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from typing import List, Optional
+
+
+class ResultCache:
+    """On-disk LRU cache of per-file tool findings.
+
+    Each entry is a small JSON file inside a two-level fan-out directory.
+    Reading an entry refreshes its modification time, and ``prune`` evicts
+    the least recently used entries once the cache exceeds its size budget.
+
+    Attributes:
+        directory (str): Directory holding the cache entries.
+        max_bytes (int): Size budget for all entries together.
+    """
+
+    DEFAULT_MAX_MB = 50
+    # Bumped whenever the layout of cached entries changes
+    FORMAT_VERSION = "3"
+    CACHE_DIRNAME = "quality-gate-cache"
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        """Initialize the cache rooted at the given directory.
+
+        Args:
+            directory: Directory that holds the cache entries
+            max_bytes: Size budget in bytes. Defaults to the
+                       QUALITY_GATE_CACHE_MAX_MB environment variable.
+        """
+        self.directory = directory
+        if max_bytes is None:
+            max_bytes = self.configured_max_bytes()
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def configured_max_bytes(cls) -> int:
+        """Size budget set by the QUALITY_GATE_CACHE_MAX_MB environment variable."""
+        env_mb = os.environ.get("QUALITY_GATE_CACHE_MAX_MB", "")
+        max_mb = int(env_mb) if env_mb.isdigit() else cls.DEFAULT_MAX_MB
+        return max_mb * 1024 * 1024
+
+    @classmethod
+    def for_repository(cls, git_dir: Optional[str] = None) -> Optional["ResultCache"]:
+        """Create a cache inside the current repository's git directory.
+
+        Args:
+            git_dir: Git directory, if already known
+
+        Returns:
+            ResultCache instance, or None when not inside a git repository
+        """
+        git_dir = git_dir or git_common_dir()
+        if not git_dir:
+            return None
+        return cls(os.path.join(git_dir, cls.CACHE_DIRNAME))
+
+    @staticmethod
+    def blob_sha(path: str) -> Optional[str]:
+        """Compute the git blob SHA of a file's current content.
+
+        This matches ``git hash-object`` for files without clean filters and
+        avoids spawning git once per file.
+
+        Args:
+            path: Path of the file to hash
+
+        Returns:
+            Hex SHA-1 of the blob, or None if the file cannot be read
+        """
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+        except OSError:
+            return None
+        header = f"blob {len(data)}\0".encode()
+        return hashlib.sha1(header + data, usedforsecurity=False).hexdigest()
+
+    def key(
+        self, blob_sha: str, path: str, tool_name: str, version: str, args: List[str]
+    ) -> str:
+        """Build the cache key for one file scanned by one tool configuration.
+
+        Args:
+            blob_sha: Git blob SHA of the file content
+            path: Repository path of the file (findings embed it)
+            tool_name: Name of the tool
+            version: Tool version string
+            args: Exact tool arguments, excluding the file list
+
+        Returns:
+            Hex digest identifying the cache entry
+        """
+        return self._hash(
+            [self.FORMAT_VERSION, blob_sha, path, tool_name, version] + args
+        )
+
+    def get(self, key: str) -> Optional[List[List]]:
+        """Look up cached findings and mark the entry as recently used.
+
+        Args:
+            key: Cache key from ``key()``
+
+        Returns:
+            List of [line, end_line, rule, severity, message] rows, or None on
+            a miss
+        """
+        path = self._entry_path(key)
+        entry = self._read_json(path)
+        if not isinstance(entry, dict) or not isinstance(entry.get("findings"), list):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["findings"]
+
+    def put(self, key: str, findings: List[List]) -> None:
+        """Store the findings for one cache key.
+
+        Args:
+            key: Cache key from ``key()``
+            findings: [line, end_line, rule, severity, message] rows for the file
+        """
+        self._write_json(self._entry_path(key), {"findings": findings})
+
+    def prune(self) -> None:
+        """Evict least recently used entries until the cache fits its budget."""
+        entries = []
+        total = 0
+        try:
+            shards = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _entry_path(self, key: str) -> str:
+        """Return the on-disk path of a cache entry."""
+        return os.path.join(self.directory, key[-2:], key + ".json")
+
+    @staticmethod
+    def _hash(parts: List[str]) -> str:
+        """Hash a list of strings into a stable hex digest."""
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[object]:
+        """Read a JSON file, treating unreadable or corrupt files as missing."""
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path: str, data: object) -> None:
+        """Atomically write a JSON file, ignoring failures (the cache is optional)."""
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+def git_common_dir() -> Optional[str]:
+    """Locate the git directory shared by all worktrees of the current repository.
+
+    Returns:
+        Absolute path of the git directory, or None outside a repository
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--git-common-dir"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return os.path.abspath(result.stdout.strip())
@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+Local history of quality gate runs, for spotting performance trends.
+
+Each run is otherwise fire-and-forget: nothing tells that Semgrep got three
+times slower after a rules update, or that twenty files account for half of
+Lizard's time. With ``QUALITY_GATE_HISTORY=1``, every run is recorded in a
+SQLite database under the repository's git directory: the files checked, each
+tool's wall time and findings counts, the time attributed to each file, the
+findings themselves and the exit status. A run is written in one transaction
+with batched inserts, and only the most recent runs are kept.
+
+``quality_gate.py report`` queries the history for the slowest tools and
+files, the commit latency over time and the churn of findings between runs.
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from result_cache import git_common_dir
+
+HISTORY_FILENAME = "quality-gate-history.sqlite"
+
+# Runs kept in the history, overridable with QUALITY_GATE_HISTORY_MAX_RUNS
+DEFAULT_MAX_RUNS = 500
+
+# Bumped whenever the schema changes; older histories are started afresh
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    mode TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    status INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    warnings INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tool_runs (
+    run_id INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    errors INTEGER NOT NULL,
+    warnings INTEGER NOT NULL,
+    interrupted TEXT
+);
+CREATE TABLE IF NOT EXISTS paths (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS run_files (
+    run_id INTEGER NOT NULL,
+    path_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_costs (
+    run_id INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    path_id INTEGER NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    path_id INTEGER NOT NULL,
+    rule TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tool_runs_run ON tool_runs (run_id);
+CREATE INDEX IF NOT EXISTS run_files_run ON run_files (run_id);
+CREATE INDEX IF NOT EXISTS file_costs_run ON file_costs (run_id);
+CREATE INDEX IF NOT EXISTS findings_run ON findings (run_id);
+"""
+
+CHILD_TABLES = ("tool_runs", "run_files", "file_costs", "findings")
+
+# Identity of a finding across runs: tool, path id, rule and message (lines move)
+FindingKey = Tuple[str, int, str, str]
+
+
+def history_enabled() -> bool:
+    """Whether runs should be recorded (QUALITY_GATE_HISTORY=1)."""
+    return os.environ.get("QUALITY_GATE_HISTORY") == "1"
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """Return the nearest-rank percentile of a list of samples.
+
+    Args:
+        samples: Measured values (at least one)
+        percent: Percentile between 0 and 100
+
+    Returns:
+        Smallest sample such that ``percent``% of the samples are not larger
+    """
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class RunHistory:
+    """SQLite store of past quality gate runs.
+
+    Attributes:
+        path (str): Database file.
+        max_runs (int): Number of most recent runs kept.
+    """
+
+    def __init__(self, path: str, max_runs: Optional[int] = None):
+        """Initialize the history stored in the given file.
+
+        Args:
+            path: Database file (created on first use)
+            max_runs: Runs kept. Defaults to QUALITY_GATE_HISTORY_MAX_RUNS,
+                      or DEFAULT_MAX_RUNS.
+        """
+        self.path = path
+        if max_runs is None:
+            env_runs = os.environ.get("QUALITY_GATE_HISTORY_MAX_RUNS", "")
+            max_runs = int(env_runs) if env_runs.isdigit() else DEFAULT_MAX_RUNS
+        self.max_runs = max(1, max_runs)
+
+    @classmethod
+    def for_repository(cls, git_dir: Optional[str] = None) -> Optional["RunHistory"]:
+        """Open the history of the current repository.
+
+        Args:
+            git_dir: Git directory, if already known
+
+        Returns:
+            RunHistory instance, or None when not inside a git repository
+        """
+        git_dir = git_dir or git_common_dir()
+        if not git_dir:
+            return None
+        return cls(os.path.join(git_dir, HISTORY_FILENAME))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating or upgrading its schema.
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened
+        """
+        connection = sqlite3.connect(self.path, timeout=5)
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            for table in ("runs", "paths") + CHILD_TABLES:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def record(
+        self, gate: Any, mode: str, status: int, started: float, seconds: float
+    ) -> None:
+        """Store one run of the quality gate.
+
+        Args:
+            gate: QualityGate after the run
+            mode: How the files were chosen: 'staged', 'all', 'since' or
+                'files'
+            status: Exit status of the run
+            started: Wall-clock time the run started (seconds since the epoch)
+            seconds: Duration of the run
+
+        Raises:
+            sqlite3.Error: If the run cannot be written
+        """
+        findings = [finding for finding in gate.errors + gate.warnings if finding.path]
+        counts: Dict[str, List[int]] = {}
+        for finding in findings:
+            count = counts.setdefault(finding.tool, [0, 0])
+            count[0 if finding.is_error else 1] += 1
+        tools = set(gate.tool_seconds) | set(counts) | set(gate.interrupted)
+
+        connection = self._connect()
+        try:
+            with connection:
+                run_id = connection.execute(
+                    "INSERT INTO runs (started, mode, seconds, status, files, "
+                    "errors, warnings) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        started,
+                        mode,
+                        seconds,
+                        status,
+                        len(gate.files),
+                        len(gate.errors),
+                        len(gate.warnings),
+                    ),
+                ).lastrowid
+                connection.executemany(
+                    "INSERT INTO tool_runs VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            run_id,
+                            tool,
+                            gate.tool_seconds.get(tool, 0.0),
+                            counts.get(tool, [0, 0])[0],
+                            counts.get(tool, [0, 0])[1],
+                            gate.interrupted.get(tool),
+                        )
+                        for tool in sorted(tools)
+                    ),
+                )
+                # Paths are stored once and referred to by id
+                paths = set(gate.files).union(
+                    (finding.path for finding in findings),
+                    (path for _, path in gate.file_seconds),
+                )
+                connection.executemany(
+                    "INSERT OR IGNORE INTO paths (path) VALUES (?)",
+                    ((path,) for path in paths),
+                )
+                connection.executemany(
+                    "INSERT INTO run_files SELECT ?, id FROM paths WHERE path = ?",
+                    ((run_id, path) for path in gate.files),
+                )
+                connection.executemany(
+                    "INSERT INTO file_costs SELECT ?, ?, id, ? FROM paths "
+                    "WHERE path = ?",
+                    (
+                        (run_id, tool, cost, path)
+                        for (tool, path), cost in gate.file_seconds.items()
+                    ),
+                )
+                connection.executemany(
+                    "INSERT INTO findings SELECT ?, ?, id, ?, ?, ? FROM paths "
+                    "WHERE path = ?",
+                    (
+                        (
+                            run_id,
+                            finding.tool,
+                            finding.rule,
+                            finding.severity,
+                            finding.message,
+                            finding.path,
+                        )
+                        for finding in findings
+                    ),
+                )
+                self._prune(connection, run_id)
+        finally:
+            connection.close()
+
+    def _prune(self, connection: sqlite3.Connection, run_id: int) -> None:
+        """Delete the runs older than the most recent ``max_runs``.
+
+        Interned paths are kept: there are no more of them than paths ever
+        checked in the repository.
+        """
+        oldest_kept = run_id - self.max_runs + 1
+        if oldest_kept <= 1:
+            return
+        for table in CHILD_TABLES:
+            connection.execute(f"DELETE FROM {table} WHERE run_id < ?", (oldest_kept,))
+        connection.execute("DELETE FROM runs WHERE id < ?", (oldest_kept,))
+
+    @staticmethod
+    def _scope(
+        runs: int, mode: Optional[str], column: str = "run_id"
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        """SQL condition selecting the last ``runs`` runs, of one mode if given.
+
+        Args:
+            runs: Number of most recent runs selected
+            mode: Mode of the runs, or None for any
+            column: Column holding the run id
+
+        Returns:
+            Tuple of the condition and its parameters
+        """
+        if mode:
+            return (
+                f"{column} IN (SELECT id FROM runs WHERE mode = ? "
+                "ORDER BY id DESC LIMIT ?)",
+                (mode, runs),
+            )
+        return f"{column} IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)", (runs,)
+
+    def slowest_tools(self, runs: int = 50, mode: Optional[str] = None) -> List[str]:
+        """Report each tool's time over recent runs, slowest first.
+
+        The trend compares the mean time of the newer half of the runs with
+        that of the older half, so a tool that slowed down stands out.
+
+        Args:
+            runs: Number of most recent runs considered
+            mode: Only consider runs of this mode (e.g. 'staged')
+
+        Returns:
+            Table lines
+        """
+        connection = self._connect()
+        try:
+            condition, parameters = self._scope(runs, mode)
+            rows = connection.execute(
+                f"SELECT tool, seconds FROM tool_runs WHERE {condition} "
+                "AND seconds > 0 ORDER BY run_id",
+                parameters,
+            ).fetchall()
+        finally:
+            connection.close()
+
+        samples: Dict[str, List[float]] = {}
+        for tool, seconds in rows:
+            samples.setdefault(tool, []).append(seconds)
+        header = (
+            f"{'Tool':<16}{'Runs':>6}{'Mean s':>9}{'p95 s':>9}{'Total s':>10}"
+            f"  Trend"
+        )
+        lines = [f"\n🐢 SLOWEST TOOLS (last {runs} runs):", header, "-" * len(header)]
+        for tool, values in sorted(samples.items(), key=lambda item: -sum(item[1])):
+            lines.append(
+                f"{tool[:15]:<16}{len(values):>6}{sum(values) / len(values):>9.3f}"
+                f"{percentile(values, 95):>9.3f}{sum(values):>10.3f}  {_trend(values)}"
+            )
+        if not samples:
+            lines.append("No tool runs recorded.")
+        return lines
+
+    def slowest_files(
+        self, runs: int = 50, top: int = 10, mode: Optional[str] = None
+    ) -> List[str]:
+        """Report the files costing each tool the most time over recent runs.
+
+        Args:
+            runs: Number of most recent runs considered
+            top: Number of files listed
+            mode: Only consider runs of this mode (e.g. 'all')
+
+        Returns:
+            Table lines, followed by how few files account for half of each
+            tool's time
+        """
+        connection = self._connect()
+        try:
+            condition, parameters = self._scope(runs, mode)
+            rows = connection.execute(
+                "SELECT tool, path, SUM(seconds) AS cost FROM file_costs "
+                f"JOIN paths ON paths.id = path_id WHERE {condition} "
+                "GROUP BY tool, path_id ORDER BY cost DESC",
+                parameters,
+            ).fetchall()
+        finally:
+            connection.close()
+
+        totals: Dict[str, float] = {}
+        for tool, _, cost in rows:
+            totals[tool] = totals.get(tool, 0.0) + cost
+        header = f"{'Total s':>9}{'Share':>7}  {'Tool':<12}File"
+        lines = [f"\n📄 SLOWEST FILES (last {runs} runs):", header, "-" * len(header)]
+        for tool, path, cost in rows[:top]:
+            share = cost / totals[tool] if totals[tool] else 0.0
+            lines.append(f"{cost:>9.3f}{share:>7.0%}  {tool[:11]:<12}{path}")
+        if not rows:
+            lines.append("No file costs recorded.")
+
+        # Fewest files making up half of each tool's time
+        counted: Dict[str, Tuple[int, float]] = {}
+        for tool, _, cost in rows:
+            files, cumulative = counted.get(tool, (0, 0.0))
+            if cumulative < totals[tool] / 2:
+                counted[tool] = (files + 1, cumulative + cost)
+        files_by_tool: Dict[str, int] = {}
+        for tool, _, _ in rows:
+            files_by_tool[tool] = files_by_tool.get(tool, 0) + 1
+        for tool in sorted(counted):
+            files, cumulative = counted[tool]
+            if totals[tool]:
+                lines.append(
+                    f"{tool}: {files} of {files_by_tool[tool]} file(s) account for "
+                    f"{cumulative / totals[tool]:.0%} of its time."
+                )
+        return lines
+
+    def commit_latency(self, days: int = 14) -> List[str]:
+        """Report the duration of staged-file runs per day.
+
+        Args:
+            days: Number of days covered
+
+        Returns:
+            Table lines
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT started, seconds FROM runs WHERE mode = 'staged' "
+                "AND started >= ? ORDER BY started",
+                (time.time() - days * 86400,),
+            ).fetchall()
+        finally:
+            connection.close()
+
+        by_day: Dict[str, List[float]] = {}
+        for started, seconds in rows:
+            day = time.strftime("%Y-%m-%d", time.localtime(started))
+            by_day.setdefault(day, []).append(seconds)
+        header = f"{'Day':<12}{'Commits':>8}{'p50 s':>9}{'p95 s':>9}{'Max s':>9}"
+        lines = [
+            f"\n⏱️ COMMIT LATENCY (last {days} days):",
+            header,
+            "-" * len(header),
+        ]
+        for day, values in by_day.items():
+            lines.append(
+                f"{day:<12}{len(values):>8}{percentile(values, 50):>9.3f}"
+                f"{percentile(values, 95):>9.3f}{max(values):>9.3f}"
+            )
+        if not by_day:
+            lines.append("No commits recorded.")
+        return lines
+
+    def finding_churn(self, runs: int = 20, mode: Optional[str] = None) -> List[str]:
+        """Report the findings introduced and resolved by each recent run.
+
+        Each run is compared with the previous run in the same mode, over
+        the files both runs checked.
+
+        Args:
+            runs: Number of most recent runs reported
+            mode: Only report runs of this mode
+
+        Returns:
+            Table lines
+        """
+        connection = self._connect()
+        try:
+            condition, parameters = self._scope(runs, mode, "id")
+            recent = connection.execute(
+                f"SELECT id, started, mode FROM runs WHERE {condition} ORDER BY id",
+                parameters,
+            ).fetchall()
+            header = f"{'Started':<18}{'Mode':<8}{'Files':>7}{'New':>6}{'Resolved':>10}"
+            lines = [
+                f"\n🔁 FINDING CHURN (last {runs} runs):",
+                header,
+                "-" * len(header),
+            ]
+            for run_id, started, mode in recent:
+                previous = connection.execute(
+                    "SELECT MAX(id) FROM runs WHERE mode = ? AND id < ?",
+                    (mode, run_id),
+                ).fetchone()[0]
+                if previous is None:
+                    continue
+                common = _run_files(connection, run_id) & _run_files(
+                    connection, previous
+                )
+                current = _run_findings(connection, run_id, common)
+                before = _run_findings(connection, previous, common)
+                lines.append(
+                    f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(started)):<18}"
+                    f"{mode:<8}{len(common):>7}{len(current - before):>6}"
+                    f"{len(before - current):>10}"
+                )
+        finally:
+            connection.close()
+        if len(lines) == 3:
+            lines.append("Not enough runs recorded.")
+        return lines
+
+
+def _trend(values: List[float]) -> str:
+    """Describe how the newer half of the samples compares with the older half."""
+    if len(values) < 4:
+        return ""
+    half = len(values) // 2
+    older = sum(values[:half]) / half
+    newer = sum(values[half:]) / (len(values) - half)
+    if not older:
+        return ""
+    ratio = newer / older
+    if ratio >= 1.5:
+        return f"{ratio:.1f}x slower"
+    if ratio <= 1 / 1.5:
+        return f"{1 / ratio:.1f}x faster"
+    return "steady"
+
+
+def _run_files(connection: sqlite3.Connection, run_id: int) -> Set[int]:
+    """Ids of the paths a run checked."""
+    rows = connection.execute(
+        "SELECT path_id FROM run_files WHERE run_id = ?", (run_id,)
+    )
+    return {path_id for (path_id,) in rows}
+
+
+def _run_findings(
+    connection: sqlite3.Connection, run_id: int, paths: Set[int]
+) -> Set[FindingKey]:
+    """Findings of a run on some files, given by path id."""
+    rows = connection.execute(
+        "SELECT tool, path_id, rule, message FROM findings WHERE run_id = ?",
+        (run_id,),
+    )
+    return {tuple(row) for row in rows if row[1] in paths}
+
+
+def report_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py report``.
+
+    Args:
+        argv: Arguments following the ``report`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py report",
+        description="Summarize the recorded quality gate runs (QUALITY_GATE_HISTORY=1)",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=50, help="Number of recent runs to analyze"
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of slowest files to list"
+    )
+    parser.add_argument(
+        "--days", type=int, default=14, help="Days of commit latency to show"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["staged", "all", "since", "files"],
+        help="Only analyze runs of this mode (default: all runs)",
+    )
+    args = parser.parse_args(argv)
+
+    history = RunHistory.for_repository()
+    if history is None:
+        print("Error: Not a git repository")
+        return 1
+    if not os.path.exists(history.path):
+        print("No runs recorded yet. Set QUALITY_GATE_HISTORY=1 to record them.")
+        return 1
+    try:
+        lines = (
+            history.slowest_tools(args.runs, args.mode)
+            + history.slowest_files(args.runs, args.top, args.mode)
+            + history.commit_latency(args.days)
+            + history.finding_churn(args.runs, args.mode)
+        )
+    except sqlite3.Error as e:
+        print(f"Error: Cannot read the run history: {e}")
+        return 1
+    for line in lines:
+        print(line)
+    return 0
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+De-duplicated execution plan for a pre-commit configuration.
+
+A pre-commit configuration may run an analyzer twice: once as a standalone
+hook (e.g. the official Semgrep hook) and once inside the quality gate hook.
+The run plan reads the active ``.pre-commit-config.yaml`` and assigns each
+analyzer exactly one runner:
+
+- A standalone hook that runs the tool itself keeps it, and the quality gate
+  leaves the analyzer out.
+- Otherwise the quality gate runs the analyzer and publishes its findings in
+  ``.git/quality-gate-results.json``. Hooks whose entry is
+  ``quality_gate.py hook <analyzer>`` replay those findings for the files
+  pre-commit passes them, instead of scanning the files again.
+
+Published findings are keyed by the index blob SHA of each file, so a hook
+only reuses them for content the quality gate actually checked.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from analyzers import Analyzer, create_analyzers, load_plugins
+from findings import Finding
+from tool_result import ToolResult
+
+try:
+    import yaml
+except ImportError:  # PyYAML comes with pre-commit; only the run plan needs it
+    yaml = None
+
+# Configuration read by pre-commit, relative to the repository root
+CONFIG_NAME = ".pre-commit-config.yaml"
+
+# Entry of the hooks that replay the quality gate's findings
+REUSE_ENTRY = "quality_gate.py hook"
+
+# Stages in which pre-commit runs a hook on ``git commit``
+COMMIT_STAGES = {"pre-commit", "commit"}
+
+
+class Hook(NamedTuple):
+    """A hook of the pre-commit configuration.
+
+    Attributes:
+        id: Hook id, e.g. 'semgrep'
+        repo: Repository the hook comes from ('local' for local hooks)
+        entry: Command of a local hook ('' for hooks defined by their repo)
+    """
+
+    id: str
+    repo: str
+    entry: str
+
+    @property
+    def reuses_results(self) -> bool:
+        """Whether the hook replays the quality gate's findings."""
+        return REUSE_ENTRY in self.entry
+
+
+class RunPlan:
+    """Assigns each analyzer to the quality gate or to a standalone hook.
+
+    Attributes:
+        hooks (List[Hook]): Hooks that run on ``git commit``, in config order.
+        path (str): Configuration file the plan was read from.
+    """
+
+    def __init__(self, hooks: List[Hook], path: str = CONFIG_NAME):
+        """Initialize a plan.
+
+        Args:
+            hooks: Hooks that run on ``git commit``
+            path: Configuration file the hooks were read from
+        """
+        self.hooks = hooks
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str = CONFIG_NAME) -> "RunPlan":
+        """Read the hooks of a pre-commit configuration.
+
+        Hooks listed in pre-commit's SKIP environment variable and hooks
+        limited to stages other than commit are left out.
+
+        Args:
+            path: Configuration file
+
+        Returns:
+            RunPlan for the configuration
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If PyYAML is missing or the file is not a valid config
+        """
+        if yaml is None:
+            raise ValueError("PyYAML is not installed")
+        with open(path, encoding="utf-8") as handle:
+            try:
+                config = yaml.safe_load(handle)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path} is not valid YAML: {e}") from e
+        if not isinstance(config, dict) or not isinstance(config.get("repos"), list):
+            raise ValueError(f"{path} has no list of repos")
+
+        skipped = {name.strip() for name in os.environ.get("SKIP", "").split(",")}
+        default_stages = config.get("default_stages")
+        hooks = []
+        for repo in config["repos"]:
+            if not isinstance(repo, dict):
+                raise ValueError(f"{path} has a repo that is not a mapping")
+            repo_hooks = repo.get("hooks") or []
+            if not isinstance(repo_hooks, list):
+                raise ValueError(f"{path} has a repo whose hooks are not a list")
+            for hook in repo_hooks:
+                if not isinstance(hook, dict) or "id" not in hook:
+                    raise ValueError(f"{path} has a hook without an id")
+                stages = hook.get("stages", default_stages)
+                if hook.get("id") in skipped:
+                    continue
+                if stages and not COMMIT_STAGES.intersection(stages):
+                    continue
+                hooks.append(
+                    Hook(str(hook["id"]), repo.get("repo", ""), hook.get("entry", ""))
+                )
+        return cls(hooks, path)
+
+    def hooks_for(self, analyzer: Analyzer) -> List[Hook]:
+        """Return the hooks that correspond to an analyzer.
+
+        Args:
+            analyzer: Analyzer whose ``hook_ids`` are matched
+
+        Returns:
+            Matching hooks, in config order
+        """
+        ids = analyzer.pre_commit_hooks()
+        return [hook for hook in self.hooks if hook.id in ids]
+
+    def runner(self, analyzer: Analyzer) -> Optional[Hook]:
+        """Return the standalone hook that runs an analyzer's tool, if any.
+
+        Args:
+            analyzer: Analyzer to place
+
+        Returns:
+            Hook the analyzer is left to, or None if the quality gate runs it
+        """
+        return next(
+            (hook for hook in self.hooks_for(analyzer) if not hook.reuses_results),
+            None,
+        )
+
+    def describe(self, analyzers: List[Analyzer]) -> List[str]:
+        """Describe who runs each analyzer.
+
+        Args:
+            analyzers: Analyzers of the quality gate
+
+        Returns:
+            One line per analyzer
+        """
+        lines = []
+        for analyzer in analyzers:
+            reusing = [
+                hook.id for hook in self.hooks_for(analyzer) if hook.reuses_results
+            ]
+            runner = self.runner(analyzer)
+            if os.environ.get(analyzer.disable_variable) == "1":
+                text = f"disabled by {analyzer.disable_variable}=1"
+                if reusing:
+                    text += f"; run by the '{', '.join(reusing)}' hook"
+                    reusing = []
+            elif runner:
+                text = f"run by the '{runner.id}' hook ({runner.repo})"
+            else:
+                text = "run by the quality gate"
+            if reusing:
+                text += f"; reused by the '{', '.join(reusing)}' hook"
+            lines.append(f"  - {analyzer.name}: {text}")
+        return lines
+
+
+def results_path(git_dir: str) -> str:
+    """Return the file holding the published results of a repository."""
+    return os.path.join(git_dir, "quality-gate-results.json")
+
+
+def publish_results(
+    path: str,
+    analyzers: List[Analyzer],
+    tool_results: List[ToolResult],
+    blob_shas: Dict[str, str],
+    background: Optional[List[str]] = None,
+) -> None:
+    """Publish the findings of a quality gate run for the reuse hooks.
+
+    Only analyzers that were disabled, deferred to the background check or
+    ran to completion are published; a hook falls back to running its
+    analyzer for anything else. Errors are ignored, since the hooks can
+    always scan the files themselves.
+
+    Args:
+        path: Results file
+        analyzers: Analyzers of the run
+        tool_results: Their results, in the same order
+        blob_shas: Index blob SHA of each staged file that was checked
+        background: Analyzers that check the commit in the background
+    """
+    published: Dict[str, Any] = {}
+    for analyzer, tool_result in zip(analyzers, tool_results):
+        if os.environ.get(analyzer.disable_variable) == "1":
+            published[analyzer.name] = {"state": "disabled"}
+            continue
+        if background and analyzer.name in background:
+            published[analyzer.name] = {"state": "background"}
+            continue
+        if not tool_result.complete or tool_result.interrupted:
+            continue
+        findings: Dict[str, List[List]] = {}
+        for finding in tool_result.errors + tool_result.warnings:
+            if finding.path:
+                findings.setdefault(finding.path, []).append(finding.to_row())
+        published[analyzer.name] = {
+            "state": "complete",
+            "files": {
+                path: blob_shas[path]
+                for path in analyzer.select(list(blob_shas))
+                if path in blob_shas
+            },
+            "findings": findings,
+        }
+
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"analyzers": published}, handle)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Read published results.
+
+    Args:
+        path: Results file
+
+    Returns:
+        Published results by analyzer name (empty if there are none)
+    """
+    try:
+        with open(path, encoding="utf-8") as handle:
+            results = json.load(handle).get("analyzers")
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return results if isinstance(results, dict) else {}
+
+
+def index_blob_shas(paths: List[str]) -> Dict[str, str]:
+    """Return the index blob SHA of each path.
+
+    Args:
+        paths: Repository-relative file paths
+
+    Returns:
+        Blob SHA by path, for the paths present in the index
+    """
+    if not paths:
+        return {}
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "--stage", "-z", "--"] + paths,
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    shas = {}
+    for entry in os.fsdecode(result.stdout).split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        shas[path] = info.split()[1]
+    return shas
+
+
+def reuse_findings(
+    analyzer: Analyzer, published: Dict[str, Any], files: List[str]
+) -> Tuple[List[Finding], List[str]]:
+    """Replay the published findings of an analyzer for some files.
+
+    Args:
+        analyzer: Analyzer of the hook
+        published: Published results of the analyzer
+        files: Files the analyzer handles
+
+    Returns:
+        Tuple of the findings for the files whose staged content was checked
+        and the files that still need scanning
+    """
+    checked = published.get("files", {})
+    index = index_blob_shas(files)
+    findings = []
+    missing = []
+    for path in files:
+        if path not in checked or checked[path] != index.get(path):
+            missing.append(path)
+            continue
+        for row in published.get("findings", {}).get(path, []):
+            findings.append(Finding.from_row(analyzer.name, path, row))
+    return findings, missing
+
+
+def hook_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py hook``.
+
+    Reports an analyzer's findings for the files passed by pre-commit,
+    replaying what the quality gate published and scanning only the files it
+    did not check. An analyzer disabled in the quality gate (DISABLE_<NAME>)
+    is run by the hook on all its files. The hook fails when the analyzer
+    reports an error, as the quality gate would.
+
+    Args:
+        argv: Arguments following the ``hook`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py hook",
+        description="Report an analyzer's findings, reusing the results the "
+        "quality gate published for the staged content",
+    )
+    parser.add_argument("analyzer", help="Analyzer name, e.g. semgrep")
+    parser.add_argument("files", nargs="*", help="Files passed by pre-commit")
+    args = parser.parse_args(argv)
+
+    import quality_gate
+
+    for message in load_plugins():
+        print(message)
+    analyzer = next(
+        (
+            analyzer
+            for analyzer in create_analyzers()
+            if analyzer.name.lower() == args.analyzer.lower()
+        ),
+        None,
+    )
+    if analyzer is None:
+        print(f"Error: Unknown analyzer {args.analyzer}")
+        return 1
+    files = analyzer.select(args.files)
+    if not files:
+        return 0
+
+    git_dir = quality_gate.git_common_dir()
+    published = load_results(results_path(git_dir)) if git_dir else {}
+    published = published.get(analyzer.name) or {}
+    # DISABLE_<NAME> only turns the analyzer off inside the quality gate (e.g.
+    # in VS Code mode); its own hook still runs it, as the standalone hooks did
+    os.environ.pop(analyzer.disable_variable, None)
+    if published.get("state") == "disabled":
+        print(
+            f"{analyzer.name} is disabled in the quality gate "
+            f"({analyzer.disable_variable}=1); checking the files in this hook"
+        )
+        published = {}
+    if published.get("state") == "background":
+        print(f"{analyzer.name} runs in the background once the quality gate passes")
+        return 0
+
+    findings, missing = reuse_findings(analyzer, published, files)
+    if len(missing) < len(files):
+        print(
+            f"♻️ Reused the quality gate's {analyzer.name} results for "
+            f"{len(files) - len(missing)} file(s)"
+        )
+    if missing:
+        # pre-commit stashes unstaged changes, so the working tree is staged
+        gate = quality_gate.QualityGate(jobs=1, git_dir=git_dir)
+        gate.analyzers = [analyzer]
+        gate.run_all_checks(missing)
+        findings += gate.errors + gate.warnings
+        for tool, reason in gate.interrupted.items():
+            print(f"⏱️ {tool} did not finish: {reason}")
+
+    findings.sort(key=lambda finding: (finding.path or "", finding.line or 0))
+    for title, severe in (("🚫 ERRORS:", True), ("⚠️ WARNINGS:", False)):
+        group = [finding for finding in findings if finding.is_error == severe]
+        if group:
+            print(f"\n{title}")
+            for finding in group:
+                print(f"  - {finding.render()}")
+    return 1 if any(finding.is_error for finding in findings) else 0
+
+
+def plan_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py plan``.
+
+    Args:
+        argv: Arguments following the ``plan`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py plan",
+        description="Show which hook runs each analyzer under the pre-commit config",
+    )
+    parser.add_argument(
+        "config", nargs="?", default=CONFIG_NAME, help="Configuration file"
+    )
+    args = parser.parse_args(argv)
+
+    for message in load_plugins():
+        print(message)
+    try:
+        plan = RunPlan.load(args.config)
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot read the run plan: {e}")
+        return 1
+    print(f"\n🗺️ Run plan for {plan.path}:")
+    for line in plan.describe(create_analyzers()):
+        print(line)
+    return 0
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+"""
+Distributed full-repository scans.
+
+A coordinator splits the tracked files of a repository into work units (one
+analyzer on one file shard) and serves them over a TCP or Unix socket.
+Workers, in any number of processes or on any number of hosts with a
+checkout of the same commit, pull units, run the analyzer with their own
+QualityGate and push the findings back; the coordinator merges them as a
+regular ``--all`` scan would.
+
+A unit is leased to one worker at a time. When a worker disconnects or does
+not answer within the lease, its units are queued again for another worker,
+up to MAX_ATTEMPTS times; the first result received for a unit wins.
+
+Protocol: JSON lines, the worker speaking first.
+
+- worker: ``{"type": "hello", "commit": sha, "token": token}``
+- coordinator: ``{"type": "welcome"}`` or ``{"type": "error", "message": ...}``
+- worker: ``{"type": "next"}`` or
+  ``{"type": "result", "unit": id, "result": ToolResult.to_dict()}``
+- coordinator: ``{"type": "unit", "unit": id, "analyzer": name, "files": [...]}``
+  or, once every unit has a result, ``{"type": "done"}``; while other
+  workers hold the remaining units, the reply waits for one to be queued again
+"""
+
+import argparse
+import hmac
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import IO, Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from memory_governor import memory_budget_kb
+from tool_result import ToolResult
+
+# Times a unit is handed out before it is given up
+MAX_ATTEMPTS = 3
+
+# Seconds a worker may hold a unit before it is handed to another worker
+DEFAULT_LEASE = 900
+
+# Seconds without any connected worker before the remaining units are given up
+DEFAULT_IDLE_TIMEOUT = 600
+
+# Units per scan when --shards is not given: shards x analyzers
+DEFAULT_SHARDS = 16
+
+# Seconds between checks for expired leases
+WAIT_SECONDS = 1.0
+
+# Shared secret of a scan, required from workers when set
+TOKEN_VARIABLE = "QUALITY_GATE_SCAN_TOKEN"
+
+
+class WorkUnit(NamedTuple):
+    """One analyzer to run on one shard of files.
+
+    Attributes:
+        id: Position of the unit in the scan
+        analyzer: Analyzer name
+        files: Repository-relative paths of the shard
+    """
+
+    id: int
+    analyzer: str
+    files: List[str]
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """Parse a listen or connect address.
+
+    Args:
+        address: 'host:port' for TCP, or a filesystem path for a Unix socket
+
+    Returns:
+        Tuple of the socket family and the address to bind or connect to
+
+    Raises:
+        ValueError: If the address is not valid
+    """
+    if os.sep in address or address.endswith(".sock"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not supported on this platform")
+        return socket.AF_UNIX, address
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"expected host:port or a socket path, got {address!r}")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def format_address(family: int, address: Any) -> str:
+    """Format a bound address the way ``parse_address`` reads it."""
+    if family == socket.AF_INET:
+        return f"{address[0]}:{address[1]}"
+    return str(address)
+
+
+def _is_local(address: str) -> bool:
+    """Whether only this host can connect to a listen address."""
+    family, bound = parse_address(address)
+    return (
+        family != socket.AF_INET
+        or bound[0] in ("localhost", "::1")
+        or (bound[0].startswith("127."))
+    )
+
+
+def head_commit() -> Optional[str]:
+    """Return the commit checked out in the current repository, or None."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip()
+
+
+def _send(stream: IO[bytes], message: Dict[str, Any]) -> None:
+    """Write one JSON line."""
+    stream.write(json.dumps(message).encode() + b"\n")
+    stream.flush()
+
+
+def _receive(stream: IO[bytes]) -> Optional[Dict[str, Any]]:
+    """Read one JSON line, or None when the peer closed the connection.
+
+    Raises:
+        ValueError: If the line is not a JSON object
+    """
+    line = stream.readline()
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("expected a JSON object")
+    return message
+
+
+class ScanCoordinator:
+    """Serves the work units of a scan to workers and collects their results.
+
+    Attributes:
+        address (str): Address workers connect to.
+        commit (Optional[str]): Commit being scanned; workers must have it
+            checked out.
+        token (str): Shared secret workers must present ('' for none).
+        shards (int): Number of file shards to split the scan into.
+        lease (float): Seconds a worker may hold a unit.
+        idle_timeout (float): Seconds without any connected worker before
+            the remaining units are given up.
+        workers_seen (int): Workers that joined the scan.
+        requeued (int): Units handed to another worker after a worker was
+            lost or its lease expired.
+    """
+
+    def __init__(
+        self,
+        listen: str,
+        commit: Optional[str],
+        token: str = "",
+        shards: int = DEFAULT_SHARDS,
+        lease: float = DEFAULT_LEASE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        """Bind the coordinator's socket.
+
+        Args:
+            listen: Address to listen on ('host:port', port 0 picks a free
+                one, or a Unix socket path)
+            commit: Commit being scanned
+            token: Shared secret workers must present
+            shards: Number of file shards
+            lease: Seconds a worker may hold a unit
+            idle_timeout: Seconds without connected workers before giving up
+
+        Raises:
+            OSError: If the socket cannot be bound
+            ValueError: If the address is not valid
+        """
+        family, address = parse_address(listen)
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.remove(address)
+        else:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(address)
+        self._server.listen(64)
+        self.address = format_address(family, self._server.getsockname())
+        self._unix_path = address if family == socket.AF_UNIX else None
+        self.commit = commit
+        self.token = token
+        self.shards = max(1, shards)
+        self.lease = lease
+        self.idle_timeout = idle_timeout
+        self.workers_seen = 0
+        self.requeued = 0
+        self._condition = threading.Condition()
+        self._units: List[WorkUnit] = []
+        self._pending: Deque[int] = deque()
+        self._leases: Dict[int, Tuple[int, float]] = {}
+        self._attempts: Dict[int, int] = {}
+        self._results: Dict[int, ToolResult] = {}
+        self._connected = 0
+        self._closed = False
+
+    def run(self, units: List[Tuple[str, List[str]]]) -> List[ToolResult]:
+        """Serve units to workers until every one has a result.
+
+        Args:
+            units: (analyzer name, files) pairs
+
+        Returns:
+            One ToolResult per unit, in the same order
+        """
+        with self._condition:
+            self._units = [
+                WorkUnit(index, name, files)
+                for index, (name, files) in enumerate(units)
+            ]
+            self._pending = deque(range(len(self._units)))
+        accept_thread = threading.Thread(target=self._accept, daemon=True)
+        accept_thread.start()
+
+        idle_since = time.monotonic()
+        with self._condition:
+            while len(self._results) < len(self._units):
+                self._reap_expired()
+                if self._connected:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since > self.idle_timeout:
+                    self._give_up_all(f"no worker connected for {self.idle_timeout:g}s")
+                    break
+                self._condition.wait(timeout=WAIT_SECONDS)
+        return [self._results[unit.id] for unit in self._units]
+
+    def close(self) -> None:
+        """Stop accepting workers and remove a Unix socket."""
+        self._closed = True
+        try:
+            # Closing alone does not wake the accept thread, which would then
+            # accept on whatever socket reuses the descriptor
+            self._server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self._server.close()
+        finally:
+            if self._unix_path:
+                try:
+                    os.remove(self._unix_path)
+                except OSError:
+                    pass
+
+    def _accept(self) -> None:
+        """Accept workers, serving each one on its own thread."""
+        connection_id = 0
+        while not self._closed:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            connection_id += 1
+            threading.Thread(
+                target=self._serve_worker,
+                args=(connection, connection_id),
+                daemon=True,
+            ).start()
+
+    def _serve_worker(self, connection: socket.socket, connection_id: int) -> None:
+        """Hand units to one worker and record its results until it leaves."""
+        with connection, connection.makefile("rwb") as stream:
+            try:
+                if not self._welcome(stream):
+                    return
+                with self._condition:
+                    self._connected += 1
+                    self.workers_seen += 1
+                try:
+                    while True:
+                        message = _receive(stream)
+                        if message is None:
+                            return
+                        if message.get("type") == "result":
+                            self._record(connection_id, message)
+                        reply = self._next_unit(connection_id)
+                        _send(stream, reply)
+                        if reply["type"] == "done":
+                            return
+                finally:
+                    self._release(connection_id)
+            except (OSError, ValueError):
+                return
+
+    def _welcome(self, stream: IO[bytes]) -> bool:
+        """Check a worker's hello message and answer it.
+
+        Returns:
+            True if the worker may take part in the scan
+        """
+        hello = _receive(stream)
+        if hello is None or hello.get("type") != "hello":
+            return False
+        if self.token and not hmac.compare_digest(
+            str(hello.get("token") or ""), self.token
+        ):
+            _send(stream, {"type": "error", "message": "invalid scan token"})
+            return False
+        if self.commit and hello.get("commit") != self.commit:
+            _send(
+                stream,
+                {
+                    "type": "error",
+                    "message": f"the scan is of commit {self.commit}, "
+                    f"the worker has {hello.get('commit')} checked out",
+                },
+            )
+            return False
+        _send(stream, {"type": "welcome"})
+        return True
+
+    def _record(self, connection_id: int, message: Dict[str, Any]) -> None:
+        """Store a worker's result for a unit it was leased."""
+        unit_id = message.get("unit")
+        with self._condition:
+            lease = self._leases.get(unit_id)
+            if lease is None or lease[0] != connection_id:
+                # Late result for a unit already handed to another worker
+                if unit_id in self._results or unit_id not in self._attempts:
+                    return
+            try:
+                result = ToolResult.from_dict(message["result"])
+            except (KeyError, TypeError, ValueError, IndexError):
+                return
+            self._leases.pop(unit_id, None)
+            if unit_id in self._pending:
+                self._pending.remove(unit_id)
+            self._results.setdefault(unit_id, result)
+            self._condition.notify_all()
+
+    def _next_unit(self, connection_id: int) -> Dict[str, Any]:
+        """Lease the next pending unit to a worker, or tell it to stop.
+
+        While other workers hold the last units, waits until one of them is
+        queued again or every unit has a result.
+        """
+        with self._condition:
+            while len(self._results) < len(self._units):
+                self._reap_expired()
+                while self._pending:
+                    unit = self._units[self._pending.popleft()]
+                    if unit.id in self._results:
+                        continue
+                    self._attempts[unit.id] = self._attempts.get(unit.id, 0) + 1
+                    self._leases[unit.id] = (
+                        connection_id,
+                        time.monotonic() + self.lease,
+                    )
+                    return {
+                        "type": "unit",
+                        "unit": unit.id,
+                        "analyzer": unit.analyzer,
+                        "files": unit.files,
+                    }
+                self._condition.wait(timeout=WAIT_SECONDS)
+            return {"type": "done"}
+
+    def _release(self, connection_id: int) -> None:
+        """Queue again the units held by a worker that left."""
+        with self._condition:
+            self._connected -= 1
+            for unit_id, (holder, _) in list(self._leases.items()):
+                if holder == connection_id:
+                    self._requeue(unit_id, "worker lost")
+            self._condition.notify_all()
+
+    def _reap_expired(self) -> None:
+        """Queue again the units whose lease ran out (caller holds the lock)."""
+        now = time.monotonic()
+        for unit_id, (_, deadline) in list(self._leases.items()):
+            if deadline <= now:
+                self._requeue(unit_id, f"lease of {self.lease:g}s expired")
+
+    def _requeue(self, unit_id: int, reason: str) -> None:
+        """Hand a unit to another worker, or give it up (caller holds the lock)."""
+        del self._leases[unit_id]
+        if unit_id in self._results:
+            return
+        if self._attempts.get(unit_id, 0) >= MAX_ATTEMPTS:
+            self._give_up(unit_id, f"{reason} {MAX_ATTEMPTS} times")
+            return
+        self.requeued += 1
+        self._pending.append(unit_id)
+
+    def _give_up(self, unit_id: int, reason: str) -> None:
+        """Record a unit as not scanned (caller holds the lock)."""
+        unit = self._units[unit_id]
+        result = ToolResult(unit.analyzer)
+        result.interrupt(f"{len(unit.files)} file(s) not scanned: {reason}")
+        self._results[unit_id] = result
+        self._condition.notify_all()
+
+    def _give_up_all(self, reason: str) -> None:
+        """Record every unit without a result as not scanned (caller holds the lock)."""
+        for unit in self._units:
+            if unit.id not in self._results:
+                self._give_up(unit.id, reason)
+        self._pending.clear()
+        self._leases.clear()
+
+
+class ScanWorker:
+    """Pulls work units from a coordinator and runs them with a QualityGate.
+
+    Attributes:
+        address (str): Coordinator address.
+        token (str): Shared secret of the scan.
+        units (int): Units scanned so far.
+    """
+
+    def __init__(self, address: str, token: str = ""):
+        """Initialize a worker.
+
+        Args:
+            address: Coordinator address ('host:port' or a Unix socket path)
+            token: Shared secret of the scan
+        """
+        self.address = address
+        self.token = token
+        self.units = 0
+
+    def run(self, gate: Any, emit=print) -> int:
+        """Scan units until the coordinator has none left.
+
+        Args:
+            gate: QualityGate of this worker's checkout
+            emit: Callable receiving progress lines
+
+        Returns:
+            Exit status: 0 when the scan completed, 1 on errors
+        """
+        family, address = parse_address(self.address)
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(address)
+            with connection.makefile("rwb") as stream:
+                _send(
+                    stream,
+                    {"type": "hello", "commit": head_commit(), "token": self.token},
+                )
+                reply = _receive(stream)
+                if reply is None or reply.get("type") != "welcome":
+                    message = (reply or {}).get("message", "connection closed")
+                    emit(f"Error: The coordinator refused this worker: {message}")
+                    return 1
+
+                _send(stream, {"type": "next"})
+                while True:
+                    reply = _receive(stream)
+                    if reply is None:
+                        emit("Error: The coordinator closed the connection")
+                        return 1
+                    if reply.get("type") == "done":
+                        return 0
+                    result = self._scan(gate, reply["analyzer"], reply["files"])
+                    self.units += 1
+                    _send(
+                        stream,
+                        {
+                            "type": "result",
+                            "unit": reply["unit"],
+                            "result": result.to_dict(),
+                        },
+                    )
+
+    @staticmethod
+    def _scan(gate: Any, analyzer: str, files: List[str]) -> ToolResult:
+        """Run one unit, reporting analyzers this host does not have."""
+        try:
+            return gate.scan_unit(analyzer, files)
+        except KeyError:
+            result = ToolResult(analyzer)
+            result.interrupt(f"{analyzer} is not available on a worker host")
+            return result
+
+
+def _start_local_workers(
+    count: int, address: str, token: str
+) -> List[subprocess.Popen]:
+    """Start worker processes on this host for a scan.
+
+    The host's memory budget is split between the workers, whose tools
+    would otherwise each be allowed the whole of it.
+    """
+    gate = os.path.join(os.path.dirname(os.path.abspath(__file__)), "quality_gate.py")
+    env = dict(os.environ)
+    if token:
+        env[TOKEN_VARIABLE] = token
+    budget_kb = memory_budget_kb()
+    if budget_kb and count:
+        env["QUALITY_GATE_MEMORY_MB"] = f"{budget_kb / 1024 / count:g}"
+    return [
+        subprocess.Popen(
+            [sys.executable, gate, "work", "--connect", address],
+            stdin=subprocess.DEVNULL,
+            env=env,
+        )
+        for _ in range(count)
+    ]
+
+
+def coordinate_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py coordinate``.
+
+    Args:
+        argv: Arguments following the ``coordinate`` subcommand
+
+    Returns:
+        Exit status: 0 for success, 1 for failure
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py coordinate",
+        description="Scan the whole repository with workers on other processes "
+        "or hosts",
+    )
+    parser.add_argument(
+        "--listen",
+        default="127.0.0.1:0",
+        help="Address workers connect to: host:port (port 0 picks a free one) "
+        "or a Unix socket path (default: 127.0.0.1:0)",
+    )
+    parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        help="Number of worker processes to start on this host",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=DEFAULT_SHARDS,
+        help="Number of file shards; each analyzer makes one unit per shard",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=DEFAULT_LEASE,
+        help="Seconds a worker may hold a unit before it is handed to another",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Seconds without any connected worker before giving up",
+    )
+    args = parser.parse_args(argv)
+
+    import quality_gate
+
+    token = os.environ.get(TOKEN_VARIABLE, "")
+    try:
+        coordinator = ScanCoordinator(
+            args.listen,
+            head_commit(),
+            token,
+            args.shards,
+            args.lease,
+            args.idle_timeout,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: Cannot listen on {args.listen}: {e}")
+        return 1
+    if not token and not _is_local(args.listen):
+        print(f"Warning: {TOKEN_VARIABLE} is not set; any host may join the scan")
+
+    print("\n🔍 Running Code Quality Gate...")
+    print(f"📡 Coordinator listening on {coordinator.address}")
+    workers = _start_local_workers(args.local_workers, coordinator.address, token)
+    try:
+        gate = quality_gate.QualityGate()
+        success, messages = gate.run_full_scan(coordinator=coordinator)
+    finally:
+        coordinator.close()
+        for worker in workers:
+            try:
+                worker.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+
+    for message in messages:
+        print(message)
+    print(
+        f"\n🛰️ {coordinator.workers_seen} worker(s) joined the scan; "
+        f"{coordinator.requeued} unit(s) were handed to another worker."
+    )
+    if not success:
+        print("\n❌ Quality gate failed! Please fix the errors above.")
+        return 1
+    print("\n✅ Quality gate passed!")
+    return 0
+
+
+def work_main(argv: List[str]) -> int:
+    """Command-line entry point for ``quality_gate.py work``.
+
+    Args:
+        argv: Arguments following the ``work`` subcommand
+
+    Returns:
+        Exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="quality_gate.py work",
+        description="Scan work units served by a quality gate coordinator",
+    )
+    parser.add_argument(
+        "--connect", required=True, help="Coordinator address (host:port or path)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not reuse cached findings"
+    )
+    args = parser.parse_args(argv)
+
+    import quality_gate
+
+    worker = ScanWorker(args.connect, os.environ.get(TOKEN_VARIABLE, ""))
+    gate = quality_gate.QualityGate(jobs=1, use_cache=not args.no_cache)
+    try:
+        return worker.run(gate)
+    except (OSError, ValueError) as e:
+        print(f"Error: Lost the coordinator at {args.connect}: {e}")
+        return 1
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Pinned, language-scoped store of Semgrep rule packs.
+
+``semgrep --config auto`` resolves and downloads the registry rules on every
+run and loads rules for every language. This module keeps a snapshot of the
+registry rule packs on disk, indexed by language, so the quality gate can
+pass Semgrep only the rule files relevant to the files being checked and run
+fully offline. The snapshot only changes when it is refreshed explicitly.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from result_cache import git_common_dir
+
+
+class SemgrepRuleStore:
+    """On-disk snapshot of Semgrep registry rule packs, one file per language.
+
+    Attributes:
+        directory (str): Directory holding the rule packs and ``index.json``.
+    """
+
+    STORE_DIRNAME = "quality-gate-semgrep-rules"
+    INDEX_FILENAME = "index.json"
+    REGISTRY_URL = "https://semgrep.dev/c/{pack}"
+
+    # Registry rule pack for each language
+    LANGUAGE_PACKS = {
+        "python": "p/python",
+        "javascript": "p/javascript",
+        "typescript": "p/typescript",
+        "java": "p/java",
+        "c": "p/c",
+        "go": "p/golang",
+        "ruby": "p/ruby",
+        "php": "p/php",
+        "swift": "p/swift",
+        "kotlin": "p/kotlin",
+    }
+
+    # Language of each file extension checked by the quality gate
+    EXTENSION_LANGUAGES = {
+        ".py": "python",
+        ".js": "javascript",
+        ".jsx": "javascript",
+        ".ts": "typescript",
+        ".tsx": "typescript",
+        ".java": "java",
+        ".c": "c",
+        ".cpp": "c",
+        ".go": "go",
+        ".rb": "ruby",
+        ".php": "php",
+        ".swift": "swift",
+        ".kt": "kotlin",
+    }
+
+    def __init__(self, directory: str):
+        """Initialize a store rooted at the given directory.
+
+        Args:
+            directory: Directory holding the rule packs
+        """
+        self.directory = directory
+        self._index: Optional[Dict] = None
+        self._index_mtime: Optional[int] = None
+
+    @classmethod
+    def default(cls, git_dir: Optional[str] = None) -> Optional["SemgrepRuleStore"]:
+        """Locate the rule store for the current repository.
+
+        The QUALITY_GATE_SEMGREP_RULES environment variable overrides the
+        location, e.g. to share a snapshot committed to the repository.
+
+        Args:
+            git_dir: Git directory, if already known
+
+        Returns:
+            SemgrepRuleStore, or None outside a git repository without override
+        """
+        override = os.environ.get("QUALITY_GATE_SEMGREP_RULES")
+        if override:
+            return cls(os.path.abspath(override))
+        git_dir = git_dir or git_common_dir()
+        if not git_dir:
+            return None
+        return cls(os.path.join(git_dir, cls.STORE_DIRNAME))
+
+    @property
+    def index(self) -> Dict:
+        """Contents of ``index.json``, or an empty dict if there is no snapshot."""
+        if self._index is None:
+            self._index_mtime = self._read_index_mtime()
+            try:
+                with open(
+                    os.path.join(self.directory, self.INDEX_FILENAME), encoding="utf-8"
+                ) as handle:
+                    self._index = json.load(handle)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def is_current(self) -> bool:
+        """Whether the index held in memory still matches ``index.json``.
+
+        A long-lived store (e.g. the daemon's) must be replaced once the
+        snapshot was refreshed by another process.
+        """
+        return self._index is None or self._read_index_mtime() == self._index_mtime
+
+    def _read_index_mtime(self) -> Optional[int]:
+        """Modification time of ``index.json`` in nanoseconds, or None if missing."""
+        try:
+            return os.stat(
+                os.path.join(self.directory, self.INDEX_FILENAME)
+            ).st_mtime_ns
+        except OSError:
+            return None
+
+    def is_available(self) -> bool:
+        """Whether a rule snapshot has been downloaded."""
+        return bool(self.index.get("languages"))
+
+    def rules_for_files(self, files: List[str]) -> List[Tuple[str, str]]:
+        """Select the rule packs relevant to a set of files.
+
+        Args:
+            files: Files that Semgrep will scan
+
+        Returns:
+            Sorted list of (rule file path, content digest) tuples
+        """
+        languages = self.index.get("languages", {})
+        selected = set()
+        for path in files:
+            language = self.EXTENSION_LANGUAGES.get(os.path.splitext(path)[1])
+            if language in languages:
+                selected.add(language)
+        return [
+            (
+                os.path.join(self.directory, languages[language]["file"]),
+                languages[language]["sha256"],
+            )
+            for language in sorted(selected)
+        ]
+
+    def refresh(self, timeout: float = 60.0) -> List[str]:
+        """Download the current registry rule packs and pin them on disk.
+
+        Packs that fail to download keep their previous snapshot, if any.
+
+        Args:
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            Human-readable status lines, one per language
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        languages = dict(self.index.get("languages", {}))
+        report = []
+        for language, pack in sorted(self.LANGUAGE_PACKS.items()):
+            url = self.REGISTRY_URL.format(pack=pack)
+            try:
+                # The URL is a fixed https registry address
+                response = urllib.request.urlopen(url, timeout=timeout)  # nosec B310
+                with response:
+                    content = response.read()
+            except OSError as e:
+                report.append(f"{language}: failed to download {pack} ({e})")
+                continue
+
+            filename = f"{language}.yaml"
+            self._write(filename, content)
+            languages[language] = {
+                "file": filename,
+                "pack": pack,
+                "sha256": hashlib.sha256(content).hexdigest(),
+            }
+            report.append(f"{language}: {pack} ({len(content)} bytes)")
+
+        index = {"updated": int(time.time()), "languages": languages}
+        self._write(self.INDEX_FILENAME, json.dumps(index, indent=2).encode())
+        self._index = index
+        self._index_mtime = self._read_index_mtime()
+        return report
+
+    def _write(self, filename: str, content: bytes) -> None:
+        """Atomically write a file into the store directory."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(content)
+        os.replace(tmp_path, os.path.join(self.directory, filename))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Snapshot of the staged (index) content of a git repository.
+
+The quality gate must validate what is about to be committed, not the working
+tree, which may contain unstaged edits. This module lists the staged changes
+and streams every staged blob through a single long-lived
+``git cat-file --batch`` process, materializing them into a temporary tree in
+which the analyzers are run.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+
+class StagedSnapshot:
+    """Temporary directory holding the staged version of the changed files.
+
+    Attributes:
+        root (str): Directory containing the materialized files.
+        paths (List[str]): Repository-relative paths of the staged files.
+        blob_shas (Dict[str, str]): Blob SHA of each materialized file.
+    """
+
+    # Files copied from the index (when present) so analyzers find their config
+    SUPPORT_FILES = [
+        ".bandit.yml",
+        ".eslintrc.json",
+        ".eslintrc.js",
+        ".eslintrc.yml",
+        "eslint.config.js",
+        "horusec-config.json",
+        ".semgrepignore",
+        "package.json",
+        "tsconfig.json",
+    ]
+
+    # Directories linked from the working tree so tools can resolve dependencies
+    LINKED_DIRECTORIES = ["node_modules"]
+
+    def __init__(self, root: str):
+        """Initialize an empty snapshot rooted at the given directory.
+
+        Args:
+            root: Directory in which staged files are materialized
+        """
+        self.root = root
+        self.paths: List[str] = []
+        self.blob_shas: Dict[str, str] = {}
+
+    @classmethod
+    def create(cls) -> "StagedSnapshot":
+        """Materialize the staged changes of the current repository.
+
+        Returns:
+            StagedSnapshot holding the added, copied, modified and renamed files
+
+        Raises:
+            subprocess.SubprocessError: If git fails to list or read the index
+            OSError: If the snapshot directory cannot be written
+        """
+        snapshot = cls(tempfile.mkdtemp(prefix="quality-gate-"))
+        try:
+            staged = [path for _, path in list_staged_changes()]
+            support = [path for path in cls.SUPPORT_FILES if path not in staged]
+            written = snapshot._materialize(staged + support)
+            snapshot.paths = [path for path in staged if path in written]
+            snapshot._link_directories()
+        except Exception:
+            snapshot.cleanup()
+            raise
+        return snapshot
+
+    @classmethod
+    def from_blobs(
+        cls, blob_shas: Dict[str, str], paths: List[str]
+    ) -> "StagedSnapshot":
+        """Materialize content staged earlier, from the blob SHAs it had then.
+
+        Args:
+            blob_shas: Blob SHA of each file, as in ``blob_shas`` of the
+                snapshot taken then (including its support files)
+            paths: The staged files among them
+
+        Returns:
+            StagedSnapshot holding the files whose blobs still exist
+
+        Raises:
+            subprocess.SubprocessError: If git fails to read the blobs
+            OSError: If the snapshot directory cannot be written
+        """
+        snapshot = cls(tempfile.mkdtemp(prefix="quality-gate-"))
+        try:
+            written = snapshot._materialize(list(blob_shas), blob_shas)
+            snapshot.paths = [path for path in paths if path in written]
+            snapshot._link_directories()
+        except Exception:
+            snapshot.cleanup()
+            raise
+        return snapshot
+
+    def cleanup(self) -> None:
+        """Remove the snapshot directory."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _materialize(
+        self, paths: List[str], objects: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Write the index version of each path into the snapshot directory.
+
+        All blobs are requested from one ``git cat-file --batch`` process,
+        addressed as ``:<path>`` (stage 0 of the index) or by blob SHA.
+
+        Args:
+            paths: Repository-relative paths to read from the index
+            objects: Blob SHA to read for each path instead of its index entry
+
+        Returns:
+            Paths that exist in the index and were written
+        """
+        written = []
+        process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        try:
+            for path in paths:
+                # The batch protocol is line based; such paths cannot be requested
+                if "\n" in path:
+                    continue
+                name = objects[path] if objects is not None else f":{path}"
+                blob = self._read_blob(process, name)
+                if blob is None:
+                    continue
+                blob_sha, content = blob
+                target = os.path.join(self.root, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as handle:
+                    handle.write(content)
+                self.blob_shas[path] = blob_sha
+                written.append(path)
+        finally:
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
+        return written
+
+    @staticmethod
+    def _read_blob(process: subprocess.Popen, name: str) -> Optional[Tuple[str, bytes]]:
+        """Request one object from a running ``git cat-file --batch``.
+
+        Args:
+            process: Running cat-file process with piped stdin/stdout
+            name: Object name, e.g. ``:<path>`` for an index entry
+
+        Returns:
+            Tuple of (blob SHA, content), or None if the entry is missing or not a blob
+        """
+        process.stdin.write(f"{name}\n".encode())
+        process.stdin.flush()
+        header = process.stdout.readline().decode().split()
+        if len(header) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None
+        blob_sha, object_type, size = header
+        content = process.stdout.read(int(size))
+        process.stdout.read(1)  # Trailing newline after the object content
+        if object_type != "blob":
+            return None
+        return blob_sha, content
+
+    def _link_directories(self) -> None:
+        """Symlink dependency directories from the working tree into the snapshot."""
+        for name in self.LINKED_DIRECTORIES:
+            source = os.path.abspath(name)
+            if os.path.isdir(source):
+                try:
+                    os.symlink(source, os.path.join(self.root, name))
+                except OSError:
+                    pass
+
+
+def list_staged_changes() -> List[Tuple[str, str]]:
+    """List added, copied, modified and renamed files staged for commit.
+
+    Returns:
+        List of (status letter, repository-relative path) tuples. For renames
+        and copies the path is the destination path.
+
+    Raises:
+        subprocess.SubprocessError: If git fails
+    """
+    result = subprocess.run(
+        ["git", "diff", "--cached", "-z", "--name-status", "--diff-filter=ACMR"],
+        capture_output=True,
+        check=True,
+    )
+    return parse_name_status(result.stdout)
+
+
+def parse_name_status(output: bytes) -> List[Tuple[str, str]]:
+    """Parse the output of ``git diff -z --name-status``.
+
+    Args:
+        output: Raw output of git
+
+    Returns:
+        List of (status letter, repository-relative path) tuples. For renames
+        and copies the path is the destination path.
+    """
+    fields = output.decode("utf-8", "surrogateescape").split("\0")
+    changes = []
+    index = 0
+    while index < len(fields) and fields[index]:
+        status = fields[index][0]
+        # Renames and copies carry a score plus source and destination paths
+        if status in ("R", "C"):
+            changes.append((status, fields[index + 2]))
+            index += 3
+        else:
+            changes.append((status, fields[index + 1]))
+            index += 2
+    return changes
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Resolution of the analyzer executables, pinned in a manifest.
+
+Finding the analyzers on every commit is slow: ``npx`` alone takes hundreds of
+milliseconds and may go to the network, and asking each tool for its version
+costs a process start or more. The resolver looks each analyzer up once,
+records its absolute path, modification time and version in
+``.git/quality-gate-tools.json`` and reuses them until the manifest is
+invalidated. That happens when PATH, the working directory, ``package.json`` or
+``requirements.txt`` change, or when a resolved executable's modification time
+changes (e.g. after an upgrade).
+"""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from process_runner import run_captured
+
+
+class ResolvedTool(NamedTuple):
+    """An analyzer found on this machine.
+
+    Attributes:
+        name: Tool name, e.g. 'eslint'
+        command: Command prefix running the tool, starting with an absolute path
+        version: Output of the tool's ``--version``, or 'unknown'
+    """
+
+    name: str
+    command: List[str]
+    version: str
+
+
+class ToolResolver:
+    """Resolves analyzer executables and versions, backed by an on-disk manifest.
+
+    Resolution is lazy: a tool is looked up the first time it is needed, so
+    runs that do not use a tool never pay for it. Instances are safe to use
+    from the gate's worker threads.
+
+    Attributes:
+        manifest_path (Optional[str]): Manifest file, or None to keep the
+            resolutions in memory only (outside a git repository).
+    """
+
+    MANIFEST_NAME = "quality-gate-tools.json"
+    # Bumped whenever the layout of the manifest changes
+    FORMAT_VERSION = 1
+    # Seconds to wait for a tool to print its version
+    VERSION_TIMEOUT = 30
+
+    # Files whose modification invalidates every resolved tool
+    INPUT_FILES = ["package.json", "requirements.txt"]
+
+    def __init__(self, manifest_path: Optional[str] = None):
+        """Initialize a resolver.
+
+        Args:
+            manifest_path: File storing the resolutions between runs
+        """
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._tools: Optional[Dict[str, Dict[str, Any]]] = None
+        self._environment: Dict[str, Any] = {}
+        self._manifest_mtime: Optional[int] = None
+
+    @classmethod
+    def for_repository(cls, git_dir: Optional[str]) -> "ToolResolver":
+        """Create a resolver whose manifest lives in the repository's git directory.
+
+        Args:
+            git_dir: Git directory, or None outside a repository
+
+        Returns:
+            ToolResolver instance
+        """
+        if not git_dir:
+            return cls()
+        return cls(os.path.join(git_dir, cls.MANIFEST_NAME))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the resolver for worker processes, without its lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore a pickled resolver with a fresh lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def is_current(self) -> bool:
+        """Whether the resolutions held in memory may still be used.
+
+        A long-lived resolver (e.g. the daemon's) must be replaced once PATH,
+        the working directory or an input file changed, or another process
+        rewrote the manifest.
+        """
+        with self._lock:
+            if self._tools is None:
+                return True
+            if self._current_environment() != self._environment:
+                return False
+            return not self.manifest_path or (
+                _mtime(self.manifest_path) == self._manifest_mtime
+            )
+
+    def resolve(
+        self,
+        name: str,
+        candidates: Optional[List[List[str]]] = None,
+        version_arguments: Optional[List[str]] = None,
+    ) -> Optional[ResolvedTool]:
+        """Return the executable and version of a tool.
+
+        Args:
+            name: Tool name, e.g. 'semgrep'
+            candidates: Commands that may run the tool, in order of preference
+                (default: the tool name looked up on PATH). A first word
+                containing a path separator is relative to the working
+                directory; otherwise it is looked up on PATH.
+            version_arguments: Arguments making the tool print its version
+                (default: ``--version``)
+
+        Returns:
+            ResolvedTool, or None if the tool is not installed
+        """
+        with self._lock:
+            tools = self._load()
+            entry = tools.get(name)
+            if entry and _mtime(entry["executable"]) == entry["mtime"]:
+                return ResolvedTool(name, entry["command"], entry["version"])
+
+            found = self._discover(candidates or [[name]])
+            if found is None:
+                if tools.pop(name, None):
+                    self._save()
+                return None
+            command, executable = found
+            version = self._query_version(command, version_arguments or ["--version"])
+            if version is None:
+                # Not pinned, so the next run asks again
+                return ResolvedTool(name, command, "unknown")
+            tools[name] = {
+                "command": command,
+                "executable": executable,
+                "mtime": _mtime(executable),
+                "version": version,
+            }
+            self._save()
+            return ResolvedTool(name, command, version)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the manifest, discarding it if its environment changed."""
+        if self._tools is not None:
+            return self._tools
+        self._environment = self._current_environment()
+        self._tools = {}
+        if self.manifest_path:
+            self._manifest_mtime = _mtime(self.manifest_path)
+            try:
+                with open(self.manifest_path, encoding="utf-8") as handle:
+                    manifest = json.load(handle)
+            except (OSError, ValueError):
+                manifest = None
+            if (
+                isinstance(manifest, dict)
+                and manifest.get("format") == self.FORMAT_VERSION
+                and manifest.get("environment") == self._environment
+                and isinstance(manifest.get("tools"), dict)
+            ):
+                self._tools = manifest["tools"]
+        return self._tools
+
+    def _current_environment(self) -> Dict[str, Any]:
+        """Describe the environment that the resolutions depend on."""
+        return {
+            "root": os.getcwd(),
+            "path": os.environ.get("PATH", ""),
+            "inputs": {path: _mtime(path) for path in self.INPUT_FILES},
+        }
+
+    def _save(self) -> None:
+        """Atomically write the manifest, ignoring errors (it is only a cache)."""
+        if not self.manifest_path:
+            return
+        manifest = {
+            "format": self.FORMAT_VERSION,
+            "environment": self._environment,
+            "tools": self._tools,
+        }
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.manifest_path), suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(manifest, handle, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_mtime = _mtime(self.manifest_path)
+        except OSError:
+            pass
+
+    def _discover(self, candidates: List[List[str]]) -> Optional[Tuple[List[str], str]]:
+        """Find the preferred installed command for a tool.
+
+        Args:
+            candidates: Commands that may run the tool, in order of preference
+
+        Returns:
+            Tuple of the command prefix and the executable it starts, or None
+        """
+        for candidate in candidates:
+            program = candidate[0]
+            if os.sep in program:
+                executable = os.path.abspath(program)
+                if not (os.path.isfile(executable) and os.access(executable, os.X_OK)):
+                    continue
+            else:
+                executable = shutil.which(program)
+                if not executable:
+                    continue
+            return [executable] + candidate[1:], executable
+        return None
+
+    def _query_version(self, command: List[str], arguments: List[str]) -> Optional[str]:
+        """Ask a tool for its version.
+
+        Args:
+            command: Command prefix running the tool
+            arguments: Arguments making the tool print its version
+
+        Returns:
+            Version text ('unknown' if the tool printed nothing or failed),
+            or None if it did not answer in time
+        """
+        try:
+            result, _ = run_captured(
+                command + arguments,
+                deadline=time.monotonic() + self.VERSION_TIMEOUT,
+            )
+        except subprocess.TimeoutExpired:
+            return None
+        except (OSError, subprocess.SubprocessError):
+            return "unknown"
+        return (result.stdout or result.stderr).strip() or "unknown"
+
+
+def _mtime(path: str) -> Optional[int]:
+    """Return a file's modification time in nanoseconds, or None if missing."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Per-tool results of a quality gate run.
+
+Each analyzer run collects its findings into its own ToolResult, so analyzers
+can run concurrently (in threads or worker processes) without sharing mutable
+state. The quality gate merges the results afterwards.
+"""
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from findings import ERROR, WARNING, Finding
+from gate_profiler import Span
+from hunk_index import HunkIndex
+
+
+class ToolResult:
+    """Errors and warnings produced by a single validation tool.
+
+    Each tool run collects its findings into its own ToolResult so tools can
+    run concurrently without sharing mutable state. QualityGate merges the
+    results into its ``errors``/``warnings`` lists in a fixed tool order.
+
+    Attributes:
+        tool_name (str): Name of the tool that produced the findings.
+        errors (List[Finding]): Errors reported by the tool.
+        warnings (List[Finding]): Warnings reported by the tool.
+        complete (bool): False if the tool failed to run or its output could
+            not be parsed, in which case the findings must not be cached.
+        file_findings (Dict[str, List[Finding]]): Findings attributed to each
+            scanned file, keyed by its path relative to the directory the tool
+            ran in. These include findings hidden by the hunk filter, so they
+            can be cached.
+        hunks (Optional[HunkIndex]): When set, findings on files touched by
+            the diff are only reported if they overlap a changed hunk.
+        suppressed (int): Number of findings hidden by the hunk filter.
+        spans (List[Span]): Profiling measurements of the tool's invocations.
+        interrupted (Optional[str]): Why the tool was stopped or skipped
+            before finishing (timeout, time budget, fail-fast), or None.
+        seconds (float): Wall time spent running the tool.
+        file_seconds (Dict[str, float]): Share of that time attributed to
+            each scanned file, in proportion to its size.
+        memory (List[Tuple[int, int]]): Input size and peak resident memory,
+            in KB, of each completed invocation of the tool.
+        listener (Optional[Callable[[Finding], None]]): Called with each
+            reported finding as soon as it is recorded (not pickled).
+    """
+
+    def __init__(
+        self,
+        tool_name: str,
+        root: Optional[str] = None,
+        hunks: Optional[HunkIndex] = None,
+        listener: Optional[Callable[[Finding], None]] = None,
+    ):
+        """Initialize an empty result for the given tool.
+
+        Args:
+            tool_name: Name of the tool that produces the findings
+            root: Directory the tool runs in (default: current directory)
+            hunks: Changed line ranges used to filter findings (diff-aware mode)
+            listener: Called with each reported finding as soon as it is found
+        """
+        self.tool_name = tool_name
+        self.root = root
+        self.hunks = hunks
+        self.errors: List[Finding] = []
+        self.warnings: List[Finding] = []
+        self.complete = True
+        self.suppressed = 0
+        self.file_findings: Dict[str, List[Finding]] = {}
+        self.spans: List[Span] = []
+        self.interrupted: Optional[str] = None
+        self.seconds = 0.0
+        self.file_seconds: Dict[str, float] = {}
+        self.memory: List[Tuple[int, int]] = []
+        self.listener = listener
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the result for the parent process, without its listener."""
+        state = self.__dict__.copy()
+        state["listener"] = None
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON-serializable form sent by distributed-scan workers.
+
+        Only what the gate merges is kept: the reported findings, whether the
+        run completed and why it was interrupted.
+        """
+        return {
+            "tool": self.tool_name,
+            "complete": self.complete,
+            "interrupted": self.interrupted,
+            "suppressed": self.suppressed,
+            "seconds": self.seconds,
+            "file_seconds": self.file_seconds,
+            "memory": self.memory,
+            "findings": [
+                [finding.path] + finding.to_row()
+                for finding in self.errors + self.warnings
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolResult":
+        """Rebuild a result from ``to_dict()`` output.
+
+        Args:
+            data: Serialized result
+
+        Returns:
+            ToolResult holding the same findings
+
+        Raises:
+            KeyError, TypeError, ValueError: If the data is malformed
+        """
+        result = cls(str(data["tool"]))
+        result.complete = bool(data["complete"])
+        result.interrupted = data.get("interrupted")
+        result.suppressed = int(data.get("suppressed", 0))
+        result.seconds = float(data.get("seconds", 0.0))
+        result.file_seconds = {
+            str(path): float(seconds)
+            for path, seconds in data.get("file_seconds", {}).items()
+        }
+        result.memory = [
+            (int(size), int(peak)) for size, peak in data.get("memory", [])
+        ]
+        for row in data["findings"]:
+            finding = Finding.from_row(result.tool_name, row[0], row[1:])
+            if finding.is_error:
+                result.errors.append(finding)
+            else:
+                result.warnings.append(finding)
+        return result
+
+    def add_time(self, seconds: float, files: List[str], sizes: List[int]) -> None:
+        """Record the wall time of one invocation of the tool.
+
+        The time is split across the invocation's files in proportion to
+        their size, as an estimate of what each file costs the tool.
+
+        Args:
+            seconds: Wall time of the invocation
+            files: Files the invocation scanned
+            sizes: Size of each file in bytes
+        """
+        self.seconds += seconds
+        weights = [max(1, size) for size in sizes]
+        total = sum(weights)
+        for path, weight in zip(files, weights):
+            self.file_seconds[path] = (
+                self.file_seconds.get(path, 0.0) + seconds * weight / total
+            )
+
+    def interrupt(self, reason: str) -> None:
+        """Mark the tool as stopped early; its findings are partial.
+
+        Args:
+            reason: Why the tool did not finish
+        """
+        self.complete = False
+        if self.interrupted is None:
+            self.interrupted = reason
+
+    def add_error(
+        self,
+        message: str,
+        path: Optional[str] = None,
+        line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        rule: str = "",
+    ) -> None:
+        """Record an error, attributing it to a file when one is given.
+
+        Args:
+            message: Description of the error (the complete text if no path)
+            path: File the error was reported for, as printed by the tool
+            line: First line the error covers
+            end_line: Last line the error covers (default: ``line``)
+            rule: Tool-specific rule id
+        """
+        self.add_finding(self._finding(message, path, line, end_line, rule, ERROR))
+
+    def add_warning(
+        self,
+        message: str,
+        path: Optional[str] = None,
+        line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        rule: str = "",
+    ) -> None:
+        """Record a warning, attributing it to a file when one is given.
+
+        Args:
+            message: Description of the warning (the complete text if no path)
+            path: File the warning was reported for, as printed by the tool
+            line: First line the warning covers
+            end_line: Last line the warning covers (default: ``line``)
+            rule: Tool-specific rule id
+        """
+        self.add_finding(self._finding(message, path, line, end_line, rule, WARNING))
+
+    def add_issue(
+        self,
+        severity: str,
+        message: str,
+        path: Optional[str] = None,
+        line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        rule: str = "",
+    ) -> None:
+        """Record a finding whose severity was mapped by the analyzer.
+
+        Args:
+            severity: ERROR or WARNING
+            message: Description of the issue (the complete text if no path)
+            path: File the issue was reported for, as printed by the tool
+            line: First line the issue covers
+            end_line: Last line the issue covers (default: ``line``)
+            rule: Tool-specific rule id
+        """
+        self.add_finding(self._finding(message, path, line, end_line, rule, severity))
+
+    def add_finding(self, finding: Finding) -> None:
+        """Record a finding whose path is already relative to the tool's directory.
+
+        Args:
+            finding: Finding reported by this tool
+        """
+        if finding.path:
+            self.file_findings.setdefault(finding.path, []).append(finding)
+        if self._is_reported(finding):
+            if finding.is_error:
+                self.errors.append(finding)
+            else:
+                self.warnings.append(finding)
+            if self.listener:
+                self.listener(finding)
+
+    def _finding(
+        self,
+        message: str,
+        path: Optional[str],
+        line: Optional[int],
+        end_line: Optional[int],
+        rule: str,
+        severity: str,
+    ) -> Finding:
+        """Build a Finding of this tool with a normalized path."""
+        relative = self.relative_path(path) if path else None
+        return Finding(
+            self.tool_name, relative, line, end_line, rule, severity, message
+        )
+
+    def _is_reported(self, finding: Finding) -> bool:
+        """Apply the hunk filter to a finding.
+
+        Findings without a location, and findings in files the diff does not
+        touch (e.g. explicitly requested files), are always reported.
+        """
+        if not self.hunks or not finding.path or not finding.line:
+            return True
+        if finding.path not in self.hunks:
+            return True
+        if self.hunks.overlaps(finding.path, finding.line, finding.end_line):
+            return True
+        self.suppressed += 1
+        return False
+
+    def relative_path(self, path: str) -> str:
+        """Normalize a path printed by the tool relative to the tool's directory.
+
+        Args:
+            path: Relative or absolute path of a scanned file
+
+        Returns:
+            Normalized path relative to the tool's working directory
+        """
+        root = self.root or os.getcwd()
+        return os.path.relpath(os.path.join(root, path), root)
@@ -25,6 +25,12 @@ VSCODE_CONFIG="$SCRIPT_DIR/config/pre-commit-vscode.yaml"
 TERMINAL_CONFIG="$SCRIPT_DIR/config/pre-commit-terminal.yaml"
 PRE_COMMIT_CONFIG="$SCRIPT_DIR/.pre-commit-config.yaml"
 
+# Analyzers each mode leaves to the background check after the commit
+# (QUALITY_GATE_SLOW_TIER): 'Name' always, 'Name:KB' above KB of input.
+# The others block the commit.
+VSCODE_SLOW_TIER="Horusec"
+TERMINAL_SLOW_TIER="Semgrep,Horusec,ESLint:512"
+
 install_horusec() {
   if ! command -v horusec &> /dev/null; then
     echo -e "${YELLOW}Horusec not found. Installing...${NC}"
@@ -40,6 +46,13 @@ install_horusec() {
   fi
 }
 
+# Show which hook runs each analyzer under the new configuration. The configs
+# run every analyzer once, in the quality gate (--run-plan), and their analyzer
+# hooks replay its results instead of running the tools again.
+show_run_plan() {
+  (cd "$SCRIPT_DIR" && python3 src/quality_gate.py plan) || true
+}
+
 switch_to_vscode_mode() {
   echo -e "${BLUE}${BOLD}Switching to VS Code-compatible mode...${NC}"
   cp "$VSCODE_CONFIG" "$PRE_COMMIT_CONFIG"
@@ -57,9 +70,11 @@ DISABLE_LIZARD=1
 DISABLE_BANDIT=1
 DISABLE_SEMGREP=1
 EOF
+  echo "QUALITY_GATE_SLOW_TIER=$VSCODE_SLOW_TIER" >> "$SCRIPT_DIR/.env"
+  echo -e "${YELLOW}Checked in the background after each commit: $VSCODE_SLOW_TIER${NC}"
 
-  # Install pre-commit hooks
-  pre-commit uninstall &>/dev/null || true
+  # Install the pre-commit and pre-push hooks (see default_install_hook_types)
+  pre-commit uninstall -t pre-commit -t pre-push &>/dev/null || true
   pre-commit install -f
 
   # Reinstall auto-stage hook if it exists
@@ -67,6 +82,8 @@ EOF
     "$SCRIPT_DIR/src/auto_stage_hook.sh" --quiet
   fi
 
+  show_run_plan
+
   echo -e "${GREEN}Configuration complete. You can now use VS Code source control without SSL errors.${NC}"
 }
 
@@ -75,16 +92,21 @@ switch_to_terminal_mode() {
   cp "$TERMINAL_CONFIG" "$PRE_COMMIT_CONFIG"
   echo -e "${GREEN}Terminal mode activated!${NC}"
   echo -e "${YELLOW}All validators including ESLint are enabled.${NC}"
+  echo -e "${YELLOW}Checked in the background after each commit: $TERMINAL_SLOW_TIER${NC}"
 
-  # Remove .env file if it exists
-  if [ -f "$SCRIPT_DIR/.env" ]; then
-    rm "$SCRIPT_DIR/.env"
-  fi
+  # Replace the VS Code .env file; only the background tier is set
+  cat > "$SCRIPT_DIR/.env" << EOF
+# Created by switch_mode.sh
+# Analyzers checked in the background after the commit instead of blocking it
+QUALITY_GATE_SLOW_TIER=$TERMINAL_SLOW_TIER
+EOF
 
-  # Install pre-commit hooks
-  pre-commit uninstall &>/dev/null || true
+  # Install the pre-commit and pre-push hooks (see default_install_hook_types)
+  pre-commit uninstall -t pre-commit -t pre-push &>/dev/null || true
   pre-commit install -f
 
+  show_run_plan
+
   echo -e "${GREEN}Configuration complete. You now have full validation capabilities in the terminal.${NC}"
 }
 
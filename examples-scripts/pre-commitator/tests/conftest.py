@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Shared setup of the quality gate's unit tests.
+
+The other files in this directory are sample inputs for run_tests.sh; the
+``test_*.py`` modules with test functions are the unit tests, run with
+``python3 -m pytest tests``. Tools are replaced by the benchmark stand-ins in
+``benchmarks/bin``, so the tests need neither the real tools nor a network.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_BIN = os.path.join(ROOT, "benchmarks", "bin")
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+@pytest.fixture(autouse=True)
+def clean_environment(monkeypatch):
+    """Keep the developer's quality gate settings out of the tests."""
+    for name in list(os.environ):
+        if name.startswith(("QUALITY_GATE_", "DISABLE_", "PRE_COMMIT_")):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("QUALITY_GATE_NO_CACHE", "1")
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Empty git repository, made the working directory."""
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    monkeypatch.chdir(tmp_path)
+    for variable in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{variable}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{variable}_EMAIL", "test@example.com")
+    return tmp_path
+
+
+@pytest.fixture
+def stub_tools(monkeypatch):
+    """Run the analyzers' tools as the benchmark stand-ins."""
+    monkeypatch.setenv("PATH", STUB_BIN + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("QUALITY_GATE_IN_PROCESS", "0")
+
+
+def stage(path: str, content: str) -> None:
+    """Write a file in the current repository and stage it."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+    subprocess.run(["git", "add", "--", path], check=True)
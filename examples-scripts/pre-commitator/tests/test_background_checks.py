@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the background checks of slow analyzers.
+"""
+
+import fcntl
+import os
+import subprocess
+import time
+
+import pytest
+from conftest import stage
+
+import background_checks
+import quality_gate
+from background_checks import BackgroundChecks, background_main, slow_tier
+from findings import ERROR, WARNING
+from quality_gate import QualityGate
+
+
+def commit(message: str = "change") -> None:
+    """Commit the staged changes."""
+    subprocess.run(["git", "commit", "-q", "-m", message], check=True)
+
+
+def blob_sha(path: str) -> str:
+    """Blob SHA of a file's staged content."""
+    return subprocess.run(
+        ["git", "rev-parse", f":{path}"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def queue(checks: BackgroundChecks, paths, analyzers=("Semgrep",)):
+    """Queue a job for the staged content of some files."""
+    job = checks.enqueue(
+        list(analyzers), list(paths), {path: blob_sha(path) for path in paths}
+    )
+    # Job ids have millisecond resolution
+    time.sleep(0.002)
+    return job
+
+
+def finds(*rows):
+    """Job check adding the given (path, severity, message) findings."""
+
+    def check(job):
+        job["findings"] = [
+            ["Semgrep", path, 1, 1, "rule", severity, message]
+            for path, severity, message in rows
+        ]
+
+    return check
+
+
+@pytest.fixture
+def checks(git_repo):
+    """Empty background queue of a new repository."""
+    return BackgroundChecks.for_repository(str(git_repo / ".git"))
+
+
+def test_slow_tier(monkeypatch):
+    analyzers = QualityGate(jobs=1).analyzers
+    assert slow_tier(analyzers) == {"ESLint": 512.0, "Semgrep": 0.0, "Horusec": 0.0}
+    monkeypatch.setenv(
+        background_checks.SLOW_TIER_VARIABLE, "semgrep, Lizard:64,Bogus,Bandit:x"
+    )
+    assert slow_tier(analyzers) == {"Semgrep": 0.0, "Lizard": 64.0, "Bandit": 0.0}
+    monkeypatch.setenv(background_checks.SLOW_TIER_VARIABLE, "")
+    assert slow_tier(analyzers) == {}
+
+
+def test_jobs_run_in_order_and_are_shown_once(checks):
+    stage("a.py", "x = 1\n")
+    first = queue(checks, ["a.py"])
+    second = queue(checks, ["a.py"], ["Horusec"])
+    assert [job["id"] for job in checks.unfinished()] == [first["id"], second["id"]]
+    assert checks.show_news()[-1].startswith("\n⏳ Background checks of 2 earlier")
+
+    checks.run_pending(finds(("a.py", ERROR, "eval"), ("a.py", WARNING, "md5")))
+    assert checks.unfinished() == []
+    news = checks.show_news()
+    assert news[0] == (
+        "\n📬 Background checks (Horusec, Semgrep) of 2 earlier commit(s): "
+        "2 error(s), 2 warning(s)"
+    )
+    assert news[1].startswith("  🚫 Semgrep: a.py:1 - eval")
+    assert checks.show_news() == []
+
+
+def test_jobs_left_running_are_run_again(checks):
+    stage("a.py", "x = 1\n")
+    job = queue(checks, ["a.py"])
+    job["state"] = "running"
+    checks._write(job)
+    ran = []
+    assert checks.run_pending(lambda job: ran.append(job["id"]))
+    assert ran == [job["id"]]
+
+
+def test_pre_push_gives_up_waiting_for_a_running_worker(checks, monkeypatch):
+    monkeypatch.setattr(background_checks, "WAIT_INTERVAL", 0.05)
+    os.makedirs(checks.directory)
+    with open(os.path.join(checks.directory, "worker.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # flock locks belong to the open file, so a second open must wait
+        start = time.monotonic()
+        assert not checks.run_pending(finds(), timeout=0.2)
+        assert 0.2 <= time.monotonic() - start < 2
+
+
+def test_only_the_recent_finished_jobs_are_kept(checks, monkeypatch):
+    monkeypatch.setattr(background_checks, "MAX_FINISHED_JOBS", 2)
+    stage("a.py", "x = 1\n")
+    jobs = [queue(checks, ["a.py"]) for _ in range(4)]
+    checks.run_pending(finds())
+    assert [job["id"] for job in checks.jobs()] == [job["id"] for job in jobs[2:]]
+
+
+def test_errors_count_while_the_pushed_content_is_unchanged(checks):
+    stage("a.py", "x = eval(input())\n")
+    stage("b.py", "y = 1\n")
+    commit("initial")
+    queue(checks, ["a.py", "b.py"])
+    checks.run_pending(
+        finds(("a.py", ERROR, "eval"), ("b.py", WARNING, "style"), ("b.py", ERROR, "x"))
+    )
+    assert [f.message for f in checks.errors_in("HEAD")] == ["eval", "x"]
+    # Only the files changed since the base count
+    assert checks.errors_in("HEAD", "HEAD") == []
+
+    stage("b.py", "y = 2\n")
+    commit("fix b.py")
+    assert [f.message for f in checks.errors_in("HEAD")] == ["eval"]
+    assert [f.message for f in checks.errors_in("HEAD", "HEAD~1")] == []
+
+
+def test_deferred_checks_block_the_push(git_repo, stub_tools, monkeypatch, capsys):
+    workers = []
+    monkeypatch.setattr(
+        BackgroundChecks, "start_worker", lambda self: workers.append(self)
+    )
+    stage("README.md", "# Project\n")
+    commit("initial")
+    base = subprocess.run(
+        ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+    # The fast tier passes; Semgrep and Horusec are left to the background
+    stage("app.py", "result = eval(input())\n")
+    gate = QualityGate(jobs=2, defer_slow=True)
+    success, messages = gate.run_all_checks()
+    assert success and sorted(gate.background) == ["Horusec", "Semgrep"]
+    assert any("will check this commit in the background" in m for m in messages)
+    assert len(workers) == 1
+    commit("add app.py")
+
+    assert background_main(["pre-push", "--base", base]) == 1
+    output = capsys.readouterr().out
+    assert "🚫 ERRORS found by the background checks:" in output
+    assert "Horusec: app.py:1" in output
+
+    assert background_main(["status"]) == 0
+    assert "(Semgrep, Horusec): 1 error(s)" in capsys.readouterr().out
+    # The remote already has the commit: nothing new is pushed
+    assert background_main(["pre-push", "--base", "HEAD"]) == 0
+
+    # The next commit shows the results
+    stage("lib.py", "x = 1\n")
+    lines = []
+    args = quality_gate.build_parser().parse_args(["--defer-slow", "--no-progress"])
+    quality_gate.run(args, emit=lines.append)
+    assert any(line.startswith("\n📬 Background checks") for line in lines)
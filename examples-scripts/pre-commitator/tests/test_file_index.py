@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the classification of the files a run checks.
+"""
+from conftest import stage
+
+from file_index import MINIFIED_LONGEST_LINE, FileIndex, FileInfo
+
+SNIFF = frozenset({".py", ".js"})
+
+
+def classify(files, cached: bool = False):
+    """Index files and return each one's (extension, exclusion reason)."""
+    index = FileIndex.build(files, sniff=SNIFF, cached=cached)
+    return {path: (info.extension, info.excluded) for path, info in index.files.items()}
+
+
+def test_languages_and_exclusions(git_repo, monkeypatch):
+    monkeypatch.setenv("QUALITY_GATE_MAX_FILE_KB", "1")
+    stage("app.py", "print('app')\n")
+    stage("tool", "#!/usr/bin/env python3\nprint('tool')\n")
+    stage("run", "#!/usr/local/bin/node18\nconsole.log(1)\n")
+    stage("notes", "plain text\n")
+    stage("node_modules/lib/index.js", "module.exports = 1;\n")
+    stage("static/app.min.js", "var a = 1;\n")
+    stage("bundle.js", "var a=1;" * (MINIFIED_LONGEST_LINE // 8 + 1) + "\n")
+    stage("huge.py", "x = 1\n" * 200)
+    stage("README.md", "# Read me\n" * 200)
+    files = [
+        "app.py",
+        "tool",
+        "run",
+        "notes",
+        "node_modules/lib/index.js",
+        "static/app.min.js",
+        "bundle.js",
+        "huge.py",
+        "README.md",
+    ]
+    assert classify(files) == {
+        "app.py": (".py", ""),
+        "tool": (".py", ""),
+        "run": (".js", ""),
+        "notes": ("", ""),
+        "node_modules/lib/index.js": (".js", "vendored"),
+        "static/app.min.js": (".js", "minified"),
+        "bundle.js": (".js", "minified"),
+        "huge.py": (".py", "oversize"),
+        # Only files some analyzer handles are read
+        "README.md": (".md", ""),
+    }
+
+
+def test_gitattributes_exclude_and_keep_files(git_repo):
+    stage(
+        ".gitattributes",
+        "gen/** linguist-generated\n"
+        "vendor/ours/** -linguist-vendored\n"
+        "third/** linguist-vendored=true\n"
+        "dist/keep.min.js linguist-generated=false\n",
+    )
+    for path in ("gen/api.py", "vendor/ours/a.py", "vendor/b.py", "third/c.py"):
+        stage(path, "x = 1\n")
+    stage("dist/keep.min.js", "var a = 1;\n")
+    assert classify(
+        [
+            "gen/api.py",
+            "vendor/ours/a.py",
+            "vendor/b.py",
+            "third/c.py",
+            "dist/keep.min.js",
+        ]
+    ) == {
+        "gen/api.py": (".py", "generated"),
+        "vendor/ours/a.py": (".py", ""),
+        "vendor/b.py": (".py", "vendored"),
+        "third/c.py": (".py", "vendored"),
+        "dist/keep.min.js": (".js", ""),
+    }
+
+
+def test_staged_gitattributes_are_read_with_cached(git_repo):
+    stage(".gitattributes", "gen.py linguist-generated\n")
+    stage("gen.py", "x = 1\n")
+    with open(".gitattributes", "w", encoding="utf-8") as handle:
+        handle.write("")
+    assert classify(["gen.py"]) == {"gen.py": (".py", "")}
+    assert classify(["gen.py"], cached=True) == {"gen.py": (".py", "generated")}
+
+
+def test_select_buckets_and_exclusions():
+    index = FileIndex(
+        [
+            FileInfo("b.py", ".py", 10, ""),
+            FileInfo("a.js", ".js", 20, ""),
+            FileInfo("c.py", ".py", 30, "vendored"),
+            FileInfo("tool", ".py", 40, ""),
+            FileInfo("d.min.js", ".js", 50, "minified"),
+        ]
+    )
+    assert index.buckets == {".py": ["b.py", "tool"], ".js": ["a.js"]}
+    assert index.select(frozenset({".js", ".py"})) == ["b.py", "a.js", "tool"]
+    assert index.select(frozenset({".py"}), ["tool", "c.py", "new.py", "x.js"]) == [
+        "tool",
+        "new.py",
+    ]
+    assert index.included() == ["b.py", "a.js", "tool"]
+    assert index.exclusions() == {"vendored": 1, "minified": 1}
+    assert index.size("c.py") == 30 and index.size("missing.py") == 0
+    assert list(index.subset(["tool", "a.js", "missing.py"]).files) == ["tool", "a.js"]
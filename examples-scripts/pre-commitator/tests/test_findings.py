@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for findings and the merging of duplicates across tools.
+"""
+from typing import List, Tuple
+
+import pytest
+
+from findings import ERROR, WARNING, Finding, normalize_rule
+from quality_gate import QualityGate
+from tool_result import ToolResult
+
+# (line, rule, severity, message) of one finding on app.py
+Row = Tuple[int, str, str, str]
+
+
+@pytest.fixture
+def gate(git_repo):
+    """Quality gate with empty results."""
+    gate = QualityGate(jobs=1)
+    gate._reset_results()
+    return gate
+
+
+def merge(gate: QualityGate, tool: str, rows: List[Row]) -> None:
+    """Merge one tool's findings on app.py into the gate."""
+    result = ToolResult(tool)
+    for line, rule, severity, message in rows:
+        result.add_issue(severity, message, "app.py", line, rule=rule)
+    gate._merge_result(result)
+
+
+def test_normalize_rule_maps_tool_rule_ids_to_shared_names():
+    assert normalize_rule("python.lang.security.audit.eval-detected") == "eval"
+    assert normalize_rule("security/detect-eval-with-expression") == "eval"
+    assert normalize_rule("B307") == "eval"
+    assert normalize_rule("no_unused_vars") == "no-unused-vars"
+
+
+def test_finding_row_round_trip():
+    finding = Finding("Bandit", "app.py", 3, 4, "B307", ERROR, "eval")
+    copy = Finding.from_row("Bandit", "app.py", finding.to_row())
+    assert copy.to_row() == finding.to_row()
+    assert Finding.notice("no tool").dedup_key() is None
+
+
+def test_same_tool_findings_on_one_line_are_kept(gate):
+    merge(
+        gate,
+        "ESLint",
+        [
+            (3, "no-unused-vars", WARNING, "'a' is defined but never used."),
+            (3, "no-unused-vars", WARNING, "'b' is defined but never used."),
+        ],
+    )
+    merge(
+        gate,
+        "Lizard",
+        [
+            (9, "lizard-thresholds", WARNING, "f has 90 CCN"),
+            (9, "lizard-thresholds", WARNING, "g has 40 CCN"),
+        ],
+    )
+    assert len(gate.warnings) == 4
+    assert gate.duplicates == 0
+
+
+def test_other_tool_reporting_the_same_issue_is_merged(gate):
+    merge(gate, "Bandit", [(5, "B307", WARNING, "Use of eval")])
+    merge(gate, "Semgrep", [(5, "eval-detected", ERROR, "Detected eval")])
+    assert gate.warnings == []
+    [finding] = gate.errors
+    assert finding.tool == "Bandit"
+    assert finding.also_reported_by == ("Semgrep",)
+    assert gate.duplicates == 1
+
+
+def test_repeated_issue_pairs_up_across_tools(gate):
+    merge(gate, "Bandit", [(5, "B307", ERROR, "eval 1"), (5, "B307", ERROR, "eval 2")])
+    merge(
+        gate,
+        "Semgrep",
+        [(5, "eval-detected", ERROR, "eval 1"), (5, "eval-detected", ERROR, "eval 2")],
+    )
+    assert [finding.also_reported_by for finding in gate.errors] == [
+        ("Semgrep",),
+        ("Semgrep",),
+    ]
+    assert gate.duplicates == 2
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the objects the quality gate daemon keeps across requests.
+"""
+import json
+import os
+import socket
+
+import pytest
+from conftest import stage
+
+from gate_daemon import GateDaemon
+from semgrep_rules import SemgrepRuleStore
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="the daemon needs Unix domain sockets"
+)
+
+
+@pytest.fixture
+def daemon(git_repo, stub_tools):
+    """Daemon for the test repository, not listening on its socket."""
+    return GateDaemon(".git", idle_timeout=1)
+
+
+def request(daemon: GateDaemon, argv):
+    """Serve one request and return the daemon's answer lines."""
+    client, server = socket.socketpair()
+    with client:
+        with server:
+            payload = {"argv": argv, "cwd": os.getcwd(), "env": {}}
+            client.sendall(json.dumps(payload).encode() + b"\n")
+            daemon._handle(server)
+        with client.makefile("rb") as answers:
+            return [json.loads(line) for line in answers]
+
+
+def test_requests_reuse_the_resident_objects(daemon):
+    stage("app.py", "result = eval(input())\n")
+    argv = ["--no-progress", "app.py"]
+
+    first = request(daemon, argv)
+    assert first[-1] == {"exit": 1}
+    resident = (daemon.tools, daemon.cache, daemon.semgrep_rules)
+    assert daemon.tools._tools, "the first request resolved the tools"
+
+    second = request(daemon, argv)
+    assert second[-1] == {"exit": 1}
+    assert (daemon.tools, daemon.cache, daemon.semgrep_rules) == resident
+    assert [line for line in first if "eval" in str(line)] == [
+        line for line in second if "eval" in str(line)
+    ]
+
+
+def test_stale_objects_are_replaced(daemon, monkeypatch, tmp_path):
+    daemon._resident_objects()
+    tools, cache, rules = daemon.tools, daemon.cache, daemon.semgrep_rules
+    tools.resolve("semgrep")
+    rules.is_available()
+    assert daemon._resident_objects() == {
+        "tools": tools,
+        "cache": cache,
+        "semgrep_rules": rules,
+    }
+
+    monkeypatch.setenv("PATH", os.environ["PATH"] + os.pathsep + str(tmp_path))
+    monkeypatch.setenv("QUALITY_GATE_CACHE_MAX_MB", "5")
+    shared = tmp_path / "rules"
+    monkeypatch.setenv("QUALITY_GATE_SEMGREP_RULES", str(shared))
+    daemon._resident_objects()
+    assert daemon.tools is not tools
+    assert daemon.cache is not cache
+    assert daemon.cache.max_bytes == 5 * 1024 * 1024
+    assert daemon.semgrep_rules.directory == str(shared)
+
+    # A snapshot refreshed by another process replaces the store's index
+    rules = daemon.semgrep_rules
+    assert not rules.is_available()
+    shared.mkdir()
+    (shared / SemgrepRuleStore.INDEX_FILENAME).write_text(
+        json.dumps({"languages": {"python": {"file": "python.yaml", "sha256": "0"}}})
+    )
+    daemon._resident_objects()
+    assert daemon.semgrep_rules is not rules
+    assert daemon.semgrep_rules.is_available()
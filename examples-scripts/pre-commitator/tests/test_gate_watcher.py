@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for watch mode's change detection, debouncing and pre-scans.
+"""
+import os
+import subprocess
+
+import pytest
+from conftest import stage
+
+import gate_watcher
+from gate_watcher import FileWatcher, InotifySource, PollingSource
+from result_cache import ResultCache
+
+
+class ScriptedSource:
+    """Change source replaying a list of changes, then stopping the watcher."""
+
+    name = "scripted"
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.timeouts = []
+        self.closed = False
+
+    def wait(self, timeout):
+        self.timeouts.append(timeout)
+        if not self.changes:
+            raise KeyboardInterrupt
+        return self.changes.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def committed(git_repo):
+    """Repository with a committed app.py."""
+    stage("app.py", "print('app')\n")
+    subprocess.run(["git", "commit", "-q", "-m", "initial"], check=True)
+    return git_repo
+
+
+def save(path: str, content: str) -> None:
+    """Write a file in the working tree without staging it."""
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+
+
+def test_changed_tracked_files(committed):
+    save("app.py", "print('changed')\n")
+    stage("lib/new.py", "x = 1\n")
+    save("untracked.py", "x = 2\n")
+    assert gate_watcher.changed_tracked_files() == ["app.py", "lib/new.py"]
+
+
+def test_polling_reports_each_save(committed):
+    source = PollingSource(interval=0.05)
+    assert source.wait(0.2) == set()
+    save("app.py", "print('changed')\n")
+    assert source.wait(1) == {"app.py"}
+    # Saving an already modified file again is a change too
+    save("app.py", "print('changed again')\n")
+    assert source.wait(1) == {"app.py"}
+    save("untracked.py", "x = 1\n")
+    assert source.wait(0.2) == set()
+
+
+def test_inotify_reports_writes_to_tracked_files(committed):
+    try:
+        source = InotifySource(gate_watcher._absolute_git_dir())
+    except OSError as e:
+        pytest.skip(f"inotify unavailable: {e}")
+    try:
+        assert source.wait(0.1) == set()
+        save("untracked.py", "x = 1\n")
+        save("app.py", "print('changed')\n")
+        assert source.wait(1) == {"app.py"}
+        # Staging a file in a new directory makes it tracked and watched
+        stage("lib/new.py", "x = 1\n")
+        assert source.wait(1) == set()
+        save("lib/new.py", "x = 2\n")
+        assert source.wait(1) == {"lib/new.py"}
+    finally:
+        source.close()
+
+
+def test_bursts_of_saves_are_scanned_once_settled(committed, monkeypatch):
+    scans = []
+    monkeypatch.setattr(FileWatcher, "scan", lambda self, paths: scans.append(paths))
+    watcher = FileWatcher(debounce=0.5, poll=True, emit=lambda line: None)
+    watcher.source = source = ScriptedSource(
+        [{"b.py"}, {"a.py", "b.py"}, set(), {"c.py"}, set()]
+    )
+    with pytest.raises(KeyboardInterrupt):
+        watcher.run()
+    assert scans == [["a.py", "b.py"], ["c.py"]]
+    # Nothing pending: wait for a change; then wait out the debounce delay
+    assert source.timeouts[0] is None and source.timeouts[3] is None
+    assert all(0 < timeout <= 0.5 for timeout in source.timeouts[1:3])
+    assert source.closed
+
+
+def test_files_changed_before_watching_are_scanned_first(committed, monkeypatch):
+    scans = []
+    monkeypatch.setattr(FileWatcher, "scan", lambda self, paths: scans.append(paths))
+    save("app.py", "print('changed')\n")
+    watcher = FileWatcher(debounce=0.5, poll=True, emit=lambda line: None)
+    watcher.source = ScriptedSource([set()])
+    with pytest.raises(KeyboardInterrupt):
+        watcher.run()
+    assert scans == [["app.py"]]
+
+
+def test_scan_fills_the_result_cache(committed, stub_tools, monkeypatch):
+    monkeypatch.delenv("QUALITY_GATE_NO_CACHE")
+    save("app.py", "result = eval(input())\n")
+    lines = []
+    watcher = FileWatcher(poll=True, jobs=1, emit=lines.append)
+    watcher.scan(["app.py", "README.md", "deleted.py"])
+    assert len(lines) == 1 and lines[0].startswith("🔍 Pre-scanned 1 file(s)")
+    cache_dir = os.path.join(".git", ResultCache.CACHE_DIRNAME)
+    assert any(files for _, _, files in os.walk(cache_dir))
+
+    # Files no analyzer handles are not scanned
+    lines.clear()
+    watcher.scan(["README.md"])
+    assert lines == []
+
+
+def test_watch_refuses_to_run_without_the_cache(committed, monkeypatch, capsys):
+    assert gate_watcher.watch_main([]) == 1
+    assert "result cache, which is disabled" in capsys.readouterr().out
+
+
+def test_watch_outside_a_repository(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+    assert gate_watcher.watch_main([]) == 1
+    assert "inside a git repository" in capsys.readouterr().out
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the index of changed line ranges.
+"""
+import subprocess
+
+from conftest import stage
+
+from hunk_index import HunkIndex
+from tool_result import ToolResult
+
+DIFF = """\
+diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -3 +3 @@ def main():
+-    return 1
++    return 2
+@@ -10,0 +11,3 @@ def main():
++a
++b
++c
+@@ -20,2 +23,0 @@ def helper():
+-x
+-y
+@@ -0,0 +1 @@
++#!/usr/bin/env python3
+diff --git a/old.py b/old.py
+deleted file mode 100644
+--- a/old.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-gone
+-too
+"""
+
+
+def test_parse_records_changed_lines_per_file():
+    index = HunkIndex.parse(DIFF)
+    assert index.intervals == {"app.py": [(1, 1), (3, 3), (11, 13), (23, 24)]}
+    assert "app.py" in index
+    assert "old.py" not in index
+
+
+def test_pure_deletion_marks_the_lines_around_it():
+    index = HunkIndex.parse("+++ b/app.py\n@@ -1,4 +0,0 @@\n@@ -9,2 +6,0 @@\n")
+    assert index.intervals == {"app.py": [(1, 1), (6, 7)]}
+    # A finding right after the removed block is reported
+    assert index.overlaps("app.py", 7, 7)
+    assert not index.overlaps("app.py", 8, 8)
+
+
+def test_adjacent_and_overlapping_hunks_merge():
+    index = HunkIndex({"app.py": [(5, 6), (1, 2), (3, 3), (6, 9), (12, 12)]})
+    assert index.intervals == {"app.py": [(1, 3), (5, 9), (12, 12)]}
+
+
+def test_quoted_and_tab_terminated_paths():
+    diff = (
+        '+++ "b/caf\\303\\251 \\"x\\".py"\n@@ -1 +1 @@\n'
+        "+++ b/with space.py\t\n@@ -2 +2,2 @@\n"
+    )
+    index = HunkIndex.parse(diff)
+    assert index.intervals == {'café "x".py': [(1, 1)], "with space.py": [(2, 3)]}
+
+
+def test_overlaps():
+    index = HunkIndex({"app.py": [(3, 3), (11, 13)]})
+    assert index.overlaps("app.py", 3, 3)
+    assert index.overlaps("app.py", 1, 3)
+    assert index.overlaps("app.py", 13, 20)
+    assert index.overlaps("app.py", 12, 10)
+    assert not index.overlaps("app.py", 4, 10)
+    assert not index.overlaps("app.py", 14, 14)
+    assert not index.overlaps("other.py", 3, 3)
+
+
+def test_from_staged_matches_the_staged_diff(git_repo):
+    stage("app.py", "".join(f"line {n}\n" for n in range(1, 11)))
+    stage("old.py", "gone\n")
+    subprocess.run(["git", "commit", "-q", "-m", "base"], check=True)
+    lines = [f"line {n}\n" for n in range(1, 11)]
+    lines[1] = "changed\n"
+    del lines[6]
+    stage("app.py", "".join(lines) + "new\n")
+    subprocess.run(["git", "rm", "-q", "old.py"], check=True)
+
+    index = HunkIndex.from_staged()
+    # Old line 7 was deleted between new lines 6 and 7
+    assert index.intervals == {"app.py": [(2, 2), (6, 7), (10, 10)]}
+
+
+def test_hunk_filter_hides_findings_outside_changed_lines():
+    result = ToolResult("Bandit", hunks=HunkIndex({"app.py": [(10, 12)]}))
+    result.add_error("in hunk", "app.py", 11)
+    result.add_error("outside hunk", "app.py", 2)
+    result.add_error("untouched file", "other.py", 2)
+    assert [f.message for f in result.errors] == ["in hunk", "untouched file"]
+    assert result.suppressed == 1
+    # Hidden findings are still attributed to their file for the cache
+    assert len(result.file_findings["app.py"]) == 2
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental JSON decoder of tool output.
+"""
+import io
+import json
+
+import pytest
+
+from json_stream import JsonStream
+
+# Semgrep-like output: selected arrays next to values that are skipped, with
+# numbers, literals, escapes and brackets inside strings to split
+SEMGREP_LIKE = (
+    '{"version": "1.50.0", "errors": [], "paths": {"scanned": ["a.py", "b]{.py"]},'
+    ' "results": [{"check_id": "r\\"1", "start": {"line": 95224.62, "col": 1e5},'
+    ' "extra": {"message": "a\\\\b \\u00e9 [x]", "fix": null, "ok": true}},'
+    ' -0.5E-3, false, null, 7, "tail"], "time": 12.25, "done": true,'
+    ' "nothing": null, "rate": -1, "note": "\\u2603\\n"}'
+)
+ARRAY_DOCUMENT = '[{"line": 1}, 20, 3.5e2, [1, [2]], "x", true, null]'
+
+
+def decode(text: str, arrays, splits=()):
+    """Feed a document in the chunks given by the split offsets."""
+    items = []
+    stream = JsonStream(arrays, lambda path, item: items.append((path, item)))
+    bounds = [0, *splits, len(text)]
+    for start, end in zip(bounds, bounds[1:]):
+        stream.feed(text[start:end])
+    stream.close()
+    return items, stream.fields
+
+
+def expected(text: str, path):
+    """Items and top-level scalar fields according to json.loads."""
+    document = json.loads(text)
+    array = document
+    for key in path:
+        array = array[key]
+    fields = {}
+    if isinstance(document, dict):
+        fields = {
+            key: value
+            for key, value in document.items()
+            if not isinstance(value, (dict, list))
+        }
+    return [(path, item) for item in array], fields
+
+
+@pytest.mark.parametrize(
+    "text, path", [(SEMGREP_LIKE, ("results",)), (ARRAY_DOCUMENT, ())]
+)
+def test_every_split_point_matches_json_loads(text, path):
+    reference = expected(text, path)
+    for split in range(len(text) + 1):
+        assert decode(text, [path], [split]) == reference, split
+
+
+@pytest.mark.parametrize("size", range(1, 8))
+def test_small_chunks_match_json_loads(size):
+    splits = range(size, len(SEMGREP_LIKE), size)
+    assert decode(SEMGREP_LIKE, [("results",)], splits) == expected(
+        SEMGREP_LIKE, ("results",)
+    )
+
+
+@pytest.mark.parametrize(
+    "text, splits, value",
+    [
+        ("[95224.62]", [6], 95224.62),
+        ("[1e5]", [2], 1e5),
+        ("[-12]", [2], -12),
+        ("[true]", [3], True),
+        ("[null]", [2], None),
+        ('["a\\u00e9"]', [4], "aé"),
+        ('["a\\"b"]', [3], 'a"b'),
+    ],
+)
+def test_scalar_split_inside_value(text, splits, value):
+    assert decode(text, [()], splits) == ([((), value)], {})
+
+
+def test_top_level_number_split_before_closing_brace():
+    assert decode('{"count": 12}', [("results",)], [11])[1] == {"count": 12}
+
+
+def test_feed_file_reads_whole_document():
+    items = []
+    stream = JsonStream([("results",)], lambda path, item: items.append(item))
+    stream.feed_file(io.StringIO(SEMGREP_LIKE))
+    assert items == json.loads(SEMGREP_LIKE)["results"]
+    assert stream.items == len(items)
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("", "no JSON output"),
+        ('{"results": [1, 2', "truncated JSON output"),
+        ('{"results": [1.]}', "expected ','"),
+        ('{"results": [1]} x', "extra data"),
+        ('{"results" [1]}', "expected ':'"),
+    ],
+)
+def test_invalid_documents_raise(text, message):
+    with pytest.raises(ValueError, match=message):
+        decode(text, [("results",)])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Unit tests for memory-aware admission of tool invocations.
+"""
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from conftest import stage
+
+import memory_governor
+from memory_governor import MemoryGovernor, memory_budget_kb
+from quality_gate import QualityGate
+
+# Holds about 64 MB of resident memory until its stdin closes
+HOLDS_MEMORY = [
+    sys.executable,
+    "-c",
+    "import sys; block = bytearray(64 << 20); sys.stdin.read()",
+]
+
+
+def test_memory_budget(monkeypatch):
+    monkeypatch.setattr(memory_governor, "available_memory_kb", lambda: 1000)
+    assert memory_budget_kb() == 750
+    assert memory_budget_kb(2) == 2048
+    monkeypatch.setenv("QUALITY_GATE_MEMORY_MB", "0.5")
+    assert memory_budget_kb() == 512
+    monkeypatch.setenv("QUALITY_GATE_MEMORY_MB", "plenty")
+    assert memory_budget_kb() == 750
+    monkeypatch.setattr(memory_governor, "available_memory_kb", lambda: None)
+    assert memory_budget_kb() == 0
+    assert MemoryGovernor.for_repository(None) is None
+
+
+def test_estimates_grow_with_the_input():
+    governor = MemoryGovernor(1 << 20)
+    assert governor.estimate("Semgrep", 100, 500) == 500
+    governor.observations["Semgrep"] = [(100, 1000), (300, 2000), (200, 3000)]
+    # The lowest peak among invocations on at least as much input
+    assert governor.estimate("Semgrep", 150, 500) == 2000
+    assert governor.estimate("Semgrep", 300, 500) == 2000
+    # Extrapolated from the smallest and largest measured inputs
+    assert governor.estimate("Semgrep", 500, 500) == 3000
+    governor.observations["ESLint"] = [(100, 200)]
+    assert governor.estimate("ESLint", 200, 500) == 500
+
+
+def test_invocations_wait_for_memory():
+    governor = MemoryGovernor(1000)
+    # Admitted alone although its estimate exceeds the budget
+    first = governor.admit("Semgrep", 10, 1500, lambda: False)
+    assert first.reserved_kb == 1500
+
+    admitted = []
+    waiter = threading.Thread(
+        target=lambda: admitted.append(governor.admit("ESLint", 10, 400, lambda: False))
+    )
+    waiter.start()
+    time.sleep(0.3)
+    assert not admitted
+    governor.release(first)
+    waiter.join(timeout=5)
+    assert admitted[0].reserved_kb == 400
+    assert (governor.waits, governor.waited > 0.2) == (1, True)
+
+    # A second invocation fitting in the budget starts right away
+    beside = governor.admit("Lizard", 10, 600, lambda: False)
+    assert beside is not None and governor.waits == 1
+    governor.reset()
+    assert (governor.waits, governor.waited) == (0, 0.0)
+
+
+def test_stop_gives_up_waiting():
+    governor = MemoryGovernor(1000)
+    governor.admit("Semgrep", 10, 800, lambda: False)
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+    start = time.monotonic()
+    assert governor.admit("ESLint", 10, 400, stop.is_set) is None
+    assert time.monotonic() - start < 2
+
+
+def test_sampled_usage_grows_the_reservation(monkeypatch):
+    monkeypatch.setattr(memory_governor, "SAMPLE_INTERVAL", 0.05)
+    governor = MemoryGovernor(1 << 30)
+    lease = governor.admit("Semgrep", 10, 1024, lambda: False)
+    process = subprocess.Popen(
+        HOLDS_MEMORY, stdin=subprocess.PIPE, start_new_session=True
+    )
+    try:
+        governor.track(lease, process)
+        for _ in range(100):
+            if lease.reserved_kb > 64 * 1024:
+                break
+            time.sleep(0.05)
+    finally:
+        process.stdin.close()
+        process.wait()
+    assert lease.reserved_kb > 64 * 1024
+    assert governor._reserved.value == lease.reserved_kb
+    assert governor.release(lease) >= 64 * 1024
+    assert (governor._reserved.value, governor._running.value) == (0, 0)
+
+
+def test_learned_estimates_are_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_governor, "MAX_OBSERVATIONS", 3)
+    path = str(tmp_path / MemoryGovernor.ESTIMATES_FILENAME)
+    governor = MemoryGovernor(1000, path)
+    governor.record({"Semgrep": [(1, 10), (2, 0)], "Lizard": [(1, 0)]})
+    # Unmeasured invocations are ignored
+    assert governor.observations == {"Semgrep": [(1, 10)]}
+    governor.record({"Semgrep": [(3, 30), (4, 40), (5, 50)]})
+    # Only the most recent invocations are kept
+    assert MemoryGovernor(1000, path).observations == {
+        "Semgrep": [(3, 30), (4, 40), (5, 50)]
+    }
+
+
+@pytest.mark.parametrize(
+    "content", ["not json", '{"format": 0, "tools": {}}', '{"format": 1}', "[]"]
+)
+def test_unreadable_estimates_are_ignored(tmp_path, content):
+    path = tmp_path / MemoryGovernor.ESTIMATES_FILENAME
+    path.write_text(content)
+    assert MemoryGovernor(1000, str(path)).observations == {}
+
+
+def test_gate_runs_tools_one_at_a_time_on_a_tiny_budget(
+    git_repo, stub_tools, monkeypatch
+):
+    monkeypatch.setenv("QUALITY_GATE_MEMORY_MB", "1")
+    monkeypatch.setenv("STUB_DELAY_MS", "200")
+    stage("app.py", "result = eval(input())\n")
+    gate = QualityGate(jobs=4)
+    _, messages = gate.run_all_checks(["app.py"])
+    assert gate.governor.budget_kb == 1024
+    assert gate.governor.waits > 0
+    assert any("waited" in message for message in messages)
+    assert not gate.interrupted
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for running tools with a deadline and cancellation.
+"""
+import os
+import subprocess
+import threading
+import time
+from typing import List
+
+import pytest
+
+from process_runner import ToolCancelled, run_captured
+
+# Closes its stdout right away, then keeps running
+CLOSES_STDOUT = ["sh", "-c", "echo '[1, 2]'; exec 1>&-; sleep 5"]
+
+
+def alive(pid: int) -> bool:
+    """Whether a process is still running (zombies count as gone)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as handle:
+            return handle.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+def background_child(tmp_path) -> List[str]:
+    """Command starting a long-running child and recording its pid."""
+    return ["sh", "-c", f"sleep 30 & echo $! > {tmp_path}/child; wait"]
+
+
+def child_pid(tmp_path) -> int:
+    """Pid recorded by ``background_child``."""
+    for _ in range(50):
+        path = tmp_path / "child"
+        if path.exists() and path.read_text().strip():
+            return int(path.read_text())
+        time.sleep(0.05)
+    raise AssertionError("the child was not started")
+
+
+def test_streamed_tool_closing_stdout_still_times_out():
+    chunks = []
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_captured(CLOSES_STDOUT, deadline=start + 0.5, on_stdout=chunks.append)
+    assert time.monotonic() - start < 2
+    assert "".join(chunks) == "[1, 2]\n"
+
+
+def test_streamed_tool_closing_stdout_can_be_cancelled():
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    start = time.monotonic()
+    with pytest.raises(ToolCancelled):
+        run_captured(CLOSES_STDOUT, cancel=cancel, on_stdout=lambda text: None)
+    assert time.monotonic() - start < 2
+
+
+def test_streamed_tool_holding_stderr_open_still_times_out():
+    # The tool exits, but a child it started keeps stderr open
+    command = ["sh", "-c", "sleep 5 >/dev/null & echo done"]
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_captured(command, deadline=start + 0.5, on_stdout=lambda text: None)
+    assert time.monotonic() - start < 2
+
+
+def test_streamed_output_and_stderr_are_collected():
+    chunks = []
+    command = ["sh", "-c", "printf 'caf\\303\\251'; echo oops >&2; exit 3"]
+    completed, _ = run_captured(
+        command, deadline=time.monotonic() + 10, on_stdout=chunks.append
+    )
+    assert "".join(chunks) == "café"
+    assert (completed.returncode, completed.stdout, completed.stderr) == (
+        3,
+        "",
+        "oops\n",
+    )
+
+
+def test_captured_output_and_status():
+    completed, process = run_captured(
+        ["sh", "-c", "echo out; echo err >&2; exit 2"], deadline=time.monotonic() + 10
+    )
+    assert (completed.returncode, completed.stdout, completed.stderr) == (
+        2,
+        "out\n",
+        "err\n",
+    )
+    assert process.returncode == 2
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_deadline_kills_the_whole_process_group(tmp_path, streamed):
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_captured(
+            background_child(tmp_path),
+            deadline=start + 0.5,
+            on_stdout=(lambda text: None) if streamed else None,
+        )
+    assert time.monotonic() - start < 2
+    pid = child_pid(tmp_path)
+    for _ in range(50):
+        if not alive(pid):
+            break
+        time.sleep(0.05)
+    assert not alive(pid)
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_cancel_event_stops_the_tool(tmp_path, streamed):
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    start = time.monotonic()
+    with pytest.raises(ToolCancelled):
+        run_captured(
+            background_child(tmp_path),
+            cancel=cancel,
+            on_stdout=(lambda text: None) if streamed else None,
+        )
+    assert time.monotonic() - start < 2
+    assert not alive(child_pid(tmp_path))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the live progress of a run.
+"""
+import re
+
+from conftest import stage
+
+import quality_gate
+from progress_reporter import ProgressReporter
+from tool_result import ToolResult
+
+
+def reporter_lines(**options):
+    """Reporter writing to a list, and the list with elapsed times removed."""
+    lines = []
+    reporter = ProgressReporter(lines.append, **options)
+    return reporter, lines
+
+
+def without_times(lines):
+    """Lines with their elapsed time dropped, for comparison."""
+    return [re.sub(r" \[\d+\.\ds\]$", "", line) for line in lines]
+
+
+def test_findings_are_printed_once_then_the_status():
+    reporter, lines = reporter_lines()
+    reporter.start({"Bandit": 1, "Lizard": 1}, 2)
+    result = ToolResult("Bandit")
+    result.add_error("Use of eval", "app.py", 3)
+    reporter.finding("Bandit", result.errors[0])
+    result.add_warning("Weak hash", "lib.py", 9)
+    reporter.finished(result)
+    reporter.finished(ToolResult("Lizard"))
+    assert without_times(lines) == [
+        "⏳ Checking 2 file(s) with Bandit, Lizard...",
+        "    🚫 Security: app.py:3 - Use of eval",
+        "    ⚠️ Security: lib.py:9 - Weak hash",
+        "  ❌ Bandit: 1 error(s), 1 warning(s)",
+        "  ✅ Lizard: no issues",
+    ]
+
+
+def test_findings_over_the_limit_are_left_to_the_summary():
+    reporter, lines = reporter_lines(limit=1)
+    reporter.start({"Lizard": 1}, 1)
+    result = ToolResult("Lizard")
+    for line in (1, 2, 3):
+        result.add_warning("Too complex", "app.py", line)
+    reporter.finished(result)
+    assert without_times(lines[1:]) == [
+        "    ⚠️ Complexity: app.py:1 - Too complex",
+        "  ⚠️ Lizard: 3 warning(s), 2 only in the summary",
+    ]
+
+
+def test_tool_run_in_parts_reports_once_all_parts_finished():
+    reporter, lines = reporter_lines()
+    reporter.start({"Semgrep": 2}, 4)
+    for shard in ("a.py", "b.py"):
+        result = ToolResult("Semgrep")
+        result.add_warning(f"Finding in {shard}", shard, 1)
+        result.add_issue("warning", "Semgrep warning: rule parse error")
+        reporter.finished(result)
+    # The notice repeated by the second shard is printed once
+    assert without_times(lines[1:]) == [
+        "    ⚠️ Semgrep: a.py:1 - Finding in a.py",
+        "    ⚠️ Semgrep warning: rule parse error",
+        "    ⚠️ Semgrep: b.py:1 - Finding in b.py",
+        "  ⚠️ Semgrep: 2 warning(s)",
+    ]
+
+
+def test_interrupted_skipped_and_stopping_tools():
+    reporter, lines = reporter_lines()
+    reporter.start({"Semgrep": 1, "ESLint": 1}, 1)
+    reporter.stopping("Bandit")
+    reporter.stopping("Lizard")
+    result = ToolResult("Semgrep")
+    result.add_error("Detected eval", "app.py", 1)
+    result.interrupt("timed out after 1s")
+    reporter.finished(result)
+    reporter.finished(ToolResult("ESLint"), "run by the eslint hook")
+    assert without_times(lines[1:]) == [
+        "  ⛔ Bandit reported an error; stopping the other tools",
+        "    🚫 Semgrep: app.py:1 - Detected eval",
+        "  ⏱️ Semgrep: 1 error(s); timed out after 1s",
+        "  ⏭️ ESLint: run by the eslint hook",
+    ]
+
+
+def test_gate_prints_progress_before_the_summary(git_repo, stub_tools):
+    stage("app.py", "result = eval(input())\n")
+    lines = []
+    args = quality_gate.build_parser().parse_args(["--progress"])
+    assert quality_gate.run(args, emit=lines.append) == 1
+    summary = lines.index("\n🚫 ERRORS:")
+    progress = lines[:summary]
+    assert any(line.startswith("⏳ Checking 1 file(s) with ") for line in progress)
+    assert any(line.startswith("  ❌ Horusec: 1 error(s)") for line in progress)
+    assert any(line.startswith("    🚫 Horusec: app.py:1") for line in progress)
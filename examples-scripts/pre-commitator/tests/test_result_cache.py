@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-file findings cache.
+"""
+import os
+import subprocess
+
+from conftest import stage
+
+from quality_gate import QualityGate
+from result_cache import ResultCache
+
+
+def cached_entries(git_dir: str) -> int:
+    """Number of entries in a repository's result cache."""
+    directory = os.path.join(git_dir, ResultCache.CACHE_DIRNAME)
+    return sum(len(files) for _, _, files in os.walk(directory))
+
+
+def run_analyzer(name: str, path: str) -> QualityGate:
+    """Run one analyzer on a file with the cache enabled."""
+    gate = QualityGate(jobs=1)
+    gate.analyzers = [gate.analyzer(name)]
+    gate.run_all_checks([path])
+    return gate
+
+
+def test_blob_sha_matches_git(git_repo):
+    stage("app.py", "print('hello')\n")
+    expected = subprocess.run(
+        ["git", "hash-object", "app.py"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert ResultCache.blob_sha("app.py") == expected
+    assert ResultCache.blob_sha("missing.py") is None
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("abc", "app.py", "Bandit", "1.8.3", ["-f", "json"])
+    assert cache.get(key) is None
+    cache.put(key, [[1, 1, "B307", "error", "eval"]])
+    assert cache.get(key) == [[1, 1, "B307", "error", "eval"]]
+    assert key != cache.key("abc", "app.py", "Bandit", "1.8.4", ["-f", "json"])
+
+
+def test_unpinned_semgrep_findings_are_not_cached(git_repo, stub_tools, monkeypatch):
+    monkeypatch.delenv("QUALITY_GATE_NO_CACHE")
+    stage("app.py", "result = eval(input())\n")
+
+    first = run_analyzer("Semgrep", "app.py")
+    assert first.errors + first.warnings
+    assert cached_entries(".git") == 0
+    # Registry rules may have changed; the next run scans again
+    second = run_analyzer("Semgrep", "app.py")
+    assert second.tool_seconds["Semgrep"] > 0
+
+    run_analyzer("Lizard", "app.py")
+    assert cached_entries(".git") == 1
+
+
+def test_fallback_findings_are_not_cached_as_the_backend(
+    git_repo, stub_tools, monkeypatch
+):
+    monkeypatch.delenv("QUALITY_GATE_NO_CACHE")
+    monkeypatch.delenv("QUALITY_GATE_IN_PROCESS")
+    stage("app.py", "result = eval(input())\n")
+    backend_scans = []
+
+    def run_bandit(backend_works: bool) -> QualityGate:
+        gate = QualityGate(jobs=1)
+        bandit = gate.analyzer("Bandit")
+        bandit.in_process_version = lambda: "backend-1"
+
+        def run_in_process(files, tool_result, workdir, stopper):
+            backend_scans.append(files)
+            return backend_works
+
+        bandit.run_in_process = run_in_process
+        gate.analyzers = [bandit]
+        gate.run_all_checks(["app.py"])
+        return gate
+
+    # The backend fails and the command-line tool reports the finding
+    assert run_bandit(backend_works=False).warnings
+    # The backend must scan for itself, not replay the fallback's findings
+    backend = run_bandit(backend_works=True)
+    assert len(backend_scans) == 2
+    assert backend.errors + backend.warnings == []
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the run history and its reports.
+"""
+import os
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+from conftest import stage
+
+import quality_gate
+import run_history
+from findings import ERROR, WARNING, Finding
+from run_history import RunHistory, percentile
+
+
+def finished_gate(files, seconds, findings=(), interrupted=None):
+    """Stand-in for a QualityGate after a run.
+
+    Args:
+        files: Files the run checked
+        seconds: {(tool, path): seconds} attributed to each file
+        findings: (tool, path, rule, severity) tuples
+        interrupted: {tool: reason} for interrupted tools
+    """
+    reported = [
+        Finding(tool, path, 1, 1, rule, severity, f"{rule} in {path}")
+        for tool, path, rule, severity in findings
+    ]
+    tool_seconds = {}
+    for (tool, _), cost in seconds.items():
+        tool_seconds[tool] = tool_seconds.get(tool, 0.0) + cost
+    return SimpleNamespace(
+        files=list(files),
+        file_seconds=dict(seconds),
+        tool_seconds=tool_seconds,
+        errors=[finding for finding in reported if finding.is_error],
+        warnings=[finding for finding in reported if not finding.is_error],
+        interrupted=interrupted or {},
+    )
+
+
+def count(history: RunHistory, table: str) -> int:
+    """Number of rows in a table of the history."""
+    with sqlite3.connect(history.path) as connection:
+        return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def history(tmp_path):
+    """Empty history keeping three runs."""
+    return RunHistory(str(tmp_path / run_history.HISTORY_FILENAME), max_runs=3)
+
+
+def test_percentile():
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.0
+    assert percentile([float(value) for value in range(1, 21)], 95) == 19.0
+
+
+def test_record_stores_a_run(history):
+    gate = finished_gate(
+        ["a.py", "b.py"],
+        {("Lizard", "a.py"): 0.5, ("Lizard", "b.py"): 0.25, ("Bandit", "a.py"): 1.0},
+        [("Bandit", "a.py", "B307", ERROR), ("Lizard", "b.py", "CCN", WARNING)],
+        {"Semgrep": "timed out after 1s"},
+    )
+    history.record(gate, "staged", 1, time.time(), 2.0)
+    with sqlite3.connect(history.path) as connection:
+        assert connection.execute(
+            "SELECT mode, status, files, errors, warnings FROM runs"
+        ).fetchall() == [("staged", 1, 2, 1, 1)]
+        assert connection.execute(
+            "SELECT tool, seconds, errors, warnings, interrupted FROM tool_runs "
+            "ORDER BY tool"
+        ).fetchall() == [
+            ("Bandit", 1.0, 1, 0, None),
+            ("Lizard", 0.75, 0, 1, None),
+            ("Semgrep", 0.0, 0, 0, "timed out after 1s"),
+        ]
+    assert (count(history, "paths"), count(history, "file_costs")) == (2, 3)
+
+
+def test_only_the_most_recent_runs_are_kept(history):
+    for run in range(5):
+        gate = finished_gate(
+            [f"{run}.py"],
+            {("Lizard", f"{run}.py"): 0.1},
+            [("Lizard", f"{run}.py", "CCN", WARNING)],
+        )
+        history.record(gate, "staged", 0, time.time(), 1.0)
+    with sqlite3.connect(history.path) as connection:
+        assert connection.execute("SELECT id FROM runs").fetchall() == [
+            (3,),
+            (4,),
+            (5,),
+        ]
+    for table in run_history.CHILD_TABLES:
+        assert count(history, table) == 3
+    # Interned paths stay
+    assert count(history, "paths") == 5
+
+
+def test_max_runs_from_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("QUALITY_GATE_HISTORY_MAX_RUNS", "7")
+    assert RunHistory(str(tmp_path / "history")).max_runs == 7
+    monkeypatch.setenv("QUALITY_GATE_HISTORY_MAX_RUNS", "many")
+    assert (
+        RunHistory(str(tmp_path / "history")).max_runs == run_history.DEFAULT_MAX_RUNS
+    )
+
+
+def test_histories_of_another_schema_are_started_afresh(history):
+    with sqlite3.connect(history.path) as connection:
+        connection.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, old TEXT)")
+        connection.execute("PRAGMA user_version = 0")
+    history.record(finished_gate(["a.py"], {}), "files", 0, time.time(), 0.1)
+    assert count(history, "runs") == 1
+
+
+def test_slowest_tools_and_trend(history):
+    history.max_runs = 10
+    for seconds in (1.0, 1.0, 3.0, 3.0):
+        gate = finished_gate(
+            ["a.py"], {("Semgrep", "a.py"): seconds, ("Lizard", "a.py"): 0.5}
+        )
+        history.record(gate, "staged", 0, time.time(), seconds)
+    lines = history.slowest_tools()
+    assert lines[0] == "\n🐢 SLOWEST TOOLS (last 50 runs):"
+    semgrep, lizard = lines[3:]
+    assert semgrep.split()[:5] == ["Semgrep", "4", "2.000", "3.000", "8.000"]
+    assert semgrep.endswith("3.0x slower")
+    assert lizard.startswith("Lizard") and lizard.endswith("steady")
+    assert history.slowest_tools(mode="all")[3] == "No tool runs recorded."
+
+
+def test_slowest_files_and_their_share(history):
+    costs = {("Lizard", "big.py"): 3.0, ("Lizard", "a.py"): 0.6}
+    costs[("Lizard", "b.py")] = 0.4
+    history.record(finished_gate(list({p for _, p in costs}), costs), "all", 0, 0, 4)
+    lines = history.slowest_files(top=2)
+    assert [line.split() for line in lines[3:5]] == [
+        ["3.000", "75%", "Lizard", "big.py"],
+        ["0.600", "15%", "Lizard", "a.py"],
+    ]
+    assert lines[5] == "Lizard: 1 of 3 file(s) account for 75% of its time."
+
+
+def test_commit_latency_counts_staged_runs_by_day(history):
+    history.max_runs = 10
+    now = time.time()
+    for seconds in (1.0, 2.0):
+        history.record(finished_gate([], {}), "staged", 0, now, seconds)
+    history.record(finished_gate([], {}), "all", 0, now, 60.0)
+    history.record(finished_gate([], {}), "staged", 0, now - 30 * 86400, 9.0)
+    lines = history.commit_latency(days=14)
+    assert lines[3].split() == [
+        time.strftime("%Y-%m-%d"),
+        "2",
+        "1.000",
+        "2.000",
+        "2.000",
+    ]
+    assert len(lines) == 4
+
+
+def test_finding_churn_compares_files_both_runs_checked(history):
+    history.record(
+        finished_gate(
+            ["a.py", "b.py"],
+            {},
+            [("Bandit", "a.py", "B307", ERROR), ("Bandit", "b.py", "B105", ERROR)],
+        ),
+        "staged",
+        1,
+        time.time(),
+        1.0,
+    )
+    # b.py was not checked again: its finding is not counted as resolved
+    history.record(
+        finished_gate(
+            ["a.py", "c.py"],
+            {},
+            [("Lizard", "a.py", "CCN", WARNING), ("Bandit", "c.py", "B105", ERROR)],
+        ),
+        "staged",
+        1,
+        time.time(),
+        1.0,
+    )
+    lines = history.finding_churn()
+    assert len(lines) == 4
+    assert lines[3].split()[2:] == ["staged", "1", "1", "1"]
+
+
+def test_empty_history_reports(history):
+    assert history.finding_churn()[-1] == "Not enough runs recorded."
+    assert history.commit_latency()[-1] == "No commits recorded."
+    assert history.slowest_files()[-1] == "No file costs recorded."
+
+
+def test_gate_records_runs_and_reports_them(git_repo, stub_tools, monkeypatch, capsys):
+    monkeypatch.setenv("QUALITY_GATE_HISTORY", "1")
+    stage("app.py", "result = eval(input())\n")
+    args = quality_gate.build_parser().parse_args(["--no-progress"])
+    assert quality_gate.run(args) == 1
+    assert os.path.exists(os.path.join(".git", run_history.HISTORY_FILENAME))
+    capsys.readouterr()
+
+    assert run_history.report_main(["--mode", "staged"]) == 0
+    output = capsys.readouterr().out
+    assert "🐢 SLOWEST TOOLS" in output and "\nLizard" in output
+
+
+def test_report_without_history(git_repo, capsys):
+    assert run_history.report_main([]) == 1
+    assert "No runs recorded yet" in capsys.readouterr().out
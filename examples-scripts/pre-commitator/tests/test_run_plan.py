@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pre-commit run plan and the hooks that reuse its results.
+"""
+
+import os
+import shutil
+
+import pytest
+from conftest import ROOT, stage
+
+import quality_gate
+import run_plan
+from analyzers import create_analyzers
+from run_plan import Hook, RunPlan
+
+pytest.importorskip("yaml")
+
+CONFIG = """\
+default_stages: [pre-commit]
+repos:
+  - repo: https://github.com/semgrep/pre-commit
+    rev: v1.50.0
+    hooks:
+      - id: semgrep
+  - repo: local
+    hooks:
+      - id: bandit
+        entry: python3 src/quality_gate.py hook bandit
+      - id: lizard
+        entry: python3 src/quality_gate.py hook lizard
+      - id: eslint
+        entry: npx eslint
+        stages: [pre-push]
+      - id: horusec
+        entry: horusec start
+        stages: [commit, pre-push]
+"""
+
+# Analyzers VS Code mode disables in the quality gate (see switch_mode.sh)
+VSCODE_DISABLED = ["LIZARD", "BANDIT", "SEMGREP"]
+
+
+def test_vscode_mode_hooks_run_analyzers_disabled_in_gate(
+    git_repo, stub_tools, monkeypatch, capsys
+):
+    shutil.copy(
+        os.path.join(ROOT, "config", "pre-commit-vscode.yaml"),
+        ".pre-commit-config.yaml",
+    )
+    stage("app.py", "result = eval(input())\n")
+    for name in VSCODE_DISABLED:
+        monkeypatch.setenv(f"DISABLE_{name}", "1")
+
+    args = quality_gate.build_parser().parse_args(["--run-plan", "--no-progress"])
+    quality_gate.run(args)
+    published = run_plan.load_results(run_plan.results_path(".git"))
+    assert {published[name]["state"] for name in ("Lizard", "Bandit", "Semgrep")} == {
+        "disabled"
+    }
+
+    for hook, label in (
+        ("lizard", "Complexity"),
+        ("bandit", "Security"),
+        ("semgrep", "Semgrep"),
+    ):
+        capsys.readouterr()
+        run_plan.hook_main([hook, "app.py"])
+        output = capsys.readouterr().out
+        assert f"{label}: app.py:1" in output, output
+
+
+def write_config(text: str) -> str:
+    """Write a pre-commit configuration and return its path."""
+    with open(run_plan.CONFIG_NAME, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    return run_plan.CONFIG_NAME
+
+
+def analyzers_by_name():
+    """The quality gate's analyzers, by name."""
+    return {analyzer.name: analyzer for analyzer in create_analyzers()}
+
+
+def test_load_keeps_the_hooks_run_on_commit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    plan = RunPlan.load(write_config(CONFIG))
+    assert plan.hooks == [
+        Hook("semgrep", "https://github.com/semgrep/pre-commit", ""),
+        Hook("bandit", "local", "python3 src/quality_gate.py hook bandit"),
+        Hook("lizard", "local", "python3 src/quality_gate.py hook lizard"),
+        Hook("horusec", "local", "horusec start"),
+    ]
+
+    monkeypatch.setenv("SKIP", "semgrep, horusec")
+    assert [hook.id for hook in RunPlan.load().hooks] == ["bandit", "lizard"]
+
+
+def test_default_stages_apply_to_hooks_without_stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_config(CONFIG.replace("[pre-commit]", "[pre-push]"))
+    assert [hook.id for hook in RunPlan.load().hooks] == ["horusec"]
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("repos: [", "not valid YAML"),
+        ("hooks: []\n", "no list of repos"),
+        ("repos: [local]\n", "repo that is not a mapping"),
+        ("repos: [{repo: local, hooks: lizard}]\n", "hooks are not a list"),
+        ("repos: [{repo: local, hooks: [{entry: lizard}]}]\n", "hook without an id"),
+        ("repos: [{repo: local, hooks: [lizard]}]\n", "hook without an id"),
+    ],
+)
+def test_load_rejects_invalid_configs(tmp_path, monkeypatch, text, message):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match=message):
+        RunPlan.load(write_config(text))
+
+
+def test_gate_falls_back_to_every_analyzer_without_a_valid_plan(
+    git_repo, stub_tools, capsys
+):
+    write_config("repos: [{repo: local, hooks: [{entry: lizard}]}]\n")
+    stage("app.py", "print('hello')\n")
+    args = quality_gate.build_parser().parse_args(["--run-plan", "--no-progress"])
+    quality_gate.run(args)
+    output = capsys.readouterr().out
+    assert "No run plan (.pre-commit-config.yaml has a hook without an id)" in output
+    assert "Complexity: app.py:1" in output
+
+
+def test_runner_and_reusing_hooks():
+    plan = RunPlan(
+        [
+            Hook("semgrep", "https://github.com/semgrep/pre-commit", ""),
+            Hook("bandit", "local", "python3 src/quality_gate.py hook bandit"),
+        ]
+    )
+    analyzers = analyzers_by_name()
+    assert plan.runner(analyzers["Semgrep"]).id == "semgrep"
+    assert plan.runner(analyzers["Bandit"]) is None
+    assert [hook.id for hook in plan.hooks_for(analyzers["Bandit"])] == ["bandit"]
+    assert plan.hooks_for(analyzers["Lizard"]) == []
+
+
+def test_describe(monkeypatch):
+    plan = RunPlan(
+        [
+            Hook("semgrep", "https://github.com/semgrep/pre-commit", ""),
+            Hook("bandit", "local", "python3 src/quality_gate.py hook bandit"),
+            Hook("lizard", "local", "python3 src/quality_gate.py hook lizard"),
+        ]
+    )
+    monkeypatch.setenv("DISABLE_LIZARD", "1")
+    monkeypatch.setenv("DISABLE_ESLINT", "1")
+    analyzers = analyzers_by_name()
+    names = ["Semgrep", "Bandit", "Lizard", "ESLint", "Horusec"]
+    assert plan.describe([analyzers[name] for name in names]) == [
+        "  - Semgrep: run by the 'semgrep' hook "
+        "(https://github.com/semgrep/pre-commit)",
+        "  - Bandit: run by the quality gate; reused by the 'bandit' hook",
+        "  - Lizard: disabled by DISABLE_LIZARD=1; run by the 'lizard' hook",
+        "  - ESLint: disabled by DISABLE_ESLINT=1",
+        "  - Horusec: run by the quality gate",
+    ]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Unit tests for distributed scans: leases, requeues and late results.
+"""
+import json
+import socket
+import subprocess
+import threading
+
+import pytest
+from conftest import stage
+
+import scan_coordinator
+from quality_gate import QualityGate
+from scan_coordinator import ScanCoordinator, ScanWorker
+from tool_result import ToolResult
+
+UNITS = [("Lizard", ["a.py"]), ("Bandit", ["a.py"])]
+
+
+class FakeGate:
+    """Gate whose scans report one warning naming the worker."""
+
+    def __init__(self, name: str = "worker"):
+        self.name = name
+
+    def scan_unit(self, analyzer, files):
+        if analyzer == "Missing":
+            raise KeyError(analyzer)
+        result = ToolResult(analyzer)
+        result.add_warning(f"scanned by {self.name}", files[0], 1)
+        return result
+
+
+class RawWorker:
+    """Worker speaking the protocol by hand, to misbehave on purpose."""
+
+    def __init__(self, address: str, commit=None, token: str = ""):
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.connect(address)
+        self.stream = self.connection.makefile("rwb")
+        self.welcome = self.ask({"type": "hello", "commit": commit, "token": token})
+
+    def ask(self, message):
+        """Send a message and return the coordinator's reply."""
+        self.stream.write(json.dumps(message).encode() + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        return json.loads(line) if line else None
+
+    def result(self, unit: int, message: str):
+        """Send a result with one warning for a unit."""
+        result = ToolResult("Lizard")
+        result.add_warning(message, "a.py", 1)
+        return self.ask({"type": "result", "unit": unit, "result": result.to_dict()})
+
+    def close(self):
+        self.stream.close()
+        self.connection.close()
+
+
+@pytest.fixture
+def coordinate(tmp_path, monkeypatch):
+    """Start coordinators on Unix sockets, running their scan on a thread."""
+    monkeypatch.setattr(scan_coordinator, "WAIT_SECONDS", 0.05)
+    started = []
+
+    def start(units=UNITS, **options):
+        path = str(tmp_path / f"scan{len(started)}.sock")
+        coordinator = ScanCoordinator(path, None, **options)
+        outcome = {}
+        thread = threading.Thread(
+            target=lambda: outcome.setdefault("results", coordinator.run(units)),
+            daemon=True,
+        )
+        thread.start()
+        started.append(coordinator)
+
+        def results():
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+            return outcome["results"]
+
+        return coordinator, results
+
+    yield start
+    for coordinator in started:
+        coordinator.close()
+
+
+def messages(result: ToolResult):
+    """Warning messages of a result."""
+    return [finding.message for finding in result.warnings]
+
+
+def test_parse_and_format_addresses():
+    assert scan_coordinator.parse_address("host:80") == (socket.AF_INET, ("host", 80))
+    assert scan_coordinator.parse_address(":80") == (
+        socket.AF_INET,
+        ("127.0.0.1", 80),
+    )
+    assert scan_coordinator.parse_address("/tmp/scan.sock")[0] == socket.AF_UNIX
+    with pytest.raises(ValueError):
+        scan_coordinator.parse_address("host")
+    assert scan_coordinator.format_address(socket.AF_INET, ("::1", 5)) == "::1:5"
+    assert scan_coordinator._is_local("127.0.0.1:0")
+    assert not scan_coordinator._is_local("0.0.0.0:0")
+
+
+def test_workers_scan_every_unit_once(coordinate):
+    coordinator, results = coordinate(UNITS + [("Missing", ["b.py"])])
+    worker = ScanWorker(coordinator.address)
+    assert worker.run(FakeGate()) == 0
+    lizard, bandit, missing = results()
+    assert (lizard.tool_name, messages(lizard)) == ("Lizard", ["scanned by worker"])
+    assert (bandit.tool_name, messages(bandit)) == ("Bandit", ["scanned by worker"])
+    assert missing.interrupted == "Missing is not available on a worker host"
+    assert (worker.units, coordinator.workers_seen, coordinator.requeued) == (3, 1, 0)
+
+
+def test_workers_with_the_wrong_token_or_commit_are_refused(coordinate):
+    coordinator, results = coordinate(token="secret")
+    lines = []
+    assert ScanWorker(coordinator.address, "guess").run(FakeGate(), lines.append)
+    assert lines == ["Error: The coordinator refused this worker: invalid scan token"]
+
+    coordinator.commit = "abc123"
+    raw = RawWorker(coordinator.address, commit="def456", token="secret")
+    assert raw.welcome["type"] == "error"
+    assert "the worker has def456 checked out" in raw.welcome["message"]
+    raw.close()
+
+    assert ScanWorker(coordinator.address, "secret").run(FakeGate()) == 1
+    coordinator.commit = None
+    assert ScanWorker(coordinator.address, "secret").run(FakeGate()) == 0
+    assert len(results()) == 2
+    assert coordinator.workers_seen == 1
+
+
+def test_units_of_a_lost_worker_are_requeued(coordinate):
+    coordinator, results = coordinate()
+    lost = RawWorker(coordinator.address)
+    assert lost.ask({"type": "next"})["unit"] == 0
+    lost.close()
+
+    assert ScanWorker(coordinator.address).run(FakeGate("second")) == 0
+    assert [messages(result) for result in results()] == [["scanned by second"]] * 2
+    assert coordinator.requeued == 1
+
+
+def test_expired_lease_is_requeued_and_the_first_result_wins(coordinate):
+    coordinator, results = coordinate(UNITS[:1], lease=0.2)
+    slow = RawWorker(coordinator.address)
+    assert slow.ask({"type": "next"})["unit"] == 0
+    # The lease expires while the second worker waits for a unit
+    fast = RawWorker(coordinator.address)
+    assert fast.ask({"type": "next"})["unit"] == 0
+    assert coordinator.requeued == 1
+
+    # The late result arrives first and is kept; the other one is dropped
+    assert slow.result(0, "late")["type"] == "done"
+    assert fast.result(0, "on time")["type"] == "done"
+    assert [messages(result) for result in results()] == [["late"]]
+    slow.close()
+    fast.close()
+
+
+def test_unit_is_given_up_after_max_attempts(coordinate):
+    coordinator, results = coordinate(UNITS[:1])
+    for _ in range(scan_coordinator.MAX_ATTEMPTS):
+        worker = RawWorker(coordinator.address)
+        assert worker.ask({"type": "next"})["type"] == "unit"
+        worker.close()
+    (result,) = results()
+    assert result.interrupted == (
+        f"1 file(s) not scanned: worker lost {scan_coordinator.MAX_ATTEMPTS} times"
+    )
+
+
+def test_scan_without_workers_gives_up_after_the_idle_timeout(coordinate):
+    _, results = coordinate(idle_timeout=0.1)
+    assert [result.interrupted for result in results()] == [
+        "1 file(s) not scanned: no worker connected for 0.1s"
+    ] * 2
+
+
+def test_distributed_full_scan(git_repo, stub_tools, tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_coordinator, "WAIT_SECONDS", 0.05)
+    stage("app.py", "result = eval(input())\n")
+    stage("lib/util.py", "x = 1\n")
+    subprocess.run(["git", "commit", "-q", "-m", "initial"], check=True)
+    coordinator = ScanCoordinator(
+        str(tmp_path / "scan.sock"), scan_coordinator.head_commit(), shards=2
+    )
+    worker = ScanWorker(coordinator.address)
+    thread = threading.Thread(
+        target=worker.run, args=(QualityGate(jobs=1), lambda line: None)
+    )
+    thread.start()
+    try:
+        gate = QualityGate(jobs=1)
+        success, output = gate.run_full_scan(coordinator=coordinator)
+    finally:
+        coordinator.close()
+        thread.join(timeout=10)
+    assert not success
+    assert "Complexity: app.py:1" in "\n".join(output)
+    assert worker.units > 0 and coordinator.requeued == 0
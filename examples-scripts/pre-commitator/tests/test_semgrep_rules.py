@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pinned store of Semgrep rule packs.
+"""
+import hashlib
+import os
+
+import pytest
+
+from quality_gate import QualityGate
+from semgrep_rules import SemgrepRuleStore
+
+PYTHON_RULES = b"rules:\n  - id: eval\n"
+JAVASCRIPT_RULES = b"rules:\n  - id: detect-eval\n"
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """Local registry serving the Python and JavaScript packs only."""
+    root = tmp_path / "registry"
+    (root / "p").mkdir(parents=True)
+    (root / "p" / "python").write_bytes(PYTHON_RULES)
+    (root / "p" / "javascript").write_bytes(JAVASCRIPT_RULES)
+    monkeypatch.setattr(SemgrepRuleStore, "REGISTRY_URL", root.as_uri() + "/{pack}")
+    return root
+
+
+def test_refresh_pins_the_downloaded_packs(registry, tmp_path):
+    store = SemgrepRuleStore(str(tmp_path / "store"))
+    assert not store.is_available()
+
+    report = store.refresh()
+    assert f"python: p/python ({len(PYTHON_RULES)} bytes)" in report
+    assert any(line.startswith("go: failed to download p/golang") for line in report)
+    assert store.is_available()
+    languages = store.index["languages"]
+    assert sorted(languages) == ["javascript", "python"]
+    assert languages["python"]["sha256"] == hashlib.sha256(PYTHON_RULES).hexdigest()
+
+    # A fresh store reads the same snapshot from disk
+    pinned = SemgrepRuleStore(store.directory)
+    assert pinned.index["languages"] == languages
+    with open(os.path.join(store.directory, "python.yaml"), "rb") as handle:
+        assert handle.read() == PYTHON_RULES
+
+
+def test_refresh_keeps_packs_that_fail_to_download(registry, tmp_path):
+    store = SemgrepRuleStore(str(tmp_path / "store"))
+    store.refresh()
+    (registry / "p" / "python").unlink()
+    (registry / "p" / "javascript").write_bytes(b"rules: []\n")
+
+    store.refresh()
+    languages = store.index["languages"]
+    assert languages["python"]["sha256"] == hashlib.sha256(PYTHON_RULES).hexdigest()
+    assert (
+        languages["javascript"]["sha256"] == hashlib.sha256(b"rules: []\n").hexdigest()
+    )
+
+
+def test_rules_for_files_selects_the_pinned_languages(registry, tmp_path):
+    store = SemgrepRuleStore(str(tmp_path / "store"))
+    store.refresh()
+    rules = store.rules_for_files(["b.tsx", "a.py", "c.jsx", "d.go", "e.md", "f.py"])
+    assert rules == [
+        (
+            os.path.join(store.directory, "javascript.yaml"),
+            hashlib.sha256(JAVASCRIPT_RULES).hexdigest(),
+        ),
+        (
+            os.path.join(store.directory, "python.yaml"),
+            hashlib.sha256(PYTHON_RULES).hexdigest(),
+        ),
+    ]
+    assert store.rules_for_files(["d.go", "README.md"]) == []
+
+
+def test_default_location(git_repo, monkeypatch, tmp_path):
+    store = SemgrepRuleStore.default(".git")
+    assert store.directory == os.path.join(".git", SemgrepRuleStore.STORE_DIRNAME)
+    monkeypatch.setenv("QUALITY_GATE_SEMGREP_RULES", "shared/rules")
+    assert SemgrepRuleStore.default(".git").directory == os.path.abspath("shared/rules")
+
+    monkeypatch.delenv("QUALITY_GATE_SEMGREP_RULES")
+    monkeypatch.chdir(tmp_path.parent)
+    assert SemgrepRuleStore.default() is None
+
+
+def test_semgrep_runs_offline_with_the_pinned_packs(registry, git_repo, monkeypatch):
+    monkeypatch.setenv("QUALITY_GATE_SEMGREP_RULES", str(git_repo / "rules"))
+    gate = QualityGate(jobs=1)
+    gate.semgrep_rules.refresh()
+    semgrep = gate.analyzer("Semgrep")
+
+    arguments, key_args = semgrep.prepare(["app.py"], gate)
+    assert arguments == [
+        "--metrics",
+        "off",
+        "--json",
+        "--error",
+        "--config",
+        os.path.join(str(git_repo / "rules"), "python.yaml"),
+    ]
+    assert "auto" not in arguments
+    assert key_args == [hashlib.sha256(PYTHON_RULES).hexdigest()]
+    # No pinned pack applies: Semgrep has nothing to run
+    assert semgrep.prepare(["main.go"], gate) is None
+
+
+def test_refresh_by_another_process_makes_the_store_stale(registry, tmp_path):
+    store = SemgrepRuleStore(str(tmp_path / "store"))
+    assert not store.is_available()
+    assert store.is_current()
+    SemgrepRuleStore(store.directory).refresh()
+    assert not store.is_current()
+    assert SemgrepRuleStore(store.directory).is_available()
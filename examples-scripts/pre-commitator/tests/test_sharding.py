@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Unit tests for splitting the files of a full scan into shards.
+"""
+from typing import Dict, List
+
+import pytest
+
+from file_index import FileIndex, FileInfo
+from quality_gate import QualityGate
+
+
+@pytest.fixture
+def gate(git_repo):
+    """Quality gate whose file sizes come from a file index."""
+    return QualityGate(jobs=1)
+
+
+def index_sizes(gate: QualityGate, sizes: Dict[str, int]) -> List[str]:
+    """Index files of the given sizes and return their paths."""
+    gate.file_index = FileIndex(
+        FileInfo(path, ".py", size, "") for path, size in sizes.items()
+    )
+    return list(sizes)
+
+
+def test_every_file_lands_in_exactly_one_sorted_shard(gate):
+    files = index_sizes(gate, {f"f{n:02}.py": (n * 37) % 11 for n in range(40)})
+    shards = gate._plan_shards(files, 4)
+    assert len(shards) == 4
+    assert sorted(path for shard in shards for path in shard) == sorted(files)
+    assert all(shard == sorted(shard) for shard in shards)
+
+
+def test_largest_files_are_spread_across_shards(gate):
+    files = index_sizes(
+        gate, {"big1.py": 100, "big2.py": 90, "mid.py": 60, "s1.py": 30, "s2.py": 20}
+    )
+    # 100 | 90 -> 100 | 150 -> 130 | 150 -> 150 | 150
+    assert gate._plan_shards(files, 2) == [
+        ["big1.py", "s1.py", "s2.py"],
+        ["big2.py", "mid.py"],
+    ]
+
+
+def test_no_empty_shards(gate):
+    files = index_sizes(gate, {"a.py": 1, "b.py": 2})
+    assert gate._plan_shards(files, 8) == [["b.py"], ["a.py"]]
+    assert gate._plan_shards([], 3) == []
+    assert gate._plan_shards(files, 0) == [["a.py", "b.py"]]
+
+
+def test_argument_budget_adds_shards(gate, monkeypatch):
+    monkeypatch.setattr(QualityGate, "SHARD_ARG_BUDGET", 20)
+    # Each path costs 9 bytes of arguments: at most two per shard
+    files = index_sizes(gate, {f"file{n}.py": 1 for n in range(5)})
+    shards = gate._plan_shards(files, 1)
+    assert [len(shard) for shard in shards] == [2, 2, 1]
+    assert sorted(path for shard in shards for path in shard) == sorted(files)
+
+
+def test_sizes_of_unindexed_files_are_read_from_disk(gate, tmp_path):
+    (tmp_path / "large.py").write_text("x = 1\n" * 100)
+    (tmp_path / "small.py").write_text("x = 1\n")
+    shards = gate._plan_shards(["small.py", "large.py", "missing.py"], 2)
+    assert shards == [["large.py"], ["missing.py", "small.py"]]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Unit tests for reading the staged changes.
+"""
+import subprocess
+
+from conftest import stage
+
+from staged_snapshot import list_staged_changes, parse_name_status
+
+
+def test_parse_name_status():
+    output = (
+        b"M\0app.py\0A\0new file.py\0R087\0old.py\0renamed.py\0"
+        b"C100\0src.py\0copy.py\0M\0caf\xc3\xa9.py\0"
+    )
+    assert parse_name_status(output) == [
+        ("M", "app.py"),
+        ("A", "new file.py"),
+        ("R", "renamed.py"),
+        ("C", "copy.py"),
+        ("M", "café.py"),
+    ]
+
+
+def test_parse_name_status_keeps_undecodable_paths():
+    [(status, path)] = parse_name_status(b"A\0bad\xff.py\0")
+    assert status == "A"
+    assert path.encode("utf-8", "surrogateescape") == b"bad\xff.py"
+
+
+def test_parse_name_status_of_no_changes():
+    assert parse_name_status(b"") == []
+
+
+def test_list_staged_changes_matches_git(git_repo):
+    stage("app.py", "print('app')\n")
+    stage("old.py", "".join(f"print({n})\n" for n in range(20)))
+    stage("gone.py", "print('gone')\n")
+    subprocess.run(["git", "commit", "-q", "-m", "base"], check=True)
+    stage("app.py", "print('changed')\n")
+    stage("added.py", "print('added')\n")
+    subprocess.run(["git", "mv", "old.py", "moved.py"], check=True)
+    subprocess.run(["git", "rm", "-q", "gone.py"], check=True)
+
+    assert sorted(list_staged_changes()) == [
+        ("A", "added.py"),
+        ("M", "app.py"),
+        ("R", "moved.py"),
+    ]
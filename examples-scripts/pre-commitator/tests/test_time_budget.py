@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the time budget, per-tool timeouts and fail-fast mode.
+"""
+import time
+
+import pytest
+from conftest import stage
+
+from quality_gate import QualityGate
+
+
+@pytest.fixture
+def slow_semgrep(git_repo, stub_tools, monkeypatch):
+    """Staged file whose Semgrep scan takes far longer than the others."""
+    monkeypatch.setenv("STUB_SEMGREP_DELAY_MS", "5000")
+    stage("app.py", "result = eval(input())\n")
+
+
+def run_gate(**options) -> QualityGate:
+    """Check app.py, making sure the slow tool did not run to the end."""
+    gate = QualityGate(jobs=4, **options)
+    start = time.monotonic()
+    gate.run_all_checks(["app.py"])
+    assert time.monotonic() - start < 3
+    return gate
+
+
+def test_fail_fast_cancels_the_other_tools(slow_semgrep):
+    gate = run_gate(fail_fast=True)
+    assert gate.interrupted == {
+        "Semgrep": "cancelled after another tool reported an error (fail-fast)"
+    }
+
+
+def test_fail_fast_from_the_environment(slow_semgrep, monkeypatch):
+    monkeypatch.setenv("QUALITY_GATE_FAIL_FAST", "1")
+    assert "Semgrep" in run_gate().interrupted
+
+
+def test_time_budget_interrupts_the_slow_tool(slow_semgrep):
+    gate = run_gate(budget=1)
+    assert gate.interrupted == {"Semgrep": "time budget of 1s exhausted"}
+    # The fast tools' findings are still reported
+    rendered = [finding.render() for finding in gate.errors + gate.warnings]
+    assert any(line.startswith("Complexity: app.py:1") for line in rendered)
+
+
+def test_tool_timeout_interrupts_only_that_tool(slow_semgrep, monkeypatch):
+    monkeypatch.setenv("QUALITY_GATE_TIMEOUT_SEMGREP", "0.5")
+    gate = run_gate()
+    assert gate.interrupted == {"Semgrep": "timed out after 0.5s"}
+    assert gate.tool_timeout("Semgrep") == 0.5
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-tool results and their serialized form.
+"""
+import json
+
+import pytest
+
+from findings import ERROR, WARNING
+from tool_result import ToolResult
+
+
+def sample_result() -> ToolResult:
+    """Result with findings of every kind and run statistics."""
+    result = ToolResult("Semgrep")
+    result.add_error("Detected eval", "app.py", 3, 5, rule="eval-detected")
+    result.add_warning("Weak hash", "lib/hash.py", 9, rule="md5")
+    result.add_issue(WARNING, "Semgrep warning: rule parse error")
+    result.add_time(2.0, ["app.py", "lib/hash.py"], [300, 100])
+    result.memory.append((400, 51200))
+    result.interrupt("time budget exceeded")
+    result.suppressed = 2
+    return result
+
+
+def snapshot(result: ToolResult):
+    """Everything ``to_dict`` promises to keep, in comparable form."""
+    return (
+        result.tool_name,
+        result.complete,
+        result.interrupted,
+        result.suppressed,
+        result.seconds,
+        result.file_seconds,
+        result.memory,
+        [(f.path, f.to_row()) for f in result.errors],
+        [(f.path, f.to_row()) for f in result.warnings],
+    )
+
+
+def test_dict_round_trip_through_json():
+    result = sample_result()
+    copy = ToolResult.from_dict(json.loads(json.dumps(result.to_dict())))
+    assert snapshot(copy) == snapshot(result)
+    assert copy.file_seconds == {"app.py": 1.5, "lib/hash.py": 0.5}
+    assert [f.tool for f in copy.errors + copy.warnings] == ["Semgrep"] * 3
+    assert copy.errors[0].severity == ERROR
+
+
+def test_from_dict_defaults_optional_fields():
+    copy = ToolResult.from_dict(
+        {
+            "tool": "Bandit",
+            "complete": True,
+            "findings": [["a.py", 1, 1, "B307", ERROR, "eval"]],
+        }
+    )
+    assert (copy.interrupted, copy.suppressed, copy.seconds) == (None, 0, 0.0)
+    assert [f.rule for f in copy.errors] == ["B307"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"complete": True, "findings": []},
+        {"tool": "Bandit", "complete": True, "findings": [["a.py", 1]]},
+        {"tool": "Bandit", "complete": True, "findings": [], "memory": [[1]]},
+    ],
+)
+def test_from_dict_rejects_malformed_data(data):
+    with pytest.raises((KeyError, TypeError, ValueError)):
+        ToolResult.from_dict(data)